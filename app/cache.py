@@ -0,0 +1,96 @@
+import time
+
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+from app import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """A small in-process LRU cache where every entry expires after a ttl.
+
+    Entries are evicted least recently used first once max_size is reached.
+    Stored values may be None, use `lookup` to tell a cached None from a miss.
+    Named caches export their hits and misses as metrics.
+    """
+
+    def __init__(
+        self, max_size: int = 1024, ttl: float = 60.0, name: Optional[str] = None
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+
+        self.hits = 0
+        self.misses = 0
+
+        self.__entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.lookup(key, count=False)[0]
+
+    def lookup(self, key: K, count: bool = True) -> Tuple[bool, Optional[V]]:
+        """Looks up a key in the cache.
+
+        Args:
+            key (K): The cache key
+            count (bool): Record the lookup in the hit/miss counters
+
+        Returns:
+            Tuple[bool, Optional[V]]: (found, value)
+        """
+        entry = self.__entries.get(key, None)
+
+        if entry is not None and entry[0] <= time.monotonic():
+            del self.__entries[key]
+            entry = None
+
+        if entry is None:
+            if count:
+                self.misses += 1
+                self.__record("miss")
+            return False, None
+
+        self.__entries.move_to_end(key)
+        if count:
+            self.hits += 1
+            self.__record("hit")
+
+        return True, entry[1]
+
+    def __record(self, result: str) -> None:
+        # Only named caches are exported
+        if self.name is not None:
+            metrics.cache_requests.inc(cache=self.name, result=result)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        found, value = self.lookup(key)
+        return value if found else default
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Stores a value, optionally overriding the cache's default ttl"""
+        if ttl is None:
+            ttl = self.ttl
+
+        self.__entries[key] = (time.monotonic() + ttl, value)
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        self.__entries.pop(key, None)
+
+    def invalidate_values(self, predicate: Callable[[V], bool]) -> None:
+        """Drops every entry whose value matches the predicate"""
+        for key in [k for k, (_, v) in self.__entries.items() if predicate(v)]:
+            del self.__entries[key]
+
+    def clear(self) -> None:
+        self.__entries.clear()
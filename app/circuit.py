@@ -0,0 +1,202 @@
+import time
+
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Tuple
+
+from httpx import Response, Timeout, TimeoutException, TransportError
+from loguru import logger
+
+from app import deadline, metrics
+from app.config import upstream_settings
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The upstream's circuit is open, the request wasn't sent"""
+
+    def __init__(self, upstream: str, retry_after: float, *args: object) -> None:
+        super().__init__(f"Circuit open for {upstream}", *args)
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    Closed, calls go through and their outcomes are kept for `window` seconds.
+    Once at least `min_calls` are in the window and `failure_rate` of them
+    failed, the circuit opens and calls are rejected straight away. After
+    `open_for` seconds it's half-open, letting `half_open_calls` calls through
+    to probe the upstream. A success closes the circuit, a failure opens it
+    again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        window: float = 30.0,
+        min_calls: int = 10,
+        open_for: float = 15.0,
+        half_open_calls: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.open_for = open_for
+        self.half_open_calls = half_open_calls
+
+        self.state = CircuitState.CLOSED
+
+        # (monotonic time, failed) for every call in the window
+        self.__outcomes: Deque[Tuple[float, bool]] = deque()
+        self.__failures = 0
+
+        self.__changed_at = 0.0
+        self.__probes = 0
+
+    @classmethod
+    def from_settings(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            failure_rate=upstream_settings.circuit_failure_rate,
+            window=upstream_settings.circuit_window,
+            min_calls=upstream_settings.circuit_min_calls,
+            open_for=upstream_settings.circuit_open_for,
+            half_open_calls=upstream_settings.circuit_half_open_calls,
+        )
+
+    def __transition(self, state: CircuitState, now: float) -> None:
+        if state == self.state:
+            return
+
+        log = logger.info if state == CircuitState.CLOSED else logger.warning
+        log(f"Circuit {state.value} - upstream: {self.name}")
+
+        self.state = state
+        self.__changed_at = now
+        self.__probes = 0
+
+        self.__outcomes.clear()
+        self.__failures = 0
+
+        metrics.circuit_transitions.inc(upstream=self.name, state=state.value)
+
+    def check(self) -> None:
+        """Claims a call on the circuit.
+
+        Raises:
+            CircuitOpenError: The circuit is open, or half-open with every probe
+                already in flight
+        """
+        now = time.monotonic()
+
+        if self.state == CircuitState.OPEN:
+            retry_after = self.__changed_at + self.open_for - now
+            if retry_after > 0:
+                metrics.circuit_rejections.inc(upstream=self.name)
+                raise CircuitOpenError(self.name, retry_after)
+
+            self.__transition(CircuitState.HALF_OPEN, now)
+
+        if self.state == CircuitState.HALF_OPEN:
+            # Probes that never reported back don't hold the circuit forever
+            if now - self.__changed_at > self.open_for:
+                self.__changed_at = now
+                self.__probes = 0
+
+            if self.__probes >= self.half_open_calls:
+                metrics.circuit_rejections.inc(upstream=self.name)
+                raise CircuitOpenError(
+                    self.name, self.__changed_at + self.open_for - now
+                )
+
+            self.__probes += 1
+
+    def __release(self) -> None:
+        """Gives back a claimed call that has no outcome to record"""
+        if self.state == CircuitState.HALF_OPEN and self.__probes > 0:
+            self.__probes -= 1
+
+    def record(self, success: bool) -> None:
+        """Records the outcome of a call claimed with `check`"""
+        now = time.monotonic()
+
+        if self.state == CircuitState.HALF_OPEN:
+            state = CircuitState.CLOSED if success else CircuitState.OPEN
+            self.__transition(state, now)
+            return
+
+        # Calls finishing after the circuit opened are already accounted for
+        if self.state == CircuitState.OPEN:
+            return
+
+        self.__outcomes.append((now, not success))
+        if not success:
+            self.__failures += 1
+
+        while self.__outcomes[0][0] < now - self.window:
+            _, failed = self.__outcomes.popleft()
+            if failed:
+                self.__failures -= 1
+
+        calls = len(self.__outcomes)
+        if calls >= self.min_calls and self.__failures / calls >= self.failure_rate:
+            self.__transition(CircuitState.OPEN, now)
+
+    async def call(
+        self, send: Callable[[Timeout], Awaitable[Response]], timeout: Timeout
+    ) -> Response:
+        """Sends a request through the circuit, within the current deadline.
+
+        Transport errors and 5xx responses count as failures. Timeouts only
+        count when the request had its full timeout, one cut short by the
+        deadline says nothing about the upstream.
+
+        Args:
+            send (Callable[[Timeout], Awaitable[Response]]): Sends the request
+                with the given timeout
+            timeout (Timeout): The request's usual timeout
+
+        Raises:
+            CircuitOpenError: The circuit is open
+            DeadlineExceeded: There's no time left to make the request
+
+        Returns:
+            Response: The response
+        """
+        self.check()
+
+        try:
+            capped = deadline.request_timeout(self.name, timeout)
+        except deadline.DeadlineExceeded:
+            self.__release()
+            metrics.deadline_misses.inc(operation=f"upstream:{self.name}")
+            raise
+
+        try:
+            response = await send(capped)
+        except TimeoutException as e:
+            if capped == timeout:
+                self.record(False)
+                raise
+
+            self.__release()
+            metrics.deadline_misses.inc(operation=f"upstream:{self.name}")
+            raise deadline.DeadlineExceeded(self.name) from e
+        except TransportError:
+            self.record(False)
+            raise
+        except BaseException:
+            self.__release()
+            raise
+
+        self.record(response.status_code < 500)
+        return response
@@ -1,15 +1,30 @@
+import asyncio
+import re
+import time
+
 from typing import Any, Dict, Optional
 from urllib.parse import quote
 
-from httpx import AsyncClient, Response
+from httpx import AsyncClient, Response, TransportError
 from loguru import logger
 
+from app import metrics, tracing
+from app.circuit import CircuitBreaker, CircuitOpenError
+from app.singleflight import SingleFlight
+
 from .models.channel import Channel, CreateMessage
 from .models.guild import Guild
+from .models.webhook import Webhook
 
 from .constants import AuthType, HttpMethods, DiscordHeaders
 from .endpoints import Api
+from .ratelimit import RateLimiter, RouteKey
+from .retry import NOT_SENT_ERRORS, RetryPolicy
+
 
+# The token in a webhook or interaction url
+_TOKEN = re.compile(r"(/webhooks/\d+/)[^/?]+")
+_REDACTED = r"\1<token>"
 
 defaultHeaders = {
     # TODO: Read this from somewhere, pyproject.toml?
@@ -18,23 +33,59 @@ defaultHeaders = {
 
 
 class RatelimitExceeded(Exception):
-    def __init__(self, retry_after: int = None, *args: object) -> None:
+    def __init__(self, retry_after: float = None, *args: object) -> None:
         super().__init__(*args)
         self.retry_after = retry_after
 
 
+class RequestRejected(Exception):
+    """Discord refused the request, it won't succeed if retried"""
+
+    def __init__(self, status_code: int, *args: object) -> None:
+        super().__init__(f"Request rejected with {status_code}", *args)
+        self.status_code = status_code
+
+
+class UnknownWebhook(Exception):
+    """The webhook was deleted, or its token reset"""
+
+    def __init__(self, webhookId: int, *args: object) -> None:
+        super().__init__(f"Unknown webhook {webhookId}", *args)
+        self.webhookId = webhookId
+
+
 class DiscordClient:
+    """Discord's REST api. Clients without a token only work for webhooks, and
+    aren't held to the bot's global rate limit.
+
+    Args:
+        name (str, optional): The upstream name used by the circuit breaker
+            and metrics. Defaults to "discord".
+    """
+
     def __init__(
         self,
         token: str = None,
         authType: AuthType = AuthType.BOT,
         errorOnRateLimit: bool = True,
+        client: Optional[AsyncClient] = None,
+        retry: Optional[RetryPolicy] = None,
+        name: str = "discord",
     ) -> None:
+        self.name = name
         self.token = token
         self.authType = authType
         self.errorOnRateLimit = errorOnRateLimit
 
-        self.client = AsyncClient(headers=defaultHeaders)
+        if client is None:
+            client = AsyncClient(headers=defaultHeaders)
+
+        self.client = client
+        self.ratelimiter = RateLimiter()
+        self.breaker = CircuitBreaker.from_settings(name)
+        self.retry = retry or RetryPolicy()
+
+        self.guild_lookups: SingleFlight[int, Optional[Guild]] = SingleFlight()
 
     def __token_formatted(self) -> str:
         if self.token is None:
@@ -44,36 +95,151 @@ class DiscordClient:
 
     async def __request(
         self,
-        path: str,
+        route: str,
         method: HttpMethods = HttpMethods.GET,
         headers: Optional[Dict[str, Any]] = None,
         json: Optional[Dict[str, Any]] = None,
+        **params: Any,
     ) -> Response:
-        _headers = {"Authorization": self.__token_formatted()}
+        _headers = dict()
+        if self.token is not None:
+            _headers["Authorization"] = self.__token_formatted()
 
         if headers is not None:
             _headers.update(headers)
 
-        url = Api.BASE_PATH + path
+        url = Api.BASE_PATH + route.format(**params)
+        route_key = RateLimiter.route_key(method.value, route, params)
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+
+            try:
+                response = await self.__send(
+                    route_key, method, route, url, _headers, json
+                )
+            except TransportError as e:
+                # Only resend what discord might have acted on if it's idempotent
+                delay = self.retry.backoff(attempt)
+                if not (
+                    isinstance(e, NOT_SENT_ERRORS) or self.retry.is_idempotent(method)
+                ) or not self.retry.can_retry(attempt, started, delay):
+                    raise
+
+                self.__log_retry(method, route, attempt, delay, "transport_error", e)
+                await asyncio.sleep(delay)
+                continue
+
+            retry_after = self.ratelimiter.update(
+                route_key, response.status_code, response.headers
+            )
+
+            if retry_after is not None:
+                # The rate limiter holds the next attempt back until Retry-After
+                if self.retry.can_retry(attempt, started, retry_after):
+                    self.__log_retry(method, route, attempt, retry_after, "ratelimited")
+                    continue
+
+                if self.errorOnRateLimit:
+                    raise RatelimitExceeded(retry_after)
+
+                return response
+
+            if response.status_code >= 500 and self.retry.is_idempotent(method):
+                delay = self.retry.backoff(attempt)
+                if self.retry.can_retry(attempt, started, delay):
+                    self.__log_retry(method, route, attempt, delay, "server_error")
+                    await asyncio.sleep(delay)
+                    continue
+
+            return response
+
+    async def __send(
+        self,
+        route_key: RouteKey,
+        method: HttpMethods,
+        route: str,
+        url: str,
+        headers: Dict[str, Any],
+        json: Optional[Dict[str, Any]],
+    ) -> Response:
+        """Sends a single attempt of a request once the rate limits allow it"""
+        with tracing.span("discord.ratelimit_wait"):
+            await self.ratelimiter.acquire(route_key)
+
+        # Webhook and interaction tokens are credentials, keep them out of logs
+        logger.debug(f"API REQUEST: {method.value} {_TOKEN.sub(_REDACTED, url)}")
+
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with tracing.span(f"discord {method.value} {route}") as span:
+                response = await self.breaker.call(
+                    lambda timeout: self.client.request(
+                        method=method.value,
+                        url=url,
+                        headers=headers,
+                        json=json,
+                        timeout=timeout,
+                    ),
+                    self.client.timeout,
+                )
+                status = response.status_code
+
+                if span is not None:
+                    span.attributes["http.status_code"] = status
+        except CircuitOpenError:
+            status = "circuit_open"
+            raise
+        finally:
+            metrics.upstream_request_seconds.observe(
+                time.perf_counter() - start,
+                upstream=self.name,
+                method=method.value,
+                route=route,
+                status=status,
+            )
+
+        if response.status_code == 429:
+            metrics.rate_limited.inc(upstream=self.name, route=route)
+
+        return response
 
-        logger.debug(f"API REQUEST: {method.value} {url}")
+    def __log_retry(
+        self,
+        method: HttpMethods,
+        route: str,
+        attempt: int,
+        delay: float,
+        reason: str,
+        error: Optional[Exception] = None,
+    ) -> None:
+        metrics.upstream_retries.inc(upstream=self.name, reason=reason)
 
-        response = await self.client.request(
-            method=method.value, url=url, headers=_headers, json=json
+        detail = "" if error is None else f", error: {type(error).__name__}"
+        logger.warning(
+            f"Retrying {self.name} request in {delay:.2f}s - {method.value} {route}, "
+            f"attempt: {attempt}, reason: {reason}{detail}"
         )
 
-        if self.errorOnRateLimit and response.status_code == 429:
-            raise RatelimitExceeded(int(response.headers.get("Retry-After")))
+    async def close(self) -> None:
+        await self.client.aclose()
 
-        return response
+    def ratelimit_stats(self) -> Dict[str, Any]:
+        """Queue depth and wait time stats from the rate limit scheduler"""
+        return self.ratelimiter.stats()
 
     async def create_message(
         self, channelId: int, message: CreateMessage
     ) -> Optional[int]:
         """Creates a message in the specified channel. Returns the message id or None"""
-        path = Api.CHANNEL_MESSAGES.format(channelId=channelId)
         response = await self.__request(
-            path=path, method=HttpMethods.POST, json=message.request_data()
+            Api.CHANNEL_MESSAGES,
+            HttpMethods.POST,
+            json=message.request_data(),
+            channelId=channelId,
         )
 
         if response.status_code != 200:
@@ -82,9 +248,103 @@ class DiscordClient:
         data: Dict[str, Any] = response.json()
         return data.get("id", None)
 
+    async def edit_original_interaction_response(
+        self, applicationId: int, interactionToken: str, message: CreateMessage
+    ) -> bool:
+        """Edits the response to an interaction, finishing a deferred response"""
+        data = message.request_data()
+        # Flags can't be changed on an edit
+        data.pop("flags", None)
+
+        response = await self.__request(
+            Api.WEBHOOK_MESSAGE_ORIGINAL,
+            HttpMethods.PATCH,
+            json=data,
+            webhookId=applicationId,
+            webhookToken=interactionToken,
+        )
+
+        return response.status_code == 200
+
+    async def create_followup_message(
+        self, applicationId: int, interactionToken: str, message: CreateMessage
+    ) -> Optional[int]:
+        """Sends a follow-up message for an interaction.
+        Returns the message id or None"""
+        response = await self.__request(
+            Api.WEBHOOK,
+            HttpMethods.POST,
+            json=message.request_data(),
+            webhookId=applicationId,
+            webhookToken=interactionToken,
+        )
+
+        if response.status_code != 200:
+            return None
+
+        data: Dict[str, Any] = response.json()
+        return data.get("id", None)
+
+    async def create_webhook(self, channelId: int, name: str) -> Optional[Webhook]:
+        """Creates a webhook in the channel, needs the manage webhooks permission.
+        Returns the webhook or None"""
+        response = await self.__request(
+            Api.CHANNEL_WEBHOOKS,
+            HttpMethods.POST,
+            json={"name": name},
+            channelId=channelId,
+        )
+
+        if response.status_code != 200:
+            return None
+
+        return Webhook(**response.json())
+
+    async def get_webhook(self, webhookId: int, webhookToken: str) -> Optional[Webhook]:
+        """Looks up a webhook by its token. Returns the webhook or None"""
+        response = await self.__request(
+            Api.WEBHOOK, webhookId=webhookId, webhookToken=webhookToken
+        )
+
+        if response.status_code != 200:
+            return None
+
+        return Webhook(**response.json())
+
+    async def delete_webhook(self, webhookId: int, webhookToken: str) -> bool:
+        """Deletes a webhook by its token. Returns True if it was deleted"""
+        response = await self.__request(
+            Api.WEBHOOK,
+            HttpMethods.DELETE,
+            webhookId=webhookId,
+            webhookToken=webhookToken,
+        )
+
+        return response.status_code == 204
+
+    async def execute_webhook(
+        self, webhookId: int, webhookToken: str, message: CreateMessage
+    ) -> bool:
+        """Sends a message through a webhook, without waiting for the message.
+
+        Raises:
+            UnknownWebhook: The webhook no longer exists
+        """
+        response = await self.__request(
+            Api.WEBHOOK,
+            HttpMethods.POST,
+            json=message.request_data(),
+            webhookId=webhookId,
+            webhookToken=webhookToken,
+        )
+
+        if response.status_code == 404:
+            raise UnknownWebhook(webhookId)
+
+        return response.status_code in (200, 204)
+
     async def get_channel(self, channelId: int) -> Optional[Channel]:
-        path = Api.CHANNEL.format(channelId=channelId)
-        response = await self.__request(path, HttpMethods.GET)
+        response = await self.__request(Api.CHANNEL, channelId=channelId)
 
         if response.status_code == 200:
             return Channel(**response.json())
@@ -92,9 +352,12 @@ class DiscordClient:
         return None
 
     async def get_guild(self, guildId) -> Guild:
-        path = Api.GUILD.format(guildId=guildId)
+        return await self.guild_lookups.do(
+            int(guildId), lambda: self.__fetch_guild(guildId)
+        )
 
-        response = await self.__request(path, HttpMethods.GET)
+    async def __fetch_guild(self, guildId) -> Optional[Guild]:
+        response = await self.__request(Api.GUILD, guildId=guildId)
 
         if response.status_code == 200:
             return Guild(**response.json())
@@ -104,15 +367,27 @@ class DiscordClient:
     async def add_guild_member_role(
         self, guildId: int, userId: int, roleId: int, reason: str = None
     ) -> bool:
+        """Gives a guild member a role. Returns True if it was added
+
+        Raises:
+            RequestRejected: Discord refused, e.g. missing permissions or an
+                unknown member or role
+        """
         headers = dict()
         if reason is not None:
             headers[DiscordHeaders.AUDIT_LOG_REASON.value] = quote(reason)
 
-        path = Api.GUILD_MEMBER_ROLE.format(
-            guildId=guildId, userId=userId, roleId=roleId
+        response = await self.__request(
+            Api.GUILD_MEMBER_ROLE,
+            HttpMethods.PUT,
+            headers,
+            guildId=guildId,
+            userId=userId,
+            roleId=roleId,
         )
 
-        response = await self.__request(path, HttpMethods.PUT, headers)
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            raise RequestRejected(response.status_code)
 
         return response.status_code == 204
 
@@ -123,10 +398,13 @@ class DiscordClient:
         if reason is not None:
             headers[DiscordHeaders.AUDIT_LOG_REASON.value] = quote(reason)
 
-        path = Api.GUILD_MEMBER_ROLE.format(
-            guildId=guildId, userId=userId, roleId=roleId
+        response = await self.__request(
+            Api.GUILD_MEMBER_ROLE,
+            HttpMethods.DELETE,
+            headers,
+            guildId=guildId,
+            userId=userId,
+            roleId=roleId,
         )
 
-        response = await self.__request(path, HttpMethods.DELETE, headers)
-
         return response.status_code == 204
@@ -4,6 +4,7 @@ from enum import Enum
 class HttpMethods(str, Enum):
     DELETE = "DELETE"
     GET = "GET"
+    PATCH = "PATCH"
     POST = "POST"
     PUT = "PUT"
 
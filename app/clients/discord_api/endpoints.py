@@ -3,7 +3,11 @@ class Api:
 
     CHANNEL = "/channels/{channelId}"
     CHANNEL_MESSAGES = "/channels/{channelId}/messages"
+    CHANNEL_WEBHOOKS = "/channels/{channelId}/webhooks"
 
     GUILD = "/guilds/{guildId}"
     GUILD_MEMBER_ROLE = "/guilds/{guildId}/members/{userId}/roles/{roleId}"
     GUILD_ROLES = "/guilds/{guildId}/roles"
+
+    WEBHOOK = "/webhooks/{webhookId}/{webhookToken}"
+    WEBHOOK_MESSAGE_ORIGINAL = "/webhooks/{webhookId}/{webhookToken}/messages/@original"
@@ -1,8 +1,9 @@
 from typing import Any, Dict, List, Optional, Union
 
 from dispike.creating.allowed_mentions import AllowedMentions
-from dispike.creating.components import Button, LinkButton, SelectMenu
+from dispike.creating.components import ActionRow, Button, LinkButton, SelectMenu
 from dispike.helper import Embed
+from dispike.response import DiscordResponse
 
 from pydantic import BaseModel
 
@@ -12,18 +13,44 @@ class Channel(BaseModel):
     name: str
 
 
+Component = Union[ActionRow, Button, LinkButton, SelectMenu]
+
+# Message flag for messages only visible to the interaction's user
+EPHEMERAL_FLAG = 1 << 6
+
+# Discord's message size limits
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBED_DESCRIPTION_LENGTH = 4096
+MAX_EMBEDS = 10
+MAX_EMBEDS_LENGTH = 6000
+
+
+def _embed_length(embed: Dict[str, Any]) -> int:
+    """The characters of an embed counted towards a message's embed total"""
+    length = len(embed.get("title") or "") + len(embed.get("description") or "")
+    length += len((embed.get("footer") or {}).get("text") or "")
+    length += len((embed.get("author") or {}).get("name") or "")
+
+    for field in embed.get("fields") or []:
+        length += len(field.get("name") or "") + len(field.get("value") or "")
+
+    return length
+
+
 class CreateMessage:
     content: Optional[str]
     embeds: Optional[List[Embed]]
-    components: Optional[List[Union[Button, LinkButton, SelectMenu]]]
+    components: Optional[List[Component]]
     allowed_mentions: Optional[AllowedMentions]
+    flags: Optional[int]
 
     def __init__(
         self,
         content: Optional[str] = None,
         embeds: Optional[List[Embed]] = None,
-        components: Optional[List[Union[Button, LinkButton, SelectMenu]]] = None,
+        components: Optional[List[Component]] = None,
         allowed_mentions: Optional[AllowedMentions] = None,
+        flags: Optional[int] = None,
     ) -> None:
         if content is None and embeds is None:
             raise TypeError("Either content or embeds must be present")
@@ -32,6 +59,97 @@ class CreateMessage:
         self.embeds = embeds
         self.components = components
         self.allowed_mentions = allowed_mentions
+        self.flags = flags
+
+    @staticmethod
+    def from_response(
+        response: DiscordResponse, payload: Optional[Dict[str, Any]] = None
+    ) -> "CreateMessage":
+        """Converts an interaction response into a message, used for follow-ups
+        and edits of deferred interactions.
+
+        Args:
+            response (DiscordResponse): The interaction response
+            payload (Optional[Dict[str, Any]]): The response's payload if it's
+                already been built
+
+        Returns:
+            CreateMessage: The message
+        """
+        if payload is None:
+            payload = response.response
+
+        data: Dict[str, Any] = payload.get("data", dict())
+
+        return CreateMessage(
+            content=response.content,
+            embeds=response.embeds if len(response.embeds) > 0 else None,
+            components=[response.action_row] if response.action_row else None,
+            flags=data.get("flags", None),
+        )
+
+    @staticmethod
+    def digest(messages: List["CreateMessage"]) -> List["CreateMessage"]:
+        """Combines messages into as few as possible, their content as its lines.
+        Content that won't fit a single message becomes embed lists instead,
+        split over messages so each stays within discord's embed limits.
+
+        Args:
+            messages (List[CreateMessage]): The messages, in order
+
+        Returns:
+            List[CreateMessage]: The combined messages, in order
+        """
+        data = [message.request_data() for message in messages]
+
+        lines = [d["content"] for d in data if "content" in d]
+        embeds = [embed for d in data for embed in d.get("embeds", [])]
+
+        content = "\n".join(lines)
+        if len(content) <= MAX_CONTENT_LENGTH and len(embeds) <= MAX_EMBEDS:
+            if not content and len(embeds) == 0:
+                return []
+
+            return [
+                CreateMessage(
+                    content=content if content else None,
+                    embeds=[Embed.from_dict(e) for e in embeds] if embeds else None,
+                )
+            ]
+
+        descriptions = [""]
+        for line in lines:
+            line = line[: MAX_EMBED_DESCRIPTION_LENGTH - 1]
+            if (
+                descriptions[-1]
+                and len(descriptions[-1]) + len(line) >= MAX_EMBED_DESCRIPTION_LENGTH
+            ):
+                descriptions.append("")
+
+            descriptions[-1] += line + "\n"
+
+        embeds = [
+            {"type": "rich", "description": d.rstrip()} for d in descriptions if d
+        ] + embeds
+
+        grouped: List[List[Dict[str, Any]]] = [[]]
+        length = 0
+        for embed in embeds:
+            embed_length = _embed_length(embed)
+            if len(grouped[-1]) > 0 and (
+                len(grouped[-1]) >= MAX_EMBEDS
+                or length + embed_length > MAX_EMBEDS_LENGTH
+            ):
+                grouped.append([])
+                length = 0
+
+            grouped[-1].append(embed)
+            length += embed_length
+
+        return [
+            CreateMessage(embeds=[Embed.from_dict(e) for e in group])
+            for group in grouped
+        ]
 
     def __str__(self) -> str:
         if self.content is not None:
@@ -65,4 +183,7 @@ class CreateMessage:
         if self.allowed_mentions is not None:
             response["allowed_mentions"] = self.allowed_mentions.dict()
 
+        if self.flags is not None:
+            response["flags"] = self.flags
+
         return response
@@ -0,0 +1,40 @@
+import re
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+_WEBHOOK_URL = re.compile(
+    r"^https://(?:(?:ptb|canary)\.)?discord(?:app)?\.com/api/(?:v\d+/)?"
+    r"webhooks/(?P<id>\d+)/(?P<token>[\w-]+)/?$"
+)
+
+
+class Webhook(BaseModel):
+    id: int
+    token: str
+    channel_id: Optional[int] = None
+
+    @staticmethod
+    def from_url(url: str) -> Optional["Webhook"]:
+        """Parses a webhook url as copied from discord, or None if it isn't one"""
+        match = _WEBHOOK_URL.match(url.strip())
+        if match is None:
+            return None
+
+        return Webhook(id=int(match["id"]), token=match["token"])
+
+    @staticmethod
+    def from_option(value: str) -> Optional["Webhook"]:
+        """Parses a webhook stored with `option_value`"""
+        try:
+            channel_id, id, token = value.split("/")
+            return Webhook(id=int(id), token=token, channel_id=int(channel_id))
+        except (AttributeError, ValueError):
+            return None
+
+    def option_value(self) -> str:
+        """The webhook as stored in a server's options, with the channel it
+        posts to so a changed notice channel doesn't keep using it.
+        """
+        return f"{self.channel_id}/{self.id}/{self.token}"
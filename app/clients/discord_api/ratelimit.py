@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import time
+
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from loguru import logger
+
+# Route parameters Discord uses to split a route into separate buckets
+MAJOR_PARAMETERS = ("channelId", "guildId", "webhookId")
+
+# (method, route template, major parameter value)
+RouteKey = Tuple[str, str, Optional[str]]
+
+
+class RateLimitHeaders:
+    BUCKET = "X-RateLimit-Bucket"
+    LIMIT = "X-RateLimit-Limit"
+    REMAINING = "X-RateLimit-Remaining"
+    RESET_AFTER = "X-RateLimit-Reset-After"
+    GLOBAL = "X-RateLimit-Global"
+    SCOPE = "X-RateLimit-Scope"
+    RETRY_AFTER = "Retry-After"
+
+
+class Bucket:
+    """A single Discord rate limit bucket"""
+
+    limit: Optional[int]
+    remaining: Optional[int]
+    reset_at: float
+
+    def __init__(self) -> None:
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+
+        self.lock = asyncio.Lock()
+
+    def delay(self, now: float) -> float:
+        """Seconds until a request may be sent on this bucket"""
+        if self.remaining is None or self.remaining > 0:
+            return 0.0
+
+        return max(0.0, self.reset_at - now)
+
+
+class RateLimiter:
+    """Schedules Discord REST requests ahead of time to stay inside rate limits.
+
+    Buckets are learnt from the X-RateLimit-* response headers and tracked per
+    route and major parameter. Requests wait in order for their bucket (and the
+    global limit) to have room instead of being sent into a 429.
+    """
+
+    def __init__(self, global_limit: int = 50, sweep_interval: float = 60.0) -> None:
+        self.global_limit = global_limit
+        self.sweep_interval = sweep_interval
+
+        self.__route_buckets: Dict[Tuple[str, str], str] = dict()
+        self.__buckets: Dict[Tuple[str, Optional[str]], Bucket] = dict()
+        self.__swept_at = time.monotonic()
+
+        # Created lazily so it binds to the running loop
+        self.__global_lock: Optional[asyncio.Lock] = None
+        self.__global_reset_at = 0.0
+        self.__window_start = 0.0
+        self.__window_count = 0
+
+        # Stats
+        self.__queued = 0
+        self.__requests = 0
+        self.__delayed = 0
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+        self.__ratelimited = 0
+
+    @staticmethod
+    def route_key(method: str, route: str, params: Mapping[str, Any]) -> RouteKey:
+        major = next(
+            (str(params[p]) for p in MAJOR_PARAMETERS if p in params),
+            None,
+        )
+
+        # Each webhook (and interaction) token is its own bucket. Only a hash of
+        # the token is kept, they're credentials
+        if "webhookToken" in params:
+            token = hashlib.sha256(str(params["webhookToken"]).encode()).hexdigest()
+            major = f"{major}/{token[:16]}"
+
+        return (method, route, major)
+
+    @staticmethod
+    def describe(key: RouteKey) -> str:
+        """The key for logs, the route template without any ids or tokens"""
+        method, route, _ = key
+        return f"{method} {route}"
+
+    def __sweep(self, now: float) -> None:
+        """Drops buckets that have reset and nothing is waiting on, a reset
+        bucket is no different to a new one. Every interaction token gets its
+        own bucket, without this they'd pile up forever.
+        """
+        if now - self.__swept_at < self.sweep_interval:
+            return
+
+        self.__swept_at = now
+        for key, bucket in list(self.__buckets.items()):
+            if bucket.reset_at <= now and not bucket.lock.locked():
+                del self.__buckets[key]
+
+    def __bucket(self, key: RouteKey) -> Bucket:
+        method, route, major = key
+
+        # Until Discord tells us the bucket hash, key off the route itself
+        bucket_hash = self.__route_buckets.get((method, route), f"{method} {route}")
+
+        bucket = self.__buckets.get((bucket_hash, major), None)
+        if bucket is None:
+            self.__sweep(time.monotonic())
+
+            bucket = Bucket()
+            self.__buckets[(bucket_hash, major)] = bucket
+
+        return bucket
+
+    async def acquire(self, key: RouteKey) -> float:
+        """Waits until a request on the route may be sent.
+
+        Args:
+            key (RouteKey): The request's route key, see `route_key`
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        started = time.monotonic()
+        bucket = self.__bucket(key)
+
+        self.__queued += 1
+        try:
+            async with bucket.lock:
+                delay = bucket.delay(time.monotonic())
+                if delay > 0:
+                    logger.debug(
+                        f"Rate limit reached, waiting {delay:.2f}s - "
+                        + RateLimiter.describe(key)
+                    )
+                    await asyncio.sleep(delay)
+
+                    # The bucket has reset, assume it's full until told otherwise
+                    bucket.remaining = bucket.limit
+
+                if bucket.remaining is not None:
+                    bucket.remaining -= 1
+
+                await self.__acquire_global()
+        finally:
+            self.__queued -= 1
+
+        waited = time.monotonic() - started
+        self.__record_wait(waited)
+
+        return waited
+
+    async def __acquire_global(self) -> None:
+        if self.__global_lock is None:
+            self.__global_lock = asyncio.Lock()
+
+        async with self.__global_lock:
+            now = time.monotonic()
+
+            if self.__global_reset_at > now:
+                await asyncio.sleep(self.__global_reset_at - now)
+                now = time.monotonic()
+
+            if now - self.__window_start >= 1.0:
+                self.__window_start = now
+                self.__window_count = 0
+
+            if self.__window_count >= self.global_limit:
+                await asyncio.sleep(self.__window_start + 1.0 - now)
+                self.__window_start = time.monotonic()
+                self.__window_count = 0
+
+            self.__window_count += 1
+
+    def update(
+        self, key: RouteKey, status_code: int, headers: Mapping[str, str]
+    ) -> Optional[float]:
+        """Updates bucket state from a response.
+
+        Args:
+            key (RouteKey): The request's route key
+            status_code (int): The response status code
+            headers (Mapping[str, str]): The response headers
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying if rate limited
+        """
+        method, route, major = key
+        now = time.monotonic()
+
+        bucket_hash = headers.get(RateLimitHeaders.BUCKET, None)
+        if bucket_hash is not None:
+            self.__route_buckets[(method, route)] = bucket_hash
+
+        bucket = self.__bucket(key)
+
+        limit = _parse_float(headers.get(RateLimitHeaders.LIMIT, None))
+        remaining = _parse_float(headers.get(RateLimitHeaders.REMAINING, None))
+        reset_after = _parse_float(headers.get(RateLimitHeaders.RESET_AFTER, None))
+
+        if limit is not None:
+            bucket.limit = int(limit)
+        if remaining is not None:
+            bucket.remaining = int(remaining)
+        if reset_after is not None:
+            bucket.reset_at = now + reset_after
+
+        if status_code != 429:
+            return None
+
+        self.__ratelimited += 1
+
+        retry_after = _parse_float(headers.get(RateLimitHeaders.RETRY_AFTER, None))
+        if retry_after is None:
+            retry_after = reset_after if reset_after is not None else 1.0
+
+        is_global = headers.get(RateLimitHeaders.GLOBAL, "").lower() == "true"
+        if is_global or headers.get(RateLimitHeaders.SCOPE, None) == "global":
+            logger.warning(f"Hit the global rate limit, retry after {retry_after}s")
+            self.__global_reset_at = now + retry_after
+        else:
+            logger.warning(
+                f"Hit a rate limit, retry after {retry_after}s - "
+                + RateLimiter.describe(key)
+            )
+            bucket.remaining = 0
+            bucket.reset_at = now + retry_after
+
+        return retry_after
+
+    def __record_wait(self, waited: float) -> None:
+        self.__requests += 1
+
+        # Ignore scheduling noise
+        if waited > 0.001:
+            self.__delayed += 1
+            self.__wait_total += waited
+            self.__wait_max = max(self.__wait_max, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.__queued,
+            "buckets": len(self.__buckets),
+            "requests": self.__requests,
+            "delayed": self.__delayed,
+            "wait_total": self.__wait_total,
+            "wait_max": self.__wait_max,
+            "wait_avg": (self.__wait_total / self.__delayed) if self.__delayed else 0,
+            "ratelimited": self.__ratelimited,
+        }
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,81 @@
+import random
+import time
+
+from typing import Iterable, Optional
+
+from httpx import ConnectError, ConnectTimeout, PoolTimeout
+
+from app import deadline
+
+from .constants import HttpMethods
+
+# Failures where the request never reached discord, safe to retry for any method
+NOT_SENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a discord request.
+
+    Rate limited requests weren't processed, so any method is retried. Server
+    errors and dropped connections might have been, only idempotent methods are
+    retried for those. Setting or removing a role twice changes nothing, and an
+    edit replaces the whole message.
+
+    Args:
+        max_attempts (int, optional): Attempts per request, including the first.
+            Defaults to 3.
+        base_delay (float, optional): Backoff before the first retry.
+            Defaults to 0.5.
+        max_delay (float, optional): Longest backoff. Defaults to 5.0.
+        budget (float, optional): Seconds a request may take in total, retries
+            included. Defaults to 10.0.
+        idempotent (Iterable[HttpMethods], optional): Methods safe to repeat.
+            Defaults to GET, PUT, DELETE and PATCH.
+        rng (Optional[random.Random], optional): Source of the jitter.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 5.0,
+        budget: float = 10.0,
+        idempotent: Iterable[HttpMethods] = (
+            HttpMethods.GET,
+            HttpMethods.PUT,
+            HttpMethods.DELETE,
+            HttpMethods.PATCH,
+        ),
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.idempotent = frozenset(idempotent)
+
+        self.__rng = rng or random.Random()
+
+    def is_idempotent(self, method: HttpMethods) -> bool:
+        return method in self.idempotent
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter exponential backoff after the given attempt (from 1)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return self.__rng.uniform(0, ceiling)
+
+    def time_left(self, started: float) -> float:
+        """Seconds left in the budget of a request started at `started`
+        (time.monotonic), or before the interaction's deadline if that's sooner.
+        """
+        left = self.budget - (time.monotonic() - started)
+
+        until_deadline = deadline.time_left()
+        if until_deadline is not None:
+            left = min(left, until_deadline)
+
+        return left
+
+    def can_retry(self, attempt: int, started: float, delay: float) -> bool:
+        """True if another attempt is allowed after waiting delay seconds"""
+        return attempt < self.max_attempts and delay < self.time_left(started)
@@ -1,6 +1,9 @@
 from datetime import datetime
 from typing import Dict, Optional
-from httpx import AsyncClient
+from httpcore import AsyncHTTPTransport
+
+from app.clients.instrumented import InstrumentedAsyncClient
+from app.singleflight import SingleFlight
 
 
 class GoonAuthChallenge:
@@ -39,8 +42,22 @@ class GoonAuthStatus:
 
 
 class GoonAuthApi:
-    def __init__(self, host: str, headers: Dict[str, str] = None) -> None:
-        self.client = AsyncClient(base_url=host, headers=headers)
+    def __init__(
+        self,
+        host: str,
+        headers: Dict[str, str] = None,
+        transport: Optional[AsyncHTTPTransport] = None,
+    ) -> None:
+        self.client = InstrumentedAsyncClient(
+            "goon_auth", base_url=host, headers=headers, transport=transport
+        )
+
+        self.verification_updates: SingleFlight[
+            str, Optional[GoonAuthStatus]
+        ] = SingleFlight()
+
+    async def close(self) -> None:
+        await self.client.aclose()
 
     async def get_verification(self, user_name: str) -> Optional[GoonAuthChallenge]:
         payload = {"user_name": user_name}
@@ -57,6 +74,14 @@ class GoonAuthApi:
         return GoonAuthChallenge(**wrapped)
 
     async def get_verification_update(self, user_name: str) -> Optional[GoonAuthStatus]:
+        # Double clicks on "Verify Hash" share one upstream check
+        return await self.verification_updates.do(
+            user_name, lambda: self.__fetch_verification_update(user_name)
+        )
+
+    async def __fetch_verification_update(
+        self, user_name: str
+    ) -> Optional[GoonAuthStatus]:
         payload = {"user_name": user_name}
         response = await self.client.get(
             "/goon_auth/verification/update", params=payload
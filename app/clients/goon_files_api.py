@@ -1,8 +1,15 @@
+import asyncio
+
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from httpcore import AsyncHTTPTransport
+from loguru import logger
 
-from httpx import AsyncClient
+from app.cache import TTLCache
+from app.clients.instrumented import InstrumentedAsyncClient
+from app.singleflight import SingleFlight
 
 
 class Service(str, Enum):
@@ -60,9 +67,40 @@ class User:
         return None
 
 
+class UpsertUnsupported(Exception):
+    """The goon-files instance has no user upsert endpoint"""
+
+
 class GoonFilesApi:
-    def __init__(self, host: str, headers: Dict[str, str] = None) -> None:
-        self.client = AsyncClient(base_url=host, headers=headers)
+    def __init__(
+        self,
+        host: str,
+        headers: Dict[str, str] = None,
+        cache_size: int = 4096,
+        cache_ttl: float = 300,
+        cache_negative_ttl: float = 30,
+        transport: Optional[AsyncHTTPTransport] = None,
+    ) -> None:
+        self.client = InstrumentedAsyncClient(
+            "goon_files", base_url=host, headers=headers, transport=transport
+        )
+
+        # (service, token) -> User, or None for users known not to exist
+        self.user_cache: TTLCache[Tuple[Service, str], Optional[User]] = TTLCache(
+            max_size=cache_size, ttl=cache_ttl, name="goon_files_user"
+        )
+        self.cache_negative_ttl = cache_negative_ttl
+
+        # Assume these endpoints exist until goon-files says otherwise
+        self.upsert_supported = True
+        self.batch_supported = True
+
+        self.user_lookups: SingleFlight[
+            Tuple[Service, str], Optional[User]
+        ] = SingleFlight()
+
+    async def close(self) -> None:
+        await self.client.aclose()
 
     async def sa_name_for_service(self, service: Service, token: str) -> Optional[str]:
         try:
@@ -78,6 +116,21 @@ class GoonFilesApi:
     async def find_user_by_service(
         self, service: Service, token: str
     ) -> Optional[User]:
+        key = (service, str(token))
+
+        found, user = self.user_cache.lookup(key)
+        if found:
+            return user
+
+        return await self.user_lookups.do(
+            key, lambda: self.__fetch_user_by_service(service, token)
+        )
+
+    async def __fetch_user_by_service(
+        self, service: Service, token: str
+    ) -> Optional[User]:
+        key = (service, str(token))
+
         payload = {"service": service.value, "token": token}
         response = await self.client.get("/user/", params=payload)
 
@@ -85,11 +138,133 @@ class GoonFilesApi:
         if response.status_code == 422:
             raise TypeError("Invalid query parameter")
 
+        # Remember unknown users for a shorter time, they're about to auth
+        if response.status_code == 404:
+            self.user_cache.set(key, None, ttl=self.cache_negative_ttl)
+            return None
+
         if response.status_code != 200:
             return None
 
         wrapped = response.json()
-        return User(**wrapped)
+        user = User(**wrapped)
+
+        self.user_cache.set(key, user)
+        return user
+
+    async def find_users_by_service(
+        self,
+        service: Service,
+        tokens: Iterable[str],
+        chunk_size: int = 100,
+        concurrency: int = 4,
+    ) -> AsyncIterator[User]:
+        """Looks up many users by service token, yielding users as they're found.
+        Tokens without a user are skipped.
+
+        Tokens are looked up in chunks through the batch endpoint, or one by one
+        when goon-files doesn't have it, with at most `concurrency` requests
+        in flight.
+
+        A failed batch request isn't retried one token at a time, which would
+        only send more load to a goon-files instance already struggling.
+
+        Args:
+            service (Service): The service the tokens belong to
+            tokens (Iterable[str]): The service tokens
+            chunk_size (int): Tokens per batch request
+            concurrency (int): Max concurrent requests
+
+        Raises:
+            HTTPStatusError: A batch request failed
+            TypeError: Invalid query parameter
+
+        Yields:
+            User: The found users, in no particular order
+        """
+        pending: List[str] = []
+        for token in dict.fromkeys(str(token) for token in tokens):
+            found, user = self.user_cache.lookup((service, token))
+            if not found:
+                pending.append(token)
+            elif user is not None:
+                yield user
+
+        semaphore = asyncio.Semaphore(concurrency)
+        chunks = [
+            pending[i : i + chunk_size]  # noqa: E203
+            for i in range(0, len(pending), chunk_size)
+        ]
+        tasks = [
+            asyncio.ensure_future(self.__fetch_users_chunk(service, chunk, semaphore))
+            for chunk in chunks
+        ]
+
+        try:
+            for next_chunk in asyncio.as_completed(tasks):
+                for user in await next_chunk:
+                    yield user
+        finally:
+            # The caller may stop iterating early
+            for task in tasks:
+                task.cancel()
+
+    async def __fetch_users_chunk(
+        self, service: Service, tokens: List[str], semaphore: asyncio.Semaphore
+    ) -> List[User]:
+        if self.batch_supported:
+            async with semaphore:
+                users = await self.__fetch_users_batch(service, tokens)
+
+            # Only None when goon-files doesn't have the batch endpoint
+            if users is not None:
+                return users
+
+        async def find(token: str) -> Optional[User]:
+            async with semaphore:
+                return await self.find_user_by_service(service, token)
+
+        users = await asyncio.gather(*[find(token) for token in tokens])
+        return [user for user in users if user is not None]
+
+    async def __fetch_users_batch(
+        self, service: Service, tokens: List[str]
+    ) -> Optional[List[User]]:
+        payload = {"service": service.value, "tokens": tokens}
+        response = await self.client.post("/user/batch", json=payload)
+
+        # Older goon-files instances don't have the route
+        if response.status_code in (404, 405):
+            self.batch_supported = False
+            return None
+
+        if response.status_code == 422:
+            raise TypeError("Invalid query parameter")
+
+        response.raise_for_status()
+
+        users = [User(**wrapped) for wrapped in response.json()]
+
+        missing = set(tokens)
+        for user in users:
+            serviceToken = user.find_service(service)
+            if serviceToken is not None:
+                missing.discard(str(serviceToken.token))
+                self.user_cache.set((service, str(serviceToken.token)), user)
+
+        for token in missing:
+            self.user_cache.set((service, token), None, ttl=self.cache_negative_ttl)
+
+        return users
+
+    def __cache_user(self, user: User) -> None:
+        """Replaces any cached lookups of a user after it's been changed"""
+        self.user_cache.invalidate_values(
+            lambda cached: cached is not None and cached.userId == user.userId
+        )
+
+        for serviceToken in getattr(user, "services", None) or []:
+            self.user_cache.set((serviceToken.service, str(serviceToken.token)), user)
 
     async def find_user(self, userId: int) -> Optional[User]:
         response = await self.client.get(f"/user/{userId}")
@@ -117,17 +292,9 @@ class GoonFilesApi:
             "regDate": regDate.isoformat(),
         }
         if services is not None:
-            payload["services"] = []
-            for serviceToken in services:
-                serviceTokenDict = {
-                    "service": serviceToken.service.value,
-                    "token": serviceToken.token,
-                }
-
-                if serviceToken.info is not None:
-                    serviceTokenDict["info"] = serviceToken.info
-
-                payload["services"].append(serviceTokenDict)
+            payload["services"] = [
+                self.__service_token_payload(serviceToken) for serviceToken in services
+            ]
 
         response = await self.client.post("/user/", json=payload)
 
@@ -138,14 +305,15 @@ class GoonFilesApi:
             return None
 
         wrapped = response.json()
-        return User(**wrapped)
+        user = User(**wrapped)
+
+        self.__cache_user(user)
+        return user
 
     async def add_service_token(
         self, userId: int, serviceToken: ServiceToken
     ) -> Optional[User]:
-        payload = {"service": serviceToken.service.value, "token": serviceToken.token}
-        if serviceToken.info is not None:
-            payload["info"] = serviceToken.info
+        payload = self.__service_token_payload(serviceToken)
 
         response = await self.client.put(f"/user/{userId}/service", json=payload)
 
@@ -156,7 +324,52 @@ class GoonFilesApi:
             return None
 
         wrapped = response.json()
-        return User(**wrapped)
+        user = User(**wrapped)
+
+        self.__cache_user(user)
+        return user
+
+    async def upsert_user(
+        self,
+        userId: int,
+        userName: str,
+        regDate: datetime,
+        serviceToken: ServiceToken,
+    ) -> Optional[User]:
+        """Creates the user, or adds the serviceToken to an existing user,
+        in a single request.
+
+        Raises:
+            UpsertUnsupported: The goon-files instance has no upsert endpoint
+            TypeError: Invalid user parameter
+
+        Returns:
+            Optional[User]: The stored user or None
+        """
+        payload = {
+            "userId": userId,
+            "userName": userName,
+            "regDate": regDate.isoformat(),
+            "services": [self.__service_token_payload(serviceToken)],
+        }
+
+        response = await self.client.put(f"/user/{userId}", json=payload)
+
+        # Older goon-files instances don't have the route
+        if response.status_code in (404, 405):
+            raise UpsertUnsupported()
+
+        if response.status_code == 422:
+            raise TypeError("Invalid user parameter")
+
+        if response.status_code != 200:
+            return None
+
+        wrapped = response.json()
+        user = User(**wrapped)
+
+        self.__cache_user(user)
+        return user
 
     async def create_or_update_user(
         self,
@@ -165,17 +378,28 @@ class GoonFilesApi:
         regDate: datetime,
         serviceToken: ServiceToken,
     ) -> Optional[User]:
-        """Creates or updates a user with the specified serviceToken
+        """Creates or updates a user with the specified serviceToken.
+        Uses the upsert endpoint when goon-files has it, otherwise a lookup
+        followed by a create or update.
 
         Args:
-            userId (int): [description]
-            userName (str): [description]
-            regDate (datetime): [description]
-            serviceToken (ServiceToken): [description]
+            userId (int): The user's SA id
+            userName (str): The user's SA name
+            regDate (datetime): The user's SA registration date
+            serviceToken (ServiceToken): The service token to add
 
         Returns:
-            Optional[User]: [description]
+            Optional[User]: The stored user or None
         """
+        if self.upsert_supported:
+            try:
+                return await self.upsert_user(userId, userName, regDate, serviceToken)
+            except UpsertUnsupported:
+                logger.warning(
+                    "goon-files has no upsert endpoint, using find and create/update"
+                )
+                self.upsert_supported = False
+
         user = await self.find_user(userId)
         if user is None:
             # Create
@@ -183,3 +407,11 @@ class GoonFilesApi:
         else:
             # Update
             return await self.add_service_token(userId, serviceToken)
+
+    @staticmethod
+    def __service_token_payload(serviceToken: ServiceToken) -> Dict[str, str]:
+        payload = {"service": serviceToken.service.value, "token": serviceToken.token}
+        if serviceToken.info is not None:
+            payload["info"] = serviceToken.info
+
+        return payload
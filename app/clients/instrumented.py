@@ -0,0 +1,67 @@
+import re
+import time
+
+from typing import Any, Optional
+
+from httpx import AsyncClient, Request, Response
+
+from app import metrics, tracing
+from app.circuit import CircuitBreaker, CircuitOpenError
+from app.config import upstream_settings
+
+# Ids in paths would give every user their own series
+_id_segment = re.compile(r"/\d+(?=/|$)")
+
+
+class InstrumentedAsyncClient(AsyncClient):
+    """An AsyncClient recording the latency and status of every request, and
+    tracing it as a stage of the current interaction.
+
+    Requests go through the upstream's circuit breaker, and time out in time
+    for the current interaction's deadline.
+    """
+
+    def __init__(
+        self, upstream: str, breaker: Optional[CircuitBreaker] = None, **kwargs: Any
+    ) -> None:
+        kwargs.setdefault("timeout", upstream_settings.timeout)
+        super().__init__(**kwargs)
+
+        self.upstream = upstream
+        self.breaker = breaker or CircuitBreaker.from_settings(upstream)
+
+    async def send(self, request: Request, **kwargs: Any) -> Response:
+        route = _id_segment.sub("/{id}", request.url.path)
+
+        # Requests are timed out by the client's timeout and the deadline
+        kwargs.pop("timeout", None)
+        send = super().send
+
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with tracing.span(f"{self.upstream} {request.method} {route}") as span:
+                response = await self.breaker.call(
+                    lambda timeout: send(request, timeout=timeout, **kwargs),
+                    self.timeout,
+                )
+                status = response.status_code
+
+                if span is not None:
+                    span.attributes["http.status_code"] = status
+        except CircuitOpenError:
+            status = "circuit_open"
+            raise
+        finally:
+            metrics.upstream_request_seconds.observe(
+                time.perf_counter() - start,
+                upstream=self.upstream,
+                method=request.method,
+                route=route,
+                status=status,
+            )
+
+        if response.status_code == 429:
+            metrics.rate_limited.inc(upstream=self.upstream, route=route)
+
+        return response
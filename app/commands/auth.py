@@ -15,6 +15,8 @@ from loguru import logger
 from app.clients.goon_auth_api import GoonAuthApi
 from app.clients.goon_files_api import GoonFilesApi
 from app.commands.handlers.auth_handler import AuthHandler
+from app.commands.handlers.deferred import defer_interaction
+from app.metrics import timed_interaction
 
 
 class AuthCollection(interactions.EventCollection):
@@ -61,22 +63,29 @@ class AuthCollection(interactions.EventCollection):
     # endregion
 
     # region Handlers
+    @timed_interaction
     @interactions.on("auth")
     async def auth(
         self, ctx: IncomingDiscordSlashInteraction, **kwargs
     ) -> DiscordResponse:
-        return await self.auth_handler.process_auth(ctx, **kwargs)
+        return await defer_interaction(
+            ctx, self.auth_handler.process_auth(ctx, **kwargs)
+        )
 
+    @timed_interaction
     @interactions.on("auth.cancel", type=EventTypes.COMPONENT)
     async def auth_cancel(
         self, ctx: IncomingDiscordButtonInteraction
     ) -> DiscordResponse:
         return await self.auth_handler.process_auth_cancel(ctx)
 
+    @timed_interaction
     @interactions.on("auth.verify", type=EventTypes.COMPONENT)
     async def auth_verify(
         self, ctx: IncomingDiscordButtonInteraction
     ) -> DiscordResponse:
-        return await self.auth_handler.process_auth_verify(ctx)
+        return await defer_interaction(
+            ctx, self.auth_handler.process_auth_verify(ctx), component=True
+        )
 
     # endregion
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Union
+from typing import Optional, Union
 
 from dispike.incoming.discord_types.member import Member
 from dispike.incoming.incoming_interactions import (
@@ -10,14 +10,17 @@ from dispike.response import DiscordResponse
 
 from loguru import logger
 
-from app.clients.discord_api.models.channel import CreateMessage
+from app import tracing
 from app.config import bot_settings
-from app.models.goon_server import GoonServer, ServerOption
+from app.models.goon_server import GoonServer, ServerConfig
+from app.discord import discord
 from app.mongodb import db
 from app.clients.discord_api import DiscordClient
 from app.clients.goon_auth_api import GoonAuthApi, GoonAuthStatus
 from app.clients.goon_files_api import GoonFilesApi, Service, ServiceToken, User
+from app.commands.handlers.upstream import upstream_unavailable
 from app.commands.views import AuthView
+from app.models.outbox_job import OutboxJob
 from app.models.user_auth_request import UserAuthRequest
 from app.utils import valid_sa_name
 
@@ -37,8 +40,11 @@ class AuthHandler:
         self.auth_api = auth_api
         self.files_api = files_api
 
-        self.discord_api = DiscordClient(bot_settings.discord_bot_token)
+    @property
+    def discord_api(self) -> DiscordClient:
+        return discord.client
 
+    @upstream_unavailable(AuthView.challenge_error)
     async def process_auth(
         self, ctx: IncomingDiscordSlashInteraction, **kwargs
     ) -> DiscordResponse:
@@ -78,6 +84,19 @@ class AuthHandler:
             f"user: {ctx.member.user.id}, username: {username}"
         )
 
+        # Running /auth again with the same name gets the same challenge back
+        with tracing.span("mongo.find_active_attempt"):
+            existing_attempt = await UserAuthRequest.find_active(
+                ctx.member.user.id, username, ctx.guild_id
+            )
+        if existing_attempt is not None:
+            logger.debug(
+                f"Reusing challenge - hash: {existing_attempt.challengeHash}, "
+                f"user: {existing_attempt.saName}, "
+                f"author: {existing_attempt.userDiscordId}"
+            )
+            return AuthView.challenge_ok(existing_attempt.challengeHash)
+
         try:
             challenge = await self.auth_api.get_verification(username)
             if challenge is None:
@@ -93,9 +112,10 @@ class AuthHandler:
             return AuthView.verification_error("Invalid username, please try again!")
 
         # Check for existing auth attempt with this hash
-        existing_attempt = await db.engine.find_one(
-            UserAuthRequest, UserAuthRequest.challengeHash == challenge.hash
-        )
+        with tracing.span("mongo.find_hash_attempt"):
+            existing_attempt = await db.engine.find_one(
+                UserAuthRequest, UserAuthRequest.challengeHash == challenge.hash
+            )
 
         if existing_attempt is not None:
             if existing_attempt.userDiscordId != ctx.member.user.id:
@@ -105,18 +125,17 @@ class AuthHandler:
                     f"Are you sure you're `{username}`?"
                 )
 
-        # Delete any old auth requestrs for the discordId
-        await self.__delete_auth_attempts(ctx.member.user.id)
-
-        # Save the new one
-        result = await db.engine.save(
-            UserAuthRequest(
-                userDiscordId=ctx.member.user.id,
-                saName=username,
-                challengeHash=challenge.hash,
-                lastUpdated=datetime.now(),
+        # Replace any old auth request for the discordId with the new one
+        with tracing.span("mongo.replace_attempt"):
+            result = await UserAuthRequest.replace_for_user(
+                UserAuthRequest(
+                    userDiscordId=ctx.member.user.id,
+                    saName=username,
+                    challengeHash=challenge.hash,
+                    lastUpdated=datetime.now(),
+                    guildId=ctx.guild_id,
+                )
             )
-        )
 
         # Send response
         logger.debug(
@@ -140,14 +159,17 @@ class AuthHandler:
             f"user: {ctx.member.user.id}, user.userName: {user.userName}"
         )
 
-        if await self.__check_user_auth_role(ctx.member, ctx.guild_id):
+        with tracing.span("mongo.find_config"):
+            config = await GoonServer.find_config(ctx.guild_id)
+
+        if self.__check_user_auth_role(ctx.member, config):
             return AuthView.verification_error(
                 "You're already authenticated in this server.", False
             )
 
         # TODO: Return embed with ok/cancel to allow user to accept auth on server
 
-        if await self.__grant_user_auth_role(ctx.member, ctx.guild_id, user.userName):
+        if await self.__grant_user_auth_role(ctx.member.user.id, config, user.userName):
             return AuthView.verification_ok(
                 message=f"Welcome back {user.userName}, you're already "
                 "authenticated so you get to skip the line!",
@@ -162,65 +184,110 @@ class AuthHandler:
             "Something went wrong, please contact a GAN admin."
         )
 
+    @upstream_unavailable(AuthView.challenge_error)
     async def process_auth_verify(
         self, ctx: IncomingDiscordButtonInteraction
     ) -> DiscordResponse:
-        authRequest = await db.engine.find_one(
-            UserAuthRequest, UserAuthRequest.userDiscordId == ctx.member.user.id
-        )
+        with tracing.span("mongo.find_attempt"):
+            authRequest = await db.engine.find_one(
+                UserAuthRequest, UserAuthRequest.userDiscordId == ctx.member.user.id
+            )
         if authRequest is None:
             return AuthView.verification_error(
                 "Your seem to be missing from the database. Did you wait too long?\n"
                 "Please try again from /auth."
             )
 
+        if bot_settings.auto_verify:
+            return await self.__verify_status(authRequest)
+
         # TODO: Rate limit here
-        authStatus = await self.__check_awful_auth_verification(authRequest)
-        if authStatus is str:
+        with tracing.span("auth.check_verification"):
+            authStatus = await self.check_awful_auth_verification(authRequest)
+        if isinstance(authStatus, str):
             return AuthView.verification_error(authStatus)
 
         if not authStatus.validated:
             return AuthView.verification_profile_hash_missing()
 
+        with tracing.span("auth.complete_verification"):
+            error = await self.complete_verification(
+                authRequest, authStatus, ctx.guild_id
+            )
+        if error is not None:
+            return AuthView.verification_error(error)
+
+        await self.__delete_auth_attempts(ctx.member.user.id)
+
+        return AuthView.verification_ok()
+
+    async def __verify_status(self, authRequest: UserAuthRequest) -> DiscordResponse:
+        """Answers a verify click from the poller's progress, no upstream calls.
+
+        Args:
+            authRequest (UserAuthRequest): The user's auth attempt
+        """
+        if authRequest.verified:
+            await self.__delete_auth_attempts(authRequest.userDiscordId)
+            return AuthView.verification_ok()
+
+        # The user is active, check again on the poller's next pass
+        await UserAuthRequest.expedite_check(authRequest)
+
+        return AuthView.verification_profile_hash_missing()
+
+    async def complete_verification(
+        self, authRequest: UserAuthRequest, authStatus: GoonAuthStatus, guild_id: int
+    ) -> Optional[str]:
+        """Stores a validated user in goon-files and grants their role.
+
+        Args:
+            authRequest (UserAuthRequest): The user's auth attempt
+            authStatus (GoonAuthStatus): The validated awful-auth status
+            guild_id (int): The guild to grant the role in
+
+        Returns:
+            Optional[str]: An error message, or None on success
+        """
         user = await self.files_api.create_or_update_user(
             userId=authStatus.user_id,
             userName=authStatus.user_name,
             regDate=authStatus.register_date,
-            serviceToken=ServiceToken(Service.DISCORD, ctx.member.user.id),
+            serviceToken=ServiceToken(Service.DISCORD, authRequest.userDiscordId),
         )
         if user is None:
             logger.error(
                 "Failed to save auth to db - "
-                f"discordId: {ctx.member.user.id}, saName: {authStatus.user_name}"
-            )
-            return AuthView.verification_error(
-                "Failed to save auth to database, please see a GAN admin."
+                f"discordId: {authRequest.userDiscordId}, "
+                f"saName: {authStatus.user_name}"
             )
+            return "Failed to save auth to database, please see a GAN admin."
+
+        with tracing.span("mongo.find_config"):
+            config = await GoonServer.find_config(guild_id)
 
         if not await self.__grant_user_auth_role(
-            ctx.member, ctx.guild_id, user.userName
+            authRequest.userDiscordId, config, user.userName
         ):
             logger.error(
                 "Failed to save grant role - "
                 f"discordId: {authRequest.userDiscordId}, "
                 f"saName: {authRequest.saName}"
             )
-            return AuthView.verification_error(
+            return (
                 "Failed to grant role, please see a GAN admin "
                 "and/or your local server admin."
             )
 
-        await self.__delete_auth_attempts(ctx.member.user.id)
-
         logger.debug(
             "Authed user - "
-            f"guild: {ctx.guild_id}, discordId: {authRequest.userDiscordId}, "
+            f"guild: {guild_id}, discordId: {authRequest.userDiscordId}, "
             f"saName: {authRequest.saName}"
         )
 
-        return AuthView.verification_ok()
+        return None
 
-    async def __check_awful_auth_verification(
+    async def check_awful_auth_verification(
         self, authRequest: UserAuthRequest
     ) -> Union[GoonAuthStatus, str]:
         """Checks a UserAuthRequest against the awful-auth api.
@@ -244,7 +311,7 @@ class AuthHandler:
             )
             return (
                 "This error should not exist, "
-                "please tell your nearest GAN developer.",
+                "please tell your nearest GAN developer."
             )
 
         return status
@@ -259,12 +326,8 @@ class AuthHandler:
         return AuthView.verification_cancel()
 
     async def __delete_auth_attempts(self, discordId: int) -> None:
-        auth_requests = await db.engine.find(
-            UserAuthRequest, UserAuthRequest.userDiscordId == discordId
-        )
-
-        for req in auth_requests:
-            await db.engine.delete(req)
+        with tracing.span("mongo.delete_attempts"):
+            await UserAuthRequest.delete_for_user(discordId)
 
     async def process_auth_decline(
         self, ctx: IncomingDiscordButtonInteraction
@@ -272,84 +335,66 @@ class AuthHandler:
         # TODO: process_auth_decline impl
         return DiscordResponse()
 
-    async def __check_user_auth_role(self, member: Member, guild_id: int) -> bool:
+    def __check_user_auth_role(
+        self, member: Member, config: Optional[ServerConfig]
+    ) -> bool:
         """Checks if a user has the authorized role in a guild.
 
         Args:
             member (Member): The user
-            guild_id (int): The guild id
+            config (Optional[ServerConfig]): The guild's resolved config
 
         Returns:
             bool: True if the user has the role
         """
-        role_id = await GoonServer.find_option(guild_id, ServerOption.AUTH_ROLE)
-        if role_id is None:
+        if config is None or config.auth_role is None:
             return False
 
-        return any(role_id == id for id in member.roles)
+        return any(config.auth_role == int(id) for id in member.roles)
 
     async def __grant_user_auth_role(
-        self, member: Member, guild_id: int, username: str
+        self, user_id: int, config: Optional[ServerConfig], username: str
     ) -> bool:
-        """Grants a user the correct authorized role in a guild.
+        """Queues granting a user the correct authorized role in a guild, and the
+        notices that follow. The outbox workers carry it out.
 
         Args:
-            member (Member): The user
-            guild_id (int): The guild id
+            user_id (int): The user's discord id
+            config (Optional[ServerConfig]): The guild's resolved config
+            username (str): The user's SA name, used for notices
 
         Returns:
-            bool: True if the role was granted, otherwise false.
+            bool: True if the grant was queued, false if the guild isn't setup.
         """
-
-        role_id = await GoonServer.find_option(guild_id, ServerOption.AUTH_ROLE)
-        notify_admin = await GoonServer.find_option(
-            guild_id, ServerOption.NOTICE_CHANNEL_ADMIN
-        )
-        notify_auth = await GoonServer.find_option(
-            guild_id, ServerOption.NOTICE_CHANNEL_AUTH
-        )
-
-        try:
-            role_id = int(role_id)
-            notify_admin = int(notify_admin)
-            if notify_auth is not None:
-                notify_auth = int(notify_auth)
-        except ValueError:
-            return False
-        except TypeError:
+        if (
+            config is None
+            or config.auth_role is None
+            or config.notice_channel_admin is None
+        ):
             return False
 
-        if await self.discord_api.add_guild_member_role(
-            guild_id, member.user.id, int(role_id)
+        channels = [config.notice_channel_admin]
+        if (
+            config.notice_channel_auth is not None
+            and config.notice_channel_auth != config.notice_channel_admin
         ):
-            logger.debug(
-                f"Granted goon status - user: {member.user.id}, "
-                f"server: {guild_id}, role: {role_id}"
-            )
-
-            message = CreateMessage(
-                content=f"<@{member.user.id}> (SA: {username}) "
-                "has successfully authenticated!",
-            )
-
-            if not await self.discord_api.create_message(notify_admin, message):
-                logger.error(
-                    "Failed to notify admin channel of new auth - "
-                    f"channel: {notify_admin}, message: {str(message)}"
+            channels.append(config.notice_channel_auth)
+
+        with tracing.span("mongo.enqueue_grant"):
+            await OutboxJob.enqueue(
+                OutboxJob.grant_role(
+                    config.serverId,
+                    user_id,
+                    config.auth_role,
+                    f"<@{user_id}> (SA: {username}) has successfully authenticated!",
+                    channels,
+                    digestWindow=config.notice_digest,
                 )
-
-            if notify_auth is not None and notify_auth != notify_admin:
-                if not await self.discord_api.create_message(notify_auth, message):
-                    logger.error(
-                        "Failed to notify auth channel of new auth - "
-                        f"channel: {notify_auth}, message: {str(message)}"
-                    )
-
-            return True
+            )
 
         logger.debug(
-            f"Failed to granted goon status - user: {member.user.id}, "
-            f"server: {guild_id}, role: {role_id}"
+            f"Queued goon status - user: {user_id}, "
+            f"server: {config.serverId}, role: {config.auth_role}"
         )
 
-        return False
+        return True
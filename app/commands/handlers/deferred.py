@@ -0,0 +1,115 @@
+import time
+
+from typing import Awaitable, Union
+
+from dispike.incoming.incoming_interactions import (
+    IncomingDiscordButtonInteraction,
+    IncomingDiscordSlashInteraction,
+)
+from dispike.response import DeferredEmphericalResponse, DiscordResponse
+from loguru import logger
+
+from app import deadline, metrics, tracing
+from app.clients.discord_api.models.channel import CreateMessage
+from app.commands.views import AuthView
+from app.commands.views.templates import response_payload
+from app.config import bot_settings
+from app.discord import discord
+from app.tasks import background_tasks
+
+Interaction = Union[IncomingDiscordButtonInteraction, IncomingDiscordSlashInteraction]
+
+
+class DeferredUpdateResponse:
+    """Acknowledges a component interaction, the message is updated later."""
+
+    response = {"type": 6}
+
+
+def interaction_name(ctx: Interaction) -> str:
+    """The command name or component custom id an interaction was routed by"""
+    return getattr(ctx.data, "custom_id", None) or ctx.data.name
+
+
+async def defer_interaction(
+    ctx: Interaction, work: Awaitable[DiscordResponse], component: bool = False
+) -> DiscordResponse:
+    """Acknowledges an interaction straight away and finishes it in the background.
+
+    Discord gives us three seconds to respond to an interaction, deferring keeps
+    slow upstream calls from blowing through that window.
+
+    Args:
+        ctx (Interaction): The interaction
+        work (Awaitable[DiscordResponse]): The handler producing the real response
+        component (bool): True for component interactions (deferred update)
+
+    Returns:
+        DiscordResponse: The deferred acknowledgement
+    """
+    if not bot_settings.defer_interactions:
+        return await work
+
+    # The trace covers the background work too
+    trace = tracing.current_trace()
+    if trace is not None:
+        trace.hold()
+
+    background_tasks.spawn(
+        _complete_interaction(ctx, work, component), name=f"interaction-{ctx.id}"
+    )
+
+    if component:
+        return DeferredUpdateResponse()
+
+    return DeferredEmphericalResponse()
+
+
+async def _complete_interaction(
+    ctx: Interaction, work: Awaitable[DiscordResponse], component: bool
+) -> None:
+    trace = tracing.current_trace()
+    try:
+        # Discord's three seconds were met by the acknowledgement
+        with deadline.deadline(None):
+            await _finish_interaction(ctx, work, component)
+    finally:
+        if trace is not None:
+            trace.release()
+
+
+async def _finish_interaction(
+    ctx: Interaction, work: Awaitable[DiscordResponse], component: bool
+) -> None:
+    start = time.perf_counter()
+    try:
+        response = await work
+    except Exception:
+        logger.exception(f"Deferred interaction failed - id: {ctx.id}")
+        response = AuthView.verification_error(
+            "Something went wrong, please contact a GAN admin.", update_message=False
+        )
+
+    metrics.deferred_interaction_seconds.observe(
+        time.perf_counter() - start, interaction=interaction_name(ctx)
+    )
+
+    payload = response_payload(response)
+    message = CreateMessage.from_response(response, payload)
+    application_id = bot_settings.discord_application_id
+
+    # Deferred components keep their message, only updates replace it
+    if component and payload["type"] != 7:
+        if await discord.client.create_followup_message(
+            application_id, ctx.token, message
+        ):
+            return
+    elif await discord.client.edit_original_interaction_response(
+        application_id, ctx.token, message
+    ):
+        return
+
+    logger.error(
+        f"Failed to complete deferred interaction - id: {ctx.id}, "
+        f"message: {str(message)}"
+    )
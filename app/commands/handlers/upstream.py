@@ -0,0 +1,45 @@
+import functools
+
+from typing import Awaitable, Callable
+
+from dispike.response import DiscordResponse
+from httpx import HTTPError
+from loguru import logger
+
+from app.circuit import CircuitOpenError
+from app.deadline import DeadlineExceeded
+
+Handler = Callable[..., Awaitable[DiscordResponse]]
+
+UPSTREAM_UNAVAILABLE_MESSAGE = (
+    "We're having trouble reaching the Goon Auth Network right now, "
+    "please try again in a few minutes."
+)
+
+
+def upstream_unavailable(
+    error: Callable[[str], DiscordResponse]
+) -> Callable[[Handler], Handler]:
+    """Answers with an error straight away when an upstream is down, or can't
+    answer before the interaction's deadline, instead of failing the interaction.
+
+    Args:
+        error (Callable[[str], DiscordResponse]): Builds the error response
+            from a message
+    """
+
+    def decorator(func: Handler) -> Handler:
+        @functools.wraps(func)
+        async def wrapper(self, ctx, *args, **kwargs) -> DiscordResponse:
+            try:
+                return await func(self, ctx, *args, **kwargs)
+            except (CircuitOpenError, DeadlineExceeded, HTTPError) as e:
+                logger.warning(
+                    f"Upstream unavailable - guild: {ctx.guild_id}, "
+                    f"user: {ctx.member.user.id}, error: {type(e).__name__}: {e}"
+                )
+                return error(UPSTREAM_UNAVAILABLE_MESSAGE)
+
+        return wrapper
+
+    return decorator
@@ -1,3 +1,4 @@
+import asyncio
 import typing
 
 from dispike import interactions, IncomingDiscordSlashInteraction
@@ -6,7 +7,9 @@ from dispike.response import DiscordResponse
 from loguru import logger
 
 from app.clients.goon_files_api import GoonFilesApi, Service
+from app.commands.handlers.upstream import upstream_unavailable
 from app.commands.views import AboutView, HelpView
+from app.metrics import timed_interaction
 from app.models.goon_server import GoonServer
 
 
@@ -35,18 +38,19 @@ class InfoCollection(interactions.EventCollection):
         logger.info(f"InfoCollection created {len(commands)} commands ({names})")
         return commands
 
+    @timed_interaction
     @interactions.on("about")
+    @upstream_unavailable(AboutView.about_error)
     async def about(self, ctx: IncomingDiscordSlashInteraction) -> DiscordResponse:
-        # Pull stats
-        server_count = await GoonServer.server_count()
-
-        # Pull Auth records and choose a response
-        user = await self.files_api.find_user_by_service(
-            Service.DISCORD, ctx.member.user.id
+        # Pull stats and auth records together
+        server_count, user = await asyncio.gather(
+            GoonServer.server_count(),
+            self.files_api.find_user_by_service(Service.DISCORD, ctx.member.user.id),
         )
 
         return AboutView.about(server_count, user)
 
+    @timed_interaction
     @interactions.on("help")
     async def help(self, ctx: IncomingDiscordSlashInteraction) -> DiscordResponse:
         return HelpView.help()
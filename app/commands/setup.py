@@ -4,18 +4,28 @@ from dispike import interactions
 from dispike.creating.models.options import CommandOption, DiscordCommand, OptionTypes
 from dispike.incoming.incoming_interactions import IncomingDiscordSlashInteraction
 from dispike.response import DiscordResponse
+from httpx import HTTPError
 from loguru import logger
 
+from app import deadline
+from app.circuit import CircuitOpenError
 from app.clients.discord_api.client import DiscordClient
-from app.config import bot_settings
+from app.clients.discord_api.models.webhook import Webhook
+from app.commands.handlers.upstream import upstream_unavailable
 from app.commands.views import SetupView
-from app.models.goon_server import GoonServer, ServerOption
+from app.discord import discord
+from app.metrics import timed_interaction
+from app.models.goon_server import GoonServer, ServerConfig, ServerOption
+from app.tasks import background_tasks
 
 
 class SetupCollection(interactions.EventCollection):
     def __init__(self, **kwargs) -> None:
         super().__init__()
-        self.discord_api = DiscordClient(bot_settings.discord_bot_token)
+
+    @property
+    def discord_api(self) -> DiscordClient:
+        return discord.client
 
     def command_schemas(
         self,
@@ -54,6 +64,42 @@ class SetupCollection(interactions.EventCollection):
                         type=OptionTypes.CHANNEL,
                         required=False,
                     ),
+                    CommandOption(
+                        name="notice-digest-secs",
+                        description=(
+                            "Optionally collect auth notices for this many seconds "
+                            "and send them as one message. 0 turns it off."
+                        ),
+                        type=OptionTypes.INTEGER,
+                        required=False,
+                    ),
+                    CommandOption(
+                        name="notice-webhooks",
+                        description=(
+                            "Send notices through webhooks the bot creates. "
+                            "The bot user must have manage webhooks permissions."
+                        ),
+                        type=OptionTypes.BOOLEAN,
+                        required=False,
+                    ),
+                    CommandOption(
+                        name="admin-notice-webhook",
+                        description=(
+                            "Optional existing webhook url to send admin "
+                            "notifications through."
+                        ),
+                        type=OptionTypes.STRING,
+                        required=False,
+                    ),
+                    CommandOption(
+                        name="auth-notice-webhook",
+                        description=(
+                            "Optional existing webhook url to send auth "
+                            "notifications through."
+                        ),
+                        type=OptionTypes.STRING,
+                        required=False,
+                    ),
                 ],
             )
         ]
@@ -63,7 +109,9 @@ class SetupCollection(interactions.EventCollection):
         return commands
 
     # TODO: Hide this command after setup
+    @timed_interaction
     @interactions.on("setup")
+    @upstream_unavailable(SetupView.setup_error)
     async def about(
         self,
         ctx: IncomingDiscordSlashInteraction,
@@ -81,19 +129,162 @@ class SetupCollection(interactions.EventCollection):
         # if server is not None:
         #    return SetupView.already_set()
 
-        server = await GoonServer.save_options(
-            ctx.guild_id,
-            {
-                ServerOption.AUTH_ROLE: auth_role,
-                ServerOption.NOTICE_CHANNEL_ADMIN: admin_channel,
-                ServerOption.NOTICE_CHANNEL_AUTH: kwargs.get(
-                    "auth-notice-channel", admin_channel
-                ),
-            },
-        )
+        auth_channel = kwargs.get("auth-notice-channel", admin_channel)
+        options = {
+            ServerOption.AUTH_ROLE: auth_role,
+            ServerOption.NOTICE_CHANNEL_ADMIN: admin_channel,
+            ServerOption.NOTICE_CHANNEL_AUTH: auth_channel,
+        }
+
+        notice_digest = kwargs.get("notice-digest-secs", None)
+        if notice_digest is not None:
+            options[ServerOption.NOTICE_DIGEST] = str(max(int(notice_digest), 0))
+
+        # Webhooks made for this setup, deleted again unless it's saved
+        created: typing.List[Webhook] = []
+        saved = False
+        try:
+            webhooks = await self.__notice_webhooks(
+                server,
+                {
+                    ServerOption.NOTICE_WEBHOOK_ADMIN: (
+                        int(admin_channel),
+                        kwargs.get("admin-notice-webhook", None),
+                    ),
+                    ServerOption.NOTICE_WEBHOOK_AUTH: (
+                        int(auth_channel),
+                        kwargs.get("auth-notice-webhook", None),
+                    ),
+                },
+                kwargs.get("notice-webhooks", None),
+                created,
+            )
+            if isinstance(webhooks, str):
+                return SetupView.setup_error(webhooks)
+
+            options.update(webhooks)
+
+            server = await GoonServer.save_options(ctx.guild_id, options)
+            saved = True
+        finally:
+            if not saved and len(created) > 0:
+                # Off the response path, it may be out of time already
+                background_tasks.spawn(
+                    SetupCollection.__delete_unsaved_webhooks(created),
+                    name=f"setup-cleanup-{ctx.guild_id}",
+                )
 
         return SetupView.setup_ok(server)
 
+    async def __notice_webhooks(
+        self,
+        server: typing.Optional[GoonServer],
+        channels: typing.Dict[ServerOption, typing.Tuple[int, typing.Optional[str]]],
+        provision: typing.Optional[bool],
+        created: typing.List[Webhook],
+    ) -> typing.Union[typing.Dict[ServerOption, str], str]:
+        """Resolves the webhook to send each notice channel's notices through.
+        Given urls are checked against their channel, otherwise the webhooks are
+        created if asked for, reusing any already setup for the channel.
+        Webhooks that are turned off are deleted.
+
+        Args:
+            server (typing.Optional[GoonServer]): The server as setup before
+            channels (typing.Dict[ServerOption, typing.Tuple[int, str]]): The
+                channel and given url, if any, for each webhook option
+            provision (typing.Optional[bool]): True to create webhooks, False to
+                stop using them, None to leave them be
+            created (typing.List[Webhook]): Filled with the webhooks created,
+                for the caller to delete if the setup isn't saved
+
+        Returns:
+            typing.Union[typing.Dict[ServerOption, str], str]: The webhook
+                options to save, or an error message
+        """
+        stored: typing.Dict[ServerOption, str] = dict()
+        if server is not None and server.options is not None:
+            stored = server.options
+
+        webhooks: typing.Dict[int, Webhook] = dict()
+        if server is not None:
+            webhooks.update(ServerConfig(server.serverId, stored).notice_webhooks)
+
+        options: typing.Dict[ServerOption, str] = dict()
+        removed: typing.List[Webhook] = []
+        for option, (channel, url) in channels.items():
+            if url is not None:
+                webhook = Webhook.from_url(url)
+                found = None
+                if webhook is not None:
+                    found = await discord.webhooks.get_webhook(
+                        webhook.id, webhook.token
+                    )
+
+                if found is None or found.channel_id != channel:
+                    return f"That webhook doesn't post to <#{channel}>."
+
+                webhook.channel_id = channel
+            elif provision:
+                webhook = webhooks.get(channel, None)
+                if webhook is None:
+                    webhook = await self.discord_api.create_webhook(
+                        channel, "Goon Auth Network"
+                    )
+
+                    if webhook is None:
+                        return (
+                            f"Couldn't create a webhook in <#{channel}>, please "
+                            "check the bot has manage webhooks permissions there."
+                        )
+
+                    created.append(webhook)
+            else:
+                if provision is not None:
+                    options[option] = ""
+
+                    webhook = Webhook.from_option(stored.get(option, None))
+                    if webhook is not None:
+                        removed.append(webhook)
+
+                continue
+
+            webhooks[channel] = webhook
+            options[option] = webhook.option_value()
+
+        # Turned off webhooks aren't left behind in the channels
+        kept = [Webhook.from_option(value) for value in options.values()]
+        kept_ids = {webhook.id for webhook in kept if webhook is not None}
+        await SetupCollection.__delete_webhooks(
+            [webhook for webhook in removed if webhook.id not in kept_ids]
+        )
+
+        return options
+
+    @staticmethod
+    async def __delete_webhooks(webhooks: typing.List[Webhook]) -> None:
+        """Deletes webhooks nothing will use, logging any that can't be"""
+        for webhook in {webhook.id: webhook for webhook in webhooks}.values():
+            try:
+                deleted = await discord.webhooks.delete_webhook(
+                    webhook.id, webhook.token
+                )
+                error = ""
+            except (CircuitOpenError, HTTPError) as e:
+                deleted = False
+                error = f", error: {type(e).__name__}: {e}"
+
+            if not deleted:
+                logger.warning(
+                    "Couldn't delete unused notice webhook - "
+                    f"webhook: {webhook.id}{error}"
+                )
+
+    @staticmethod
+    async def __delete_unsaved_webhooks(webhooks: typing.List[Webhook]) -> None:
+        # The cleanup isn't held to the interaction's deadline
+        with deadline.deadline(None):
+            await SetupCollection.__delete_webhooks(webhooks)
+
     async def __find_server_owner(self, serverId: int) -> typing.Optional[int]:
         guild = await self.discord_api.get_guild(serverId)
         if guild is None:
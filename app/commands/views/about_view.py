@@ -5,42 +5,73 @@ from dispike.response import DiscordResponse
 
 from app import __version__
 from app.clients.goon_files_api import User
+from .templates import ResponseTemplate, placeholder
 from .utils import create_response
 
 
+def _about(with_user: bool) -> DiscordResponse:
+    # Generic about
+    embed = Embed(
+        title="About The Goon Authentication Network",
+        description=(
+            "The Goon Authentication Network is a replacement for the decommissioned GDN, built from the ground up to for privacy and transparency. "  # noqa: E501
+            "It is my hope that the community joins in this endeavor and creates a large, drama free, authentication network for goons.\n\n"  # noqa: E501
+            "If you would like to help, visit the project's [github](https://github.com/GoonAuthNetwork/) "  # noqa: E501
+            "or join the [GAN Hub](https://discord.gg/AW63YNcaDf) discord!"
+        ),
+        color=color.Color.teal(),
+    )
+    embed.set_footer(text=f"Running Discord-Auth v{__version__}")
+
+    # Current user if it exists
+    if with_user:
+        embed.add_field(
+            name="Current User",
+            value=(
+                f"[{placeholder('user_name')}](https://forums.somethingawful.com/"
+                f"member.php?action=getinfo&userid={placeholder('user_id')})"
+            ),
+            inline=True,
+        )
+        embed.add_field(
+            name="Authenticated At", value=placeholder("created_at"), inline=True
+        )
+        embed.add_field(name="\u200b", value="\u200b")
+
+    # GAN stats
+    embed.add_field(
+        name="Servers powered by GAN", value=placeholder("server_count"), inline=True
+    )
+
+    return create_response(embed, add_powered_by=False)
+
+
+def _about_error() -> DiscordResponse:
+    embed = Embed(
+        title="About The Goon Authentication Network",
+        description=placeholder("message"),
+        color=color.Color.red(),
+    )
+
+    return create_response(embed)
+
+
+_about_template = ResponseTemplate(_about(with_user=False))
+_about_user_template = ResponseTemplate(_about(with_user=True))
+_about_error_template = ResponseTemplate(_about_error())
+
+
 class AboutView:
     def about(server_count: int, user: Optional[User]) -> DiscordResponse:
-        # Generic about
-        embed = Embed(
-            title="About The Goon Authentication Network",
-            description=(
-                "The Goon Authentication Network is a replacement for the decommissioned GDN, built from the ground up to for privacy and transparency. "  # noqa: E501
-                "It is my hope that the community joins in this endeavor and creates a large, drama free, authentication network for goons.\n\n"  # noqa: E501
-                "If you would like to help, visit the project's [github](https://github.com/GoonAuthNetwork/) "  # noqa: E501
-                "or join the [GAN Hub](https://discord.gg/AW63YNcaDf) discord!"
-            ),
-            color=color.Color.teal(),
+        if user is None:
+            return _about_template.render(server_count=server_count)
+
+        return _about_user_template.render(
+            server_count=server_count,
+            user_name=user.userName,
+            user_id=user.userId,
+            created_at=user.createdAt.strftime("%m/%d/%y %I:%M %p"),
         )
-        embed.set_footer(text=f"Running Discord-Auth v{__version__}")
-
-        # Current user if it exists
-        if user is not None:
-            embed.add_field(
-                name="Current User",
-                value=(
-                    f"[{user.userName}](https://forums.somethingawful.com/member.php?"
-                    f"action=getinfo&userid={user.userId})"
-                ),
-                inline=True,
-            )
-            embed.add_field(
-                name="Authenticated At",
-                value=user.createdAt.strftime("%m/%d/%y %I:%M %p"),
-                inline=True,
-            )
-            embed.add_field(name="\u200b", value="\u200b")
-
-        # GAN stats
-        embed.add_field(name="Servers powered by GAN", value=server_count, inline=True)
-
-        return create_response(embed, add_powered_by=False)
+
+    def about_error(message: str) -> DiscordResponse:
+        return _about_error_template.render(message=message)
@@ -2,166 +2,215 @@ from dispike.creating.components import ActionRow, Button, ButtonStyles, LinkBut
 from dispike.helper import Embed, color
 from dispike.response import DiscordResponse
 
+from .templates import PrecompiledResponse, ResponseTemplate, placeholder
+
+
+def _challenge_ok() -> DiscordResponse:
+    message = (
+        "Please place the following hash anywhere in the "
+        "**Additional Information** section of your Something Awful profile."
+        f"\n\n**{placeholder('hash')}**\n\n"
+        f"Note: The hash expires after **five minutes**\n\n"
+        'Once finished, click the "Verify Hash" button below.'
+    )
+    embed = Embed(
+        type="rich",
+        title="Goon Authentication",
+        description=message,
+        colour=color.Color.teal(),
+    )
+    embed.add_field(
+        name="\u200B",
+        value=(
+            "Powered by the open-source "
+            "[Goon Auth Network](https://github.com/GoonAuthNetwork)"
+        ),
+    )
+
+    action_row = ActionRow(
+        components=[
+            LinkButton(
+                label="SA Profile",
+                url=(
+                    "https://forums.somethingawful.com/member.php?" "action=editprofile"
+                ),
+            ),
+            Button(
+                label="Verify Hash",
+                style=ButtonStyles.SUCCESS,
+                custom_id="auth.verify",
+            ),
+            Button(label="Cancel", style=ButtonStyles.DANGER, custom_id="auth.cancel"),
+        ]
+    )
+
+    return DiscordResponse(
+        content=" ", embeds=[embed], action_row=action_row, empherical=True
+    )
+
+
+def _challenge_error() -> DiscordResponse:
+    embed = Embed(
+        type="rich",
+        title="Goon Authentication",
+        description=placeholder("message"),
+        colour=color.Color.red(),
+    )
+    embed.add_field(
+        name="\u200B",
+        value=(
+            "Powered by the open-source "
+            "[Goon Auth Network](https://github.com/GoonAuthNetwork)"
+        ),
+    )
+
+    return DiscordResponse(content=" ", embeds=[embed], empherical=True)
+
+
+def _verification_cancel() -> DiscordResponse:
+    embed = Embed(
+        type="rich",
+        title="Goon Authentication",
+        description=(
+            "We're sad to see you go, feel free to auth again later!\n\n"
+            "If you would like to know more about the Goon Auth Network "
+            "please click below!"
+        ),
+        color=color.Colour.red(),
+    )
+
+    action_row = ActionRow(
+        components=[
+            LinkButton(label="GAN Github", url="https://github.com/GoonAuthNetwork")
+        ]
+    )
+
+    return DiscordResponse(
+        update_message=True,
+        content=" ",
+        embeds=[embed],
+        action_row=action_row,
+        empherical=True,
+    )
+
+
+def _verification_ok(message: str, update_message: bool) -> DiscordResponse:
+    embed = Embed(
+        type="rich",
+        title="Goon Authentication",
+        description=message,
+        color=color.Colour.green(),
+    )
+
+    action_row = ActionRow(
+        components=[
+            LinkButton(label="GAN Github", url="https://github.com/GoonAuthNetwork")
+        ]
+    )
+
+    return DiscordResponse(
+        update_message=update_message,
+        content=" ",
+        embeds=[embed],
+        action_row=action_row,
+        empherical=True,
+    )
+
+
+def _verification_error(update_message: bool) -> DiscordResponse:
+    embed = Embed(
+        type="rich",
+        title="Goon Authentication",
+        description=(
+            f"{placeholder('message')}\n\n"
+            "If you would like to know more about the Goon Auth Network "
+            "please click below!"
+        ),
+        color=color.Colour.red(),
+    )
+
+    action_row = ActionRow(
+        components=[
+            LinkButton(label="GAN Github", url="https://github.com/GoonAuthNetwork")
+        ]
+    )
+
+    return DiscordResponse(
+        update_message=update_message,
+        content=" ",
+        embeds=[embed],
+        action_row=action_row,
+        empherical=True,
+    )
+
+
+def _verification_profile_hash_missing() -> DiscordResponse:
+    embed = Embed(
+        type="rich",
+        title="Goon Authentication",
+        description=("Failed to validate. Is the **hash** in your **profile**?"),
+        color=color.Colour.red(),
+    )
+
+    return DiscordResponse(
+        embeds=[embed],
+        empherical=True,
+    )
+
+
+_default_verification_ok_message = (
+    "You're finally validated! "
+    "Please enjoy your new found gooniness.\n\n"
+    "If you would like to know more about the Goon Auth Network "
+    "please click below!"
+)
+
+# Static responses, keyed by update_message where it applies
+_verification_cancel_response = PrecompiledResponse.compile(_verification_cancel())
+_verification_profile_hash_missing_response = PrecompiledResponse.compile(
+    _verification_profile_hash_missing()
+)
+_verification_ok_responses = {
+    update: PrecompiledResponse.compile(
+        _verification_ok(_default_verification_ok_message, update)
+    )
+    for update in (True, False)
+}
+
+# Templates for the responses with variable fields
+_challenge_ok_template = ResponseTemplate(_challenge_ok())
+_challenge_error_template = ResponseTemplate(_challenge_error())
+_verification_ok_templates = {
+    update: ResponseTemplate(_verification_ok(placeholder("message"), update))
+    for update in (True, False)
+}
+_verification_error_templates = {
+    update: ResponseTemplate(_verification_error(update)) for update in (True, False)
+}
+
 
 class AuthView:
     def challenge_ok(hash: str) -> DiscordResponse:
-        message = (
-            "Please place the following hash anywhere in the "
-            "**Additional Information** section of your Something Awful profile."
-            f"\n\n**{hash}**\n\n"
-            f"Note: The hash expires after **five minutes**\n\n"
-            'Once finished, click the "Verify Hash" button below.'
-        )
-        embed = Embed(
-            type="rich",
-            title="Goon Authentication",
-            description=message,
-            colour=color.Color.teal(),
-        )
-        embed.add_field(
-            name="\u200B",
-            value=(
-                "Powered by the open-source "
-                "[Goon Auth Network](https://github.com/GoonAuthNetwork)"
-            ),
-        )
-
-        action_row = ActionRow(
-            components=[
-                LinkButton(
-                    label="SA Profile",
-                    url=(
-                        "https://forums.somethingawful.com/member.php?"
-                        "action=editprofile"
-                    ),
-                ),
-                Button(
-                    label="Verify Hash",
-                    style=ButtonStyles.SUCCESS,
-                    custom_id="auth.verify",
-                ),
-                Button(
-                    label="Cancel", style=ButtonStyles.DANGER, custom_id="auth.cancel"
-                ),
-            ]
-        )
-
-        return DiscordResponse(
-            content=" ", embeds=[embed], action_row=action_row, empherical=True
-        )
+        return _challenge_ok_template.render(hash=hash)
 
     def challenge_error(message: str) -> DiscordResponse:
-        embed = Embed(
-            type="rich",
-            title="Goon Authentication",
-            description=message,
-            colour=color.Color.red(),
-        )
-        embed.add_field(
-            name="\u200B",
-            value=(
-                "Powered by the open-source "
-                "[Goon Auth Network](https://github.com/GoonAuthNetwork)"
-            ),
-        )
-
-        return DiscordResponse(content=" ", embeds=[embed], empherical=True)
+        return _challenge_error_template.render(message=message)
 
     def verification_cancel() -> DiscordResponse:
-        embed = Embed(
-            type="rich",
-            title="Goon Authentication",
-            description=(
-                "We're sad to see you go, feel free to auth again later!\n\n"
-                "If you would like to know more about the Goon Auth Network "
-                "please click below!"
-            ),
-            color=color.Colour.red(),
-        )
-
-        action_row = ActionRow(
-            components=[
-                LinkButton(label="GAN Github", url="https://github.com/GoonAuthNetwork")
-            ]
-        )
-
-        return DiscordResponse(
-            update_message=True,
-            content=" ",
-            embeds=[embed],
-            action_row=action_row,
-            empherical=True,
-        )
+        return _verification_cancel_response
 
     def verification_ok(
         message: str = None, update_message: bool = True
     ) -> DiscordResponse:
         if message is None:
-            message = (
-                "You're finally validated! "
-                "Please enjoy your new found gooniness.\n\n"
-                "If you would like to know more about the Goon Auth Network "
-                "please click below!"
-            )
-
-        embed = Embed(
-            type="rich",
-            title="Goon Authentication",
-            description=message,
-            color=color.Colour.green(),
-        )
-
-        action_row = ActionRow(
-            components=[
-                LinkButton(label="GAN Github", url="https://github.com/GoonAuthNetwork")
-            ]
-        )
-
-        return DiscordResponse(
-            update_message=update_message,
-            content=" ",
-            embeds=[embed],
-            action_row=action_row,
-            empherical=True,
-        )
+            return _verification_ok_responses[update_message]
+
+        return _verification_ok_templates[update_message].render(message=message)
 
     def verification_error(
         message: str, update_message: bool = True
     ) -> DiscordResponse:
-        embed = Embed(
-            type="rich",
-            title="Goon Authentication",
-            description=(
-                f"{message}\n\n"
-                "If you would like to know more about the Goon Auth Network "
-                "please click below!"
-            ),
-            color=color.Colour.red(),
-        )
-
-        action_row = ActionRow(
-            components=[
-                LinkButton(label="GAN Github", url="https://github.com/GoonAuthNetwork")
-            ]
-        )
-
-        return DiscordResponse(
-            update_message=update_message,
-            content=" ",
-            embeds=[embed],
-            action_row=action_row,
-            empherical=True,
-        )
+        return _verification_error_templates[update_message].render(message=message)
 
     def verification_profile_hash_missing() -> DiscordResponse:
-        embed = Embed(
-            type="rich",
-            title="Goon Authentication",
-            description=("Failed to validate. Is the **hash** in your **profile**?"),
-            color=color.Colour.red(),
-        )
-
-        return DiscordResponse(
-            embeds=[embed],
-            empherical=True,
-        )
+        return _verification_profile_hash_missing_response
@@ -2,28 +2,50 @@ from dispike.helper import Embed, color
 from dispike.response import DiscordResponse
 
 from app.models.goon_server import GoonServer
+from .templates import PrecompiledResponse
 from .utils import create_response
 
 
+def _not_server_owner() -> DiscordResponse:
+    embed = Embed(
+        title="New Server Setup",
+        description=(
+            "You're not the server owner! I think setup would be best left to them."
+        ),
+        color=color.Color.red(),
+    )
+
+    return create_response(embed)
+
+
+def _already_set() -> DiscordResponse:
+    embed = Embed(
+        title="New Server Setup",
+        description=(
+            "The server was already setup."
+            " To change configuration options please use `/config`."
+        ),
+        color=color.Color.red(),
+    )
+
+    return create_response(embed)
+
+
+_not_server_owner_response = PrecompiledResponse.compile(_not_server_owner())
+_already_set_response = PrecompiledResponse.compile(_already_set())
+
+
 class SetupView:
     def not_server_owner() -> DiscordResponse:
-        embed = Embed(
-            title="New Server Setup",
-            description=(
-                "You're not the server owner! I think setup would be best left to them."
-            ),
-            color=color.Color.red(),
-        )
-
-        return create_response(embed)
+        return _not_server_owner_response
 
     def already_set() -> DiscordResponse:
+        return _already_set_response
+
+    def setup_error(message: str) -> DiscordResponse:
         embed = Embed(
             title="New Server Setup",
-            description=(
-                "The server was already setup."
-                " To change configuration options please use `/config`."
-            ),
+            description=f"{message}\n\nNothing was changed.",
             color=color.Color.red(),
         )
 
@@ -43,6 +65,10 @@ class SetupView:
         )
 
         for opt, value in server.options.items():
+            # Options that were turned off
+            if value == "":
+                continue
+
             value = opt.format_value_for_mention(value)
 
             embed.add_field(
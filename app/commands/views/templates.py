@@ -0,0 +1,118 @@
+import json
+import re
+
+from typing import Any, Dict, List, Optional
+
+from dispike.creating.components import ActionRow
+from dispike.helper import Embed
+from dispike.response import DiscordResponse
+from starlette.responses import Response
+
+_placeholder_pattern = re.compile(rb"\{\{(\w+)\}\}")
+
+
+def placeholder(name: str) -> str:
+    """Marks a variable field in a ResponseTemplate, only valid inside strings"""
+    return "{{" + name + "}}"
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _escape(value: Any) -> bytes:
+    # Encoded as a json string without the surrounding quotes
+    return json.dumps(str(value))[1:-1].encode("utf-8")
+
+
+class PrecompiledResponse(DiscordResponse):
+    """A DiscordResponse that's already been serialised.
+
+    dispike hands `response` straight back to FastAPI, returning a ready made
+    Response skips building and encoding the payload on every interaction.
+    Instances are shared between interactions and must not be modified.
+    """
+
+    def __init__(self, body: bytes, action_row: Optional[ActionRow] = None) -> None:
+        self.body = body
+
+        self._action_row = action_row
+        self.__payload: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def compile(response: DiscordResponse) -> "PrecompiledResponse":
+        """Serialises a response once.
+
+        Args:
+            response (DiscordResponse): The response
+
+        Returns:
+            PrecompiledResponse: The serialised response
+        """
+        return PrecompiledResponse(_encode(response.response), response.action_row)
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """The decoded payload, only needed when sending through the REST api"""
+        if self.__payload is None:
+            self.__payload = json.loads(self.body)
+
+        return self.__payload
+
+    @property
+    def content(self) -> Optional[str]:
+        return self.payload["data"].get("content", None)
+
+    @property
+    def embeds(self) -> List[Embed]:
+        return [Embed.from_dict(embed) for embed in self.payload["data"]["embeds"]]
+
+    @property
+    def response(self) -> Response:
+        return Response(self.body, media_type="application/json")
+
+
+class ResponseTemplate:
+    """A response serialised once with placeholders for its variable fields.
+
+    Rendering only escapes the values and splices them into the encoded body.
+    """
+
+    def __init__(self, response: DiscordResponse) -> None:
+        self.action_row = response.action_row
+
+        # Literal chunks alternating with placeholder names
+        self.__parts = _placeholder_pattern.split(_encode(response.response))
+
+    def render(self, **values: Any) -> PrecompiledResponse:
+        """Fills in the placeholders.
+
+        Args:
+            **values (Any): Value for each placeholder, converted with str()
+
+        Returns:
+            PrecompiledResponse: The rendered response
+        """
+        parts = self.__parts
+        chunks = [parts[0]]
+
+        for i in range(1, len(parts), 2):
+            chunks.append(_escape(values[parts[i].decode("utf-8")]))
+            chunks.append(parts[i + 1])
+
+        return PrecompiledResponse(b"".join(chunks), self.action_row)
+
+
+def response_payload(response: DiscordResponse) -> Dict[str, Any]:
+    """Gets a response's payload without rebuilding precompiled ones.
+
+    Args:
+        response (DiscordResponse): The response
+
+    Returns:
+        Dict[str, Any]: The interaction response payload
+    """
+    if isinstance(response, PrecompiledResponse):
+        return response.payload
+
+    return response.response
@@ -1,28 +1,35 @@
 from dispike.helper import Embed
 from dispike.response import DiscordResponse
 
+POWERED_BY_FIELD = {
+    "name": "\u200B",
+    "value": (
+        "Powered by the open-source "
+        "[Goon Auth Network](https://github.com/GoonAuthNetwork)"
+    ),
+    "inline": False,
+}
+
 
 def create_response(
     embed: Embed, ephemeral=True, add_powered_by=True
 ) -> DiscordResponse:
     """
     Creates a DiscordResponse for the specified embed.
-    Optionally adds a powered_by_field to the embed.
+    Optionally adds a powered_by_field to a copy of the embed.
     """
     if add_powered_by:
-        powered_by_field(embed)
+        embed = powered_by_field(embed)
 
     # Empty content string is to fix a current dispike bug
     return DiscordResponse(content=" ", embeds=[embed], empherical=ephemeral)
 
 
-def powered_by_field(embed: Embed) -> None:
-    """Adds the generic "powered by" field to the specified embed"""
-    embed.add_field(
-        name="\u200B",
-        value=(
-            "Powered by the open-source "
-            "[Goon Auth Network](https://github.com/GoonAuthNetwork)"
-        ),
-        inline=False,
-    )
+def powered_by_field(embed: Embed) -> Embed:
+    """Returns a copy of the embed with the generic "powered by" field added"""
+    data = embed.to_dict()
+
+    # Embed.copy shares the field list, build a new one instead
+    data["fields"] = [*data.get("fields", []), dict(POWERED_BY_FIELD)]
+
+    return Embed.from_dict(data)
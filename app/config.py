@@ -30,11 +30,98 @@ class BotSettings(BaseSettings):
 
     # Bot Settings
     auth_attempt_lifespan: int = Field(5, env="AUTH_ATTEMPT_LIFESPAN_MINS")
+    defer_interactions: bool = Field(True, env="DEFER_INTERACTIONS")
+
+    # Background verification poller
+    auto_verify: bool = Field(False, env="AUTO_VERIFY")
+    auto_verify_interval: float = Field(2.0, env="AUTO_VERIFY_INTERVAL_SECS")
+    auto_verify_concurrency: int = Field(5, env="AUTO_VERIFY_CONCURRENCY")
+    auto_verify_batch_size: int = Field(50, env="AUTO_VERIFY_BATCH_SIZE")
+    auto_verify_max_backoff: float = Field(60.0, env="AUTO_VERIFY_MAX_BACKOFF_SECS")
+    auto_verify_lease: float = Field(60.0, env="AUTO_VERIFY_LEASE_SECS")
+
+    # Outbox for role grants and notices
+    outbox_concurrency: int = Field(4, env="OUTBOX_CONCURRENCY")
+    outbox_poll_interval: float = Field(1.0, env="OUTBOX_POLL_INTERVAL_SECS")
+    outbox_max_attempts: int = Field(8, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_lease: float = Field(60.0, env="OUTBOX_LEASE_SECS")
+    outbox_max_backoff: float = Field(300.0, env="OUTBOX_MAX_BACKOFF_SECS")
+    # Notices a digest holds before it's sent early, for guilds using digests
+    notice_digest_max_entries: int = Field(20, env="NOTICE_DIGEST_MAX_ENTRIES")
+
+    # Caching
+    server_cache_size: int = Field(1024, env="SERVER_CACHE_SIZE")
+    server_cache_ttl: int = Field(300, env="SERVER_CACHE_TTL_SECS")
+    user_cache_size: int = Field(4096, env="USER_CACHE_SIZE")
+    user_cache_ttl: int = Field(300, env="USER_CACHE_TTL_SECS")
+    user_cache_negative_ttl: int = Field(30, env="USER_CACHE_NEGATIVE_TTL_SECS")
+    server_count_refresh_interval: float = Field(300.0, env="SERVER_COUNT_REFRESH_SECS")
 
 
 bot_settings = BotSettings()
 
 
+class DiscordHttpSettings(BaseSettings):
+    max_connections: int = Field(100, env="DISCORD_HTTP_MAX_CONNECTIONS")
+    max_keepalive_connections: int = Field(20, env="DISCORD_HTTP_MAX_KEEPALIVE")
+    http2: bool = Field(False, env="DISCORD_HTTP2")
+
+    timeout: float = Field(10.0, env="DISCORD_HTTP_TIMEOUT")
+    connect_timeout: float = Field(5.0, env="DISCORD_HTTP_CONNECT_TIMEOUT")
+
+    # Retries for rate limits, server errors and dropped connections
+    retry_attempts: int = Field(3, env="DISCORD_RETRY_ATTEMPTS")
+    retry_base_delay: float = Field(0.5, env="DISCORD_RETRY_BASE_DELAY_SECS")
+    retry_max_delay: float = Field(5.0, env="DISCORD_RETRY_MAX_DELAY_SECS")
+    retry_budget: float = Field(10.0, env="DISCORD_RETRY_BUDGET_SECS")
+
+    # Notice webhooks get their own pool, off the bot's request path
+    webhook_max_connections: int = Field(10, env="DISCORD_WEBHOOK_MAX_CONNECTIONS")
+    webhook_max_keepalive_connections: int = Field(
+        5, env="DISCORD_WEBHOOK_MAX_KEEPALIVE"
+    )
+
+
+discord_http_settings = DiscordHttpSettings()
+
+
+class UpstreamSettings(BaseSettings):
+    # Default timeout for awful-auth and goon-files requests
+    timeout: float = Field(5.0, env="UPSTREAM_TIMEOUT_SECS")
+    # Time kept back from an interaction's deadline to send its response
+    deadline_margin: float = Field(0.25, env="UPSTREAM_DEADLINE_MARGIN_SECS")
+
+    # Circuit breakers open once this share of the calls in the window fail
+    circuit_failure_rate: float = Field(0.5, env="CIRCUIT_FAILURE_RATE")
+    circuit_window: float = Field(30.0, env="CIRCUIT_WINDOW_SECS")
+    circuit_min_calls: int = Field(10, env="CIRCUIT_MIN_CALLS")
+    circuit_open_for: float = Field(15.0, env="CIRCUIT_OPEN_SECS")
+    circuit_half_open_calls: int = Field(1, env="CIRCUIT_HALF_OPEN_CALLS")
+
+
+upstream_settings = UpstreamSettings()
+
+
+class TracingSettings(BaseSettings):
+    slow_threshold: float = Field(2.0, env="TRACE_SLOW_THRESHOLD_SECS")
+
+    # OTLP/HTTP collector, e.g. http://127.0.0.1:4318
+    export_url: Optional[AnyHttpUrl] = Field(None, env="TRACE_EXPORT_URL")
+
+
+tracing_settings = TracingSettings()
+
+
+class MetricsSettings(BaseSettings):
+    # Off by default, /metrics is served to anyone who can reach the bot
+    enabled: bool = Field(False, env="METRICS_ENABLED")
+    # Bearer token scrapes must send, if set
+    token: Optional[str] = Field(None, env="METRICS_TOKEN")
+
+
+metrics_settings = MetricsSettings()
+
+
 class MongoSettings(BaseSettings):
     min_connections: int = Field(10, env="DB_MIN_CONNECTIONS_COUNT")
     max_connections: int = Field(10, env="DB_MAX_CONNECTIONS_COUNT")
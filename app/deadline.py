@@ -0,0 +1,77 @@
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from httpx import Timeout
+
+from app.config import upstream_settings
+
+# perf_counter() time the current interaction has to respond by
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """There's no time left to make a request before the interaction's deadline"""
+
+    def __init__(self, upstream: str, *args: object) -> None:
+        super().__init__(f"No time left for a {upstream} request", *args)
+        self.upstream = upstream
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Sets how long the work within the block, and tasks it spawns, has left.
+
+    Args:
+        seconds (Optional[float]): Seconds from now, None removes the deadline
+    """
+    at = None if seconds is None else time.perf_counter() + seconds
+
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline, or None without one"""
+    at = _deadline.get()
+    if at is None:
+        return None
+
+    return at - time.perf_counter()
+
+
+def request_timeout(upstream: str, timeout: Timeout) -> Timeout:
+    """Shortens a request's timeout to what's left before the current deadline.
+
+    Args:
+        upstream (str): The upstream the request is for
+        timeout (Timeout): The request's usual timeout
+
+    Raises:
+        DeadlineExceeded: Too little time is left to make the request
+
+    Returns:
+        Timeout: The timeout, capped at the time left
+    """
+    left = time_left()
+    if left is None:
+        return timeout
+
+    left -= upstream_settings.deadline_margin
+    if left <= 0:
+        raise DeadlineExceeded(upstream)
+
+    def cap(value: Optional[float]) -> float:
+        return left if value is None else min(value, left)
+
+    return Timeout(
+        connect=cap(timeout.connect),
+        read=cap(timeout.read),
+        write=cap(timeout.write),
+        pool=cap(timeout.pool),
+    )
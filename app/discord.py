@@ -0,0 +1,104 @@
+from httpx import AsyncClient, Limits, Timeout
+from loguru import logger
+
+from app.clients.discord_api import DiscordClient
+from app.clients.discord_api.client import defaultHeaders
+from app.clients.discord_api.retry import RetryPolicy
+from app.config import bot_settings, discord_http_settings
+
+
+class DiscordApi:
+    client: DiscordClient = None
+    # Tokenless, for notice webhooks
+    webhooks: DiscordClient = None
+
+
+discord = DiscordApi()
+
+
+async def get_discord_client() -> DiscordClient:
+    return discord.client
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def _create_http_client(
+    max_connections: int, max_keepalive_connections: int, http2: bool
+) -> AsyncClient:
+    return AsyncClient(
+        headers=defaultHeaders,
+        http2=http2,
+        limits=Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+        timeout=Timeout(
+            discord_http_settings.timeout,
+            connect=discord_http_settings.connect_timeout,
+        ),
+    )
+
+
+async def connect_to_discord() -> None:
+    logger.info("Creating discord http clients...")
+
+    http2 = discord_http_settings.http2
+    if http2 and not _http2_available():
+        logger.warning("DISCORD_HTTP2 is set but h2 isn't installed, using HTTP/1.1")
+        http2 = False
+
+    retry = RetryPolicy(
+        max_attempts=discord_http_settings.retry_attempts,
+        base_delay=discord_http_settings.retry_base_delay,
+        max_delay=discord_http_settings.retry_max_delay,
+        budget=discord_http_settings.retry_budget,
+    )
+
+    discord.client = DiscordClient(
+        bot_settings.discord_bot_token,
+        client=_create_http_client(
+            discord_http_settings.max_connections,
+            discord_http_settings.max_keepalive_connections,
+            http2,
+        ),
+        retry=retry,
+    )
+
+    # Webhooks have their own rate limits, separate from the bot's
+    discord.webhooks = DiscordClient(
+        client=_create_http_client(
+            discord_http_settings.webhook_max_connections,
+            discord_http_settings.webhook_max_keepalive_connections,
+            http2,
+        ),
+        retry=retry,
+        name="discord_webhooks",
+    )
+
+    logger.info(
+        "Discord http clients created - "
+        f"max_connections: {discord_http_settings.max_connections}, "
+        f"max_keepalive: {discord_http_settings.max_keepalive_connections}, "
+        f"webhook_max_connections: {discord_http_settings.webhook_max_connections}, "
+        f"http2: {http2}"
+    )
+
+
+async def close_discord_connection() -> None:
+    logger.info("Closing discord http clients...")
+
+    clients = [discord.client, discord.webhooks]
+    discord.client = None
+    discord.webhooks = None
+
+    for client in clients:
+        await client.close()
+
+    logger.info("Discord http clients closed!")
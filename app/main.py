@@ -4,14 +4,25 @@ from loguru import logger
 
 from app.clients.goon_auth_api import GoonAuthApi
 from app.clients.goon_files_api import GoonFilesApi
-from app.config import bot_settings, logging_settings
+from app import tracing
+from app.config import (
+    bot_settings,
+    logging_settings,
+    metrics_settings,
+    tracing_settings,
+)
 from app.commands import (
     AuthCollection,
     InfoCollection,
     # OptionsCollection,
     SetupCollection,
 )
+from app.discord import connect_to_discord, close_discord_connection
+from app.metrics import MetricsMiddleware
 from app.mongodb import connect_to_mongo, close_mongo_connection
+from app.tasks import background_tasks
+from app.tracing import TraceExporter
+from app.workers import OutboxWorker, ServerCountRefresher, VerificationPoller
 
 logging_settings.setup_loguru()
 
@@ -22,19 +33,29 @@ bot = Dispike(
 )
 
 app = bot.referenced_application
-app.add_event_handler("startup", connect_to_mongo)
-app.add_event_handler("shutdown", close_mongo_connection)
+
+# Added last so it runs before dispike's signature verification
+if metrics_settings.enabled:
+    app.add_middleware(MetricsMiddleware, token=metrics_settings.token)
 
 logger.info(f"Using GoonAuthApi at {bot_settings.awful_auth_address}")
 logger.info(f"Using GoonFilesApi at {bot_settings.goon_files_address}")
 
 apis = {
     "auth_api": GoonAuthApi(bot_settings.awful_auth_address, ""),
-    "files_api": GoonFilesApi(bot_settings.goon_files_address, ""),
+    "files_api": GoonFilesApi(
+        bot_settings.goon_files_address,
+        "",
+        cache_size=bot_settings.user_cache_size,
+        cache_ttl=bot_settings.user_cache_ttl,
+        cache_negative_ttl=bot_settings.user_cache_negative_ttl,
+    ),
 }
 
+auth_collection = AuthCollection(**apis)
+
 collections: List[interactions.EventCollection] = [
-    AuthCollection(**apis),
+    auth_collection,
     InfoCollection(**apis),
     # The Dispike models are broken. No options, atleast in this schema, for now
     # OptionsCollection(bot, **apis),
@@ -44,6 +65,53 @@ collections: List[interactions.EventCollection] = [
 for col in collections:
     bot.register_collection(col)
 
+# Startup runs in order, shutdown stops workers before closing what they use
+app.add_event_handler("startup", connect_to_mongo)
+app.add_event_handler("startup", connect_to_discord)
+
+outbox_worker = OutboxWorker(
+    concurrency=bot_settings.outbox_concurrency,
+    poll_interval=bot_settings.outbox_poll_interval,
+    max_attempts=bot_settings.outbox_max_attempts,
+    lease=bot_settings.outbox_lease,
+    max_backoff=bot_settings.outbox_max_backoff,
+    digest_size=bot_settings.notice_digest_max_entries,
+)
+app.add_event_handler("startup", outbox_worker.start)
+app.add_event_handler("shutdown", outbox_worker.stop)
+
+server_count_refresher = ServerCountRefresher(
+    interval=bot_settings.server_count_refresh_interval
+)
+app.add_event_handler("startup", server_count_refresher.start)
+app.add_event_handler("shutdown", server_count_refresher.stop)
+
+if bot_settings.auto_verify:
+    poller = VerificationPoller(
+        auth_collection.auth_handler,
+        interval=bot_settings.auto_verify_interval,
+        concurrency=bot_settings.auto_verify_concurrency,
+        batch_size=bot_settings.auto_verify_batch_size,
+        max_backoff=bot_settings.auto_verify_max_backoff,
+        lease=bot_settings.auto_verify_lease,
+    )
+    app.add_event_handler("startup", poller.start)
+    app.add_event_handler("shutdown", poller.stop)
+
+app.add_event_handler("shutdown", background_tasks.shutdown)
+app.add_event_handler("shutdown", close_discord_connection)
+app.add_event_handler("shutdown", close_mongo_connection)
+
+for api in apis.values():
+    app.add_event_handler("shutdown", api.close)
+
+if tracing_settings.export_url is not None:
+    logger.info(f"Exporting traces to {tracing_settings.export_url}")
+
+    trace_exporter = TraceExporter(tracing_settings.export_url)
+    tracing.set_exporter(trace_exporter)
+    app.add_event_handler("shutdown", trace_exporter.close)
+
 logger.info("Discord-Auth start up complete")
 logger.info(
     (
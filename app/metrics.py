@@ -0,0 +1,324 @@
+import functools
+import hmac
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import deadline, tracing
+
+# Discord drops interactions that aren't responded to within three seconds
+INTERACTION_DEADLINE_SECS = 3.0
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if len(names) == 0:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+class Metric:
+    """Base for the metrics, a set of values per unique combination of labels.
+
+    Metrics are updated from pymongo's monitoring threads as well as the event
+    loop, so every update holds a lock.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = dict()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], LabelValues, float]]:
+        """Yields (sample name, label names, label values, value)"""
+        raise NotImplementedError()
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+        with self._lock:
+            samples = list(self.samples())
+
+        for name, names, values, value in samples:
+            lines.append(
+                f"{name}{_format_labels(names, values)} {_format_value(value)}"
+            )
+
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, self.labelnames, key, value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._key(labels), None)
+        return 0 if entry is None else entry[0][-1]
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observes how long the block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        names = self.labelnames + ("le",)
+
+        for key, (counts, total) in self._values.items():
+            for bound, count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", names, key + (_format_value(bound),), count
+
+            yield f"{self.name}_sum", self.labelnames, key, total
+            yield f"{self.name}_count", self.labelnames, key, counts[-1]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.__metrics: Dict[str, Metric] = dict()
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.__metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self.__metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Renders every metric in the prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self.__metrics.values():
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+interaction_seconds: Histogram = registry.register(
+    Histogram(
+        "discord_auth_interaction_seconds",
+        "Time taken to respond to an interaction",
+        ["interaction"],
+    )
+)
+deferred_interaction_seconds: Histogram = registry.register(
+    Histogram(
+        "discord_auth_deferred_interaction_seconds",
+        "Time taken to finish a deferred interaction",
+        ["interaction"],
+    )
+)
+deadline_misses: Counter = registry.register(
+    Counter(
+        "discord_auth_deadline_misses_total",
+        "Work that ran past its deadline",
+        ["operation"],
+    )
+)
+upstream_request_seconds: Histogram = registry.register(
+    Histogram(
+        "discord_auth_upstream_request_seconds",
+        "Latency of requests to upstream apis",
+        ["upstream", "method", "route", "status"],
+    )
+)
+rate_limited: Counter = registry.register(
+    Counter(
+        "discord_auth_rate_limited_total",
+        "Responses with a 429 status",
+        ["upstream", "route"],
+    )
+)
+upstream_retries: Counter = registry.register(
+    Counter(
+        "discord_auth_upstream_retries_total",
+        "Upstream requests sent again",
+        ["upstream", "reason"],
+    )
+)
+mongo_command_seconds: Histogram = registry.register(
+    Histogram(
+        "discord_auth_mongo_command_seconds",
+        "Latency of mongo commands",
+        ["command", "status"],
+    )
+)
+circuit_transitions: Counter = registry.register(
+    Counter(
+        "discord_auth_circuit_transitions_total",
+        "Upstream circuit breaker state changes",
+        ["upstream", "state"],
+    )
+)
+circuit_rejections: Counter = registry.register(
+    Counter(
+        "discord_auth_circuit_rejections_total",
+        "Requests rejected by an open circuit",
+        ["upstream"],
+    )
+)
+outbox_jobs: Counter = registry.register(
+    Counter(
+        "discord_auth_outbox_jobs_total",
+        "Outbox jobs processed by result",
+        ["kind", "result"],
+    )
+)
+cache_requests: Counter = registry.register(
+    Counter(
+        "discord_auth_cache_requests_total",
+        "Cache lookups by result",
+        ["cache", "result"],
+    )
+)
+
+
+def timed_interaction(func: Callable) -> Callable:
+    """Records how long an interaction handler takes to respond, and traces it.
+    Upstream requests made by the handler are held to discord's deadline.
+
+    Goes above `interactions.on`, the metric is labelled with its event name.
+    """
+    name = func._dispike_event_name
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with tracing.trace(name), deadline.deadline(INTERACTION_DEADLINE_SECS):
+                return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+
+            interaction_seconds.observe(elapsed, interaction=name)
+            if elapsed > INTERACTION_DEADLINE_SECS:
+                deadline_misses.inc(operation=f"interaction:{name}")
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Serves the metrics ahead of dispike's signature verification, which
+    rejects anything without a discord signature.
+
+    Scrapes must send `token` as a bearer token, if one is given.
+    """
+
+    def __init__(
+        self, app: ASGIApp, path: str = "/metrics", token: Optional[str] = None
+    ) -> None:
+        self.app = app
+        self.path = path
+        self.token = token
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        if self.token is not None:
+            authorization = Headers(scope=scope).get("authorization", "")
+            if not hmac.compare_digest(
+                authorization.encode(), f"Bearer {self.token}".encode()
+            ):
+                response = Response(status_code=401)
+                await response(scope, receive, send)
+                return
+
+        response = Response(registry.render(), media_type="text/plain; version=0.0.4")
+        await response(scope, receive, send)
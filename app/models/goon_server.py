@@ -4,37 +4,143 @@ import odmantic
 from enum import Enum
 from loguru import logger
 
-from app.mongodb import db
+from app.cache import TTLCache
+from app.clients.discord_api.models.webhook import Webhook
+from app.config import bot_settings
+from app.mongodb import create_index, db
 
 
 class ServerOption(str, Enum):
     AUTH_ROLE = "auth_role"
     NOTICE_CHANNEL_AUTH = "auth_notice_channel"
     NOTICE_CHANNEL_ADMIN = "admin_notice_channel"
+    NOTICE_DIGEST = "notice_digest_secs"
+    NOTICE_WEBHOOK_ADMIN = "admin_notice_webhook"
+    NOTICE_WEBHOOK_AUTH = "auth_notice_webhook"
 
     def format_value_for_mention(self, value: str) -> typing.Optional[str]:
         formats = {
             self.AUTH_ROLE: "<@&{value}>",
             self.NOTICE_CHANNEL_ADMIN: "<#{value}>",
             self.NOTICE_CHANNEL_AUTH: "<#{value}>",
+            self.NOTICE_DIGEST: "{value}s",
+            # Never show the webhook's token
+            self.NOTICE_WEBHOOK_ADMIN: "Enabled",
+            self.NOTICE_WEBHOOK_AUTH: "Enabled",
         }
 
         return formats.get(self.value, "").format(value=value)
 
 
+class ServerConfig:
+    """A server's options resolved and parsed once, ready for the auth hot path"""
+
+    serverId: int
+    auth_role: typing.Optional[int]
+    notice_channel_admin: typing.Optional[int]
+    notice_channel_auth: typing.Optional[int]
+    # Seconds to collect auth notices for before sending them as one message
+    notice_digest: typing.Optional[int]
+    # Webhooks to send notices through, by the channel they post to
+    notice_webhooks: typing.Dict[int, Webhook]
+
+    def __init__(self, serverId: int, options: typing.Dict[ServerOption, str]) -> None:
+        self.serverId = serverId
+        self.auth_role = ServerConfig.__parse_id(options, ServerOption.AUTH_ROLE)
+        self.notice_channel_admin = ServerConfig.__parse_id(
+            options, ServerOption.NOTICE_CHANNEL_ADMIN
+        )
+        self.notice_channel_auth = ServerConfig.__parse_id(
+            options, ServerOption.NOTICE_CHANNEL_AUTH
+        )
+
+        notice_digest = ServerConfig.__parse_id(options, ServerOption.NOTICE_DIGEST)
+        self.notice_digest = notice_digest if notice_digest else None
+
+        self.notice_webhooks = dict()
+        for option in (
+            ServerOption.NOTICE_WEBHOOK_ADMIN,
+            ServerOption.NOTICE_WEBHOOK_AUTH,
+        ):
+            webhook = Webhook.from_option(options.get(option, None))
+            if webhook is not None:
+                self.notice_webhooks[webhook.channel_id] = webhook
+
+    @staticmethod
+    def __parse_id(
+        options: typing.Dict[ServerOption, str], option: ServerOption
+    ) -> typing.Optional[int]:
+        try:
+            return int(options.get(option, None))
+        except (TypeError, ValueError):
+            return None
+
+
+# Guild configuration rarely changes, keep it out of the per-interaction db load
+_server_cache: TTLCache[int, "GoonServer"] = TTLCache(
+    max_size=bot_settings.server_cache_size,
+    ttl=bot_settings.server_cache_ttl,
+    name="goon_server",
+)
+
+# Network wide server count for /about, refreshed in the background
+_server_count: typing.Optional[int] = None
+
+
 class GoonServer(odmantic.Model):
     serverId: int = odmantic.Field(..., title="The discord server's id")
     options: typing.Optional[typing.Dict[ServerOption, str]] = odmantic.Field(
         description="The server's options", default=None
     )
 
+    @staticmethod
+    async def configure_indexes(
+        engine: odmantic.AIOEngine,
+    ) -> typing.List[typing.Tuple[str, bool]]:
+        collection = engine.get_collection(GoonServer)
+
+        return [await create_index(collection, "serverId", unique=True)]
+
     @staticmethod
     async def server_count() -> int:
-        return await db.engine.count(GoonServer)
+        """Gets the cached server count, only counting if it hasn't been loaded yet.
+
+        Returns:
+            int: The number of setup servers
+        """
+        if _server_count is None:
+            return await GoonServer.refresh_server_count()
+
+        return _server_count
+
+    @staticmethod
+    async def refresh_server_count() -> int:
+        """Recounts the servers and updates the cached count.
+
+        Returns:
+            int: The number of setup servers
+        """
+        global _server_count
+
+        _server_count = await db.engine.count(GoonServer)
+        return _server_count
 
     @staticmethod
     async def find_server(serverId: int) -> typing.Optional["GoonServer"]:
-        return await db.engine.find_one(GoonServer, GoonServer.serverId == serverId)
+        server = _server_cache.get(serverId)
+        if server is not None:
+            return server
+
+        server = await db.engine.find_one(GoonServer, GoonServer.serverId == serverId)
+        if server is not None:
+            _server_cache.set(serverId, server)
+
+        return server
+
+    @staticmethod
+    def invalidate_server(serverId: int) -> None:
+        """Drops a server from the config cache, forcing the next lookup to the db"""
+        _server_cache.invalidate(serverId)
 
     @staticmethod
     async def find_option(serverId: int, option: ServerOption) -> typing.Optional[str]:
@@ -49,23 +155,74 @@ class GoonServer(odmantic.Model):
 
         return server.options.get(option, None)
 
+    @staticmethod
+    async def find_config(serverId: int) -> typing.Optional[ServerConfig]:
+        """Loads every option for a server at once, with ids parsed to ints.
+
+        Args:
+            serverId (int): The discord server's id
+
+        Returns:
+            typing.Optional[ServerConfig]: The config, or None if not setup
+        """
+        server = await GoonServer.find_server(serverId)
+        if server is None or server.options is None:
+            logger.error(f"Searching for non-existent server - serverId:{serverId}")
+
+            return None
+
+        return ServerConfig(serverId, server.options)
+
+    @staticmethod
+    async def forget_webhook(serverId: int, webhookId: int) -> None:
+        """Stops sending a server's notices through a webhook that's gone.
+
+        Args:
+            serverId (int): The discord server's id
+            webhookId (int): The deleted webhook's id
+        """
+        server = await GoonServer.find_server(serverId)
+        if server is None or server.options is None:
+            return
+
+        options = dict()
+        for option in (
+            ServerOption.NOTICE_WEBHOOK_ADMIN,
+            ServerOption.NOTICE_WEBHOOK_AUTH,
+        ):
+            webhook = Webhook.from_option(server.options.get(option, None))
+            if webhook is not None and webhook.id == webhookId:
+                options[option] = ""
+
+        if len(options) > 0:
+            await GoonServer.save_options(server, options)
+
     @staticmethod
     async def save_options(
         server: typing.Union[int, "GoonServer"],
         options: typing.Dict[ServerOption, str],
     ) -> "GoonServer":
+        global _server_count
+
+        created = False
         if isinstance(server, int):
             serverId = server
 
             server = await GoonServer.find_server(serverId)
             if server is None:
                 server = GoonServer(serverId=serverId)
+                created = True
 
-        if server.options is None:
-            server.options = dict()
+        # Saved as a copy, the cached instance is only replaced once it's stored
+        updated = GoonServer.parse_doc(server.doc())
+        updated.options = {**(server.options or dict()), **options}
 
-        server.options.update(options)
+        await db.engine.save(updated)
 
-        await db.engine.save(server)
+        # Write through
+        _server_cache.set(updated.serverId, updated)
 
-        return server
+        if created and _server_count is not None:
+            _server_count += 1
+
+        return updated
@@ -0,0 +1,279 @@
+import asyncio
+import odmantic
+
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.mongodb import create_index, db
+
+
+class JobKind(str, Enum):
+    GRANT_ROLE = "grant_role"
+    NOTICE = "notice"
+    DIGEST = "digest"
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    FAILED = "failed"
+
+
+# Wakes idle outbox workers in this process when a job is queued
+_queued: Optional[asyncio.Event] = None
+
+
+def _queued_event() -> asyncio.Event:
+    global _queued
+
+    # Created lazily so it binds to the running loop
+    if _queued is None:
+        _queued = asyncio.Event()
+
+    return _queued
+
+
+class OutboxJob(odmantic.Model):
+    """Discord work queued by an interaction and carried out by the outbox
+    workers, so it survives restarts and failed requests.
+
+    Jobs are claimed by pushing nextAttempt out by a lease, a job whose worker
+    died becomes due again once its lease runs out. Finished jobs are deleted,
+    jobs out of attempts are kept as failed.
+    """
+
+    kind: JobKind = odmantic.Field(..., title="What the job does")
+    guildId: int = odmantic.Field(..., title="The guild the job is for")
+
+    # Role grants
+    userId: Optional[int] = odmantic.Field(None, title="The user to grant a role")
+    roleId: Optional[int] = odmantic.Field(None, title="The role to grant")
+    noticeChannels: List[int] = odmantic.Field(
+        default_factory=list, title="Channels to notice once the role is granted"
+    )
+    digestWindow: Optional[int] = odmantic.Field(
+        None, title="Seconds the guild's notices are collected for, if at all"
+    )
+
+    # Notices, and the notice sent for a role grant
+    channelId: Optional[int] = odmantic.Field(None, title="The notice's channel")
+    content: Optional[str] = odmantic.Field(None, title="The notice's message")
+
+    # Digests, notices collected to send as one message
+    entries: List[str] = odmantic.Field(
+        default_factory=list, title="The digest's notices"
+    )
+    digestOpen: Optional[bool] = odmantic.Field(
+        None, title="Set while the digest takes notices, until it's full or claimed"
+    )
+
+    status: JobStatus = odmantic.Field(JobStatus.PENDING)
+    attempts: int = odmantic.Field(0, title="Times the job has been claimed")
+    nextAttempt: datetime = odmantic.Field(default_factory=datetime.now)
+    createdAt: datetime = odmantic.Field(default_factory=datetime.now)
+    lastError: Optional[str] = odmantic.Field(None, title="Why the last attempt failed")
+
+    @staticmethod
+    async def configure_indexes(engine: odmantic.AIOEngine) -> List[Tuple[str, bool]]:
+        collection = engine.get_collection(OutboxJob)
+
+        return [
+            await create_index(collection, [("status", 1), ("nextAttempt", 1)]),
+            # One open digest per channel, keeps add_to_digest's upsert race free
+            await create_index(
+                collection,
+                [("kind", 1), ("channelId", 1), ("digestOpen", 1)],
+                unique=True,
+                partialFilterExpression={"digestOpen": True},
+            ),
+        ]
+
+    @staticmethod
+    def grant_role(
+        guildId: int,
+        userId: int,
+        roleId: int,
+        notice: str,
+        noticeChannels: List[int],
+        digestWindow: Optional[int] = None,
+    ) -> "OutboxJob":
+        return OutboxJob(
+            kind=JobKind.GRANT_ROLE,
+            guildId=guildId,
+            userId=userId,
+            roleId=roleId,
+            content=notice,
+            noticeChannels=noticeChannels,
+            digestWindow=digestWindow,
+        )
+
+    @staticmethod
+    def notice(guildId: int, channelId: int, content: str) -> "OutboxJob":
+        return OutboxJob(
+            kind=JobKind.NOTICE, guildId=guildId, channelId=channelId, content=content
+        )
+
+    @staticmethod
+    async def enqueue(*jobs: "OutboxJob") -> None:
+        """Stores new jobs in a single round trip and wakes the workers"""
+        if len(jobs) == 0:
+            return
+
+        collection = db.engine.get_collection(OutboxJob)
+        await collection.insert_many([job.doc() for job in jobs])
+
+        _queued_event().set()
+
+    @staticmethod
+    async def add_to_digest(
+        guildId: int, channelId: int, content: str, window: int, max_entries: int
+    ) -> None:
+        """Adds a notice to the channel's open digest, starting one that's sent in
+        window seconds if there isn't one. A full digest is sent straight away.
+
+        Digests are closed once they're full or claimed, so a notice is never
+        added to a digest that's being sent.
+
+        Args:
+            guildId (int): The guild the notice is for
+            channelId (int): The notice's channel
+            content (str): The notice's message
+            window (int): Seconds a new digest collects notices for
+            max_entries (int): Notices a digest holds before it's sent
+        """
+        now = datetime.now()
+
+        digest = OutboxJob(
+            kind=JobKind.DIGEST,
+            guildId=guildId,
+            channelId=channelId,
+            nextAttempt=now + timedelta(seconds=window),
+            digestOpen=True,
+        ).doc()
+        del digest["entries"]
+
+        open_digest = {
+            "kind": JobKind.DIGEST.value,
+            "channelId": channelId,
+            "digestOpen": True,
+        }
+        push = {"$push": {"entries": content}}
+
+        collection = db.engine.get_collection(OutboxJob)
+        try:
+            raw = await collection.find_one_and_update(
+                {**open_digest, f"entries.{max_entries - 1}": {"$exists": False}},
+                {"$setOnInsert": digest, **push},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Lost a concurrent upsert, or the open digest just filled up and
+            # is about to be closed. Either way it exists, add to it
+            raw = await collection.find_one_and_update(
+                open_digest, push, return_document=ReturnDocument.AFTER
+            )
+            if raw is None:
+                # Closed in the meantime, start a new one
+                raw = await collection.find_one_and_update(
+                    open_digest,
+                    {"$setOnInsert": digest, **push},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+
+        if len(raw["entries"]) < max_entries:
+            return
+
+        await collection.update_one(
+            {"_id": raw["_id"], "digestOpen": True},
+            {"$set": {"nextAttempt": now, "digestOpen": None}},
+        )
+        _queued_event().set()
+
+    @staticmethod
+    async def wait_for_jobs(timeout: float) -> None:
+        """Waits until a job is queued in this process, or the timeout passes.
+        Jobs queued by other instances are only seen on the next claim.
+        """
+        event = _queued_event()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        event.clear()
+
+    @staticmethod
+    async def claim(lease: float) -> Optional["OutboxJob"]:
+        """Claims the most overdue job.
+
+        Args:
+            lease (float): Seconds the job is held for before it's due again
+
+        Returns:
+            Optional[OutboxJob]: The claimed job, or None if nothing is due
+        """
+        now = datetime.now()
+
+        collection = db.engine.get_collection(OutboxJob)
+        raw = await collection.find_one_and_update(
+            {"status": JobStatus.PENDING.value, "nextAttempt": {"$lte": now}},
+            {
+                "$set": {
+                    "nextAttempt": now + timedelta(seconds=lease),
+                    "digestOpen": None,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("nextAttempt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return None if raw is None else OutboxJob.parse_doc(raw)
+
+    @staticmethod
+    async def complete(job: "OutboxJob") -> None:
+        collection = db.engine.get_collection(OutboxJob)
+        await collection.delete_one({"_id": job.id})
+
+    @staticmethod
+    async def retry(
+        job: "OutboxJob", delay: float, error: str, counted: bool = True
+    ) -> None:
+        """Releases a claimed job to be tried again.
+
+        Args:
+            job (OutboxJob): The claimed job
+            delay (float): Seconds until it's due again
+            error (str): Why the attempt failed
+            counted (bool, optional): False gives the attempt back, for failures
+                that never reached discord. Defaults to True.
+        """
+        job.nextAttempt = datetime.now() + timedelta(seconds=delay)
+        job.lastError = error
+
+        update: Dict[str, Any] = {
+            "$set": {"nextAttempt": job.nextAttempt, "lastError": error}
+        }
+        if not counted:
+            job.attempts -= 1
+            update["$inc"] = {"attempts": -1}
+
+        collection = db.engine.get_collection(OutboxJob)
+        await collection.update_one({"_id": job.id}, update)
+
+    @staticmethod
+    async def fail(job: "OutboxJob", error: str) -> None:
+        """Gives up on a job, it's kept for an admin to look at"""
+        job.status = JobStatus.FAILED
+        job.lastError = error
+
+        collection = db.engine.get_collection(OutboxJob)
+        await collection.update_one(
+            {"_id": job.id},
+            {"$set": {"status": JobStatus.FAILED.value, "lastError": error}},
+        )
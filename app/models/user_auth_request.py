@@ -1,5 +1,15 @@
 import odmantic
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import bot_settings
+from app.mongodb import create_index, db
+
+# Don't hand out challenges that are about to expire on awful-auth
+REUSE_MARGIN_SECS = 30
 
 
 class UserAuthRequest(odmantic.Model):
@@ -21,9 +31,172 @@ class UserAuthRequest(odmantic.Model):
 
     lastUpdated: datetime = odmantic.Field(default_factory=datetime.now)
 
-    # def configure_index(engine: odmantic.AIOEngine) -> None:
-    #    collection = engine.get_collection(UserAuthRequest)
-    #    collection.create_index(
-    #        "lastUpdated",
-    #        expireAfterSeconds=(bot_settings.auth_attempt_lifespan * 60),
-    #    )
+    # Used by the background verification poller
+    guildId: Optional[int] = odmantic.Field(
+        None, title="The guild the auth was started in"
+    )
+    verified: bool = odmantic.Field(False, title="Verified and granted by the poller")
+    checks: int = odmantic.Field(0, title="Times checked against awful-auth")
+    nextCheck: datetime = odmantic.Field(default_factory=datetime.now)
+    claimed: bool = odmantic.Field(False, title="Being checked by a poller")
+
+    @staticmethod
+    async def configure_indexes(engine: odmantic.AIOEngine) -> List[Tuple[str, bool]]:
+        """Creates the lookup indexes and the ttl index expiring stale attempts"""
+        collection = engine.get_collection(UserAuthRequest)
+
+        return [
+            await create_index(
+                collection,
+                "lastUpdated",
+                expireAfterSeconds=(bot_settings.auth_attempt_lifespan * 60),
+            ),
+            # One attempt per user, keeps replace_for_user's upsert race free
+            await create_index(collection, "userDiscordId", unique=True),
+            await create_index(collection, "challengeHash"),
+            await create_index(collection, [("verified", 1), ("nextCheck", 1)]),
+        ]
+
+    @staticmethod
+    async def find_active(
+        discordId: int, saName: str, guildId: int
+    ) -> Optional["UserAuthRequest"]:
+        """Finds a user's unverified auth attempt for a name and guild that's
+        still fresh enough for its challenge hash to be valid upstream.
+        """
+        # Our attempt is saved just after awful-auth creates the challenge
+        lifespan = timedelta(minutes=bot_settings.auth_attempt_lifespan)
+        oldest = datetime.now() - lifespan + timedelta(seconds=REUSE_MARGIN_SECS)
+
+        return await db.engine.find_one(
+            UserAuthRequest,
+            UserAuthRequest.userDiscordId == discordId,
+            UserAuthRequest.saName == saName,
+            UserAuthRequest.guildId == guildId,
+            odmantic.query.eq(UserAuthRequest.verified, False),
+            UserAuthRequest.lastUpdated > oldest,
+        )
+
+    @staticmethod
+    async def claim_pending(lease: float) -> Optional["UserAuthRequest"]:
+        """Claims the most overdue unverified auth attempt for a check.
+
+        The claim pushes nextCheck out by the lease, so no other poller picks
+        it up, and a poller that dies mid check only holds it that long.
+
+        Args:
+            lease (float): Seconds the attempt is held for
+
+        Returns:
+            Optional[UserAuthRequest]: The claimed attempt, or None if none are due
+        """
+        now = datetime.now()
+
+        collection = db.engine.get_collection(UserAuthRequest)
+        raw = await collection.find_one_and_update(
+            {"verified": False, "nextCheck": {"$lte": now}},
+            {
+                "$set": {
+                    "nextCheck": now + timedelta(seconds=lease),
+                    "claimed": True,
+                }
+            },
+            sort=[("nextCheck", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return None if raw is None else UserAuthRequest.parse_doc(raw)
+
+    @staticmethod
+    async def schedule_check(
+        request: "UserAuthRequest", delay: float, checks: Optional[int] = None
+    ) -> None:
+        """Pushes back the next poller check of an auth attempt, releasing
+        its claim.
+
+        Args:
+            request (UserAuthRequest): The auth attempt
+            delay (float): Seconds until the next check
+            checks (Optional[int]): Overrides the check count, 0 resets backoff
+        """
+        request.checks = request.checks + 1 if checks is None else checks
+        request.nextCheck = datetime.now() + timedelta(seconds=delay)
+        request.claimed = False
+
+        collection = db.engine.get_collection(UserAuthRequest)
+        await collection.update_one(
+            {"_id": request.id},
+            {
+                "$set": {
+                    "checks": request.checks,
+                    "nextCheck": request.nextCheck,
+                    "claimed": False,
+                }
+            },
+        )
+
+    @staticmethod
+    async def expedite_check(request: "UserAuthRequest") -> None:
+        """Makes an auth attempt due for a check straight away, with its backoff
+        reset. Attempts a poller is checking right now are left alone.
+        """
+        collection = db.engine.get_collection(UserAuthRequest)
+        await collection.update_one(
+            {"_id": request.id, "claimed": False},
+            {"$set": {"checks": 0, "nextCheck": datetime.now()}},
+        )
+
+    @staticmethod
+    async def mark_verified(request: "UserAuthRequest") -> None:
+        request.verified = True
+        request.claimed = False
+
+        collection = db.engine.get_collection(UserAuthRequest)
+        await collection.update_one(
+            {"_id": request.id}, {"$set": {"verified": True, "claimed": False}}
+        )
+
+    @staticmethod
+    async def delete_for_user(discordId: int) -> int:
+        """Deletes every auth attempt for a discord id in a single round trip.
+
+        Returns:
+            int: The number of attempts deleted
+        """
+        collection = db.engine.get_collection(UserAuthRequest)
+        result = await collection.delete_many({"userDiscordId": discordId})
+
+        return result.deleted_count
+
+    @staticmethod
+    async def replace_for_user(request: "UserAuthRequest") -> "UserAuthRequest":
+        """Atomically replaces the discord id's auth attempt with a new one,
+        inserting it if the user has no attempt yet.
+
+        Args:
+            request (UserAuthRequest): The new auth attempt
+
+        Returns:
+            UserAuthRequest: The stored auth attempt
+        """
+        document = request.doc()
+        # The existing document keeps its id
+        document.pop("_id")
+
+        collection = db.engine.get_collection(UserAuthRequest)
+        try:
+            raw = await collection.find_one_and_replace(
+                {"userDiscordId": request.userDiscordId},
+                document,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Lost a concurrent upsert, the document exists now so replace it
+            raw = await collection.find_one_and_replace(
+                {"userDiscordId": request.userDiscordId},
+                document,
+                return_document=ReturnDocument.AFTER,
+            )
+
+        return UserAuthRequest.parse_doc(raw)
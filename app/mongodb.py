@@ -1,10 +1,32 @@
+from typing import Any, Dict, List, Tuple, Union
+
 from loguru import logger
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from odmantic import AIOEngine
+from pymongo import monitoring
+from pymongo.errors import OperationFailure, PyMongoError
 
+from app import metrics
 from app.config import db_settings
 
 
+class CommandMetrics(monitoring.CommandListener):
+    """Records the latency of every mongo command"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        metrics.mongo_command_seconds.observe(
+            event.duration_micros / 1e6, command=event.command_name, status="ok"
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        metrics.mongo_command_seconds.observe(
+            event.duration_micros / 1e6, command=event.command_name, status="error"
+        )
+
+
 class Database:
     client: AsyncIOMotorClient = None
     engine: AIOEngine = None
@@ -28,15 +50,142 @@ async def connect_to_mongo() -> None:
         db_settings.connection_string(),
         maxPoolSize=db_settings.min_connections,
         minPoolSize=db_settings.max_connections,
+        event_listeners=[CommandMetrics()],
     )
     db.engine = AIOEngine(db.client, db_settings.database_name)
 
     logger.info("Database connected!")
 
+    # Imported here, the models depend on this module
+    from app.models.goon_server import GoonServer
+    from app.models.outbox_job import OutboxJob
+    from app.models.user_auth_request import UserAuthRequest
+
     # Configure indexes
-    # UserAuthRequest.configure_index(db.engine)
+    results = [
+        *await UserAuthRequest.configure_indexes(db.engine),
+        *await GoonServer.configure_indexes(db.engine),
+        *await OutboxJob.configure_indexes(db.engine),
+    ]
+
+    failed = [name for name, ok in results if not ok]
+    if len(failed) > 0:
+        logger.error(
+            f"Database indexes configured with errors - {len(results) - len(failed)}"
+            f"/{len(results)} ok, failed: {', '.join(failed)}"
+        )
+    else:
+        logger.info(f"Database indexes configured - {len(results)}/{len(results)} ok")
+
+
+async def create_index(
+    collection: AsyncIOMotorCollection,
+    keys: Union[str, List[Tuple[str, int]]],
+    **kwargs: Any,
+) -> Tuple[str, bool]:
+    """Creates an index, updating the ttl of an existing ttl index if it changed.
+    Any other existing index on the same keys with different options, such as
+    one that wasn't unique yet, is replaced.
+
+    Args:
+        collection (AsyncIOMotorCollection): The collection to index
+        keys (Union[str, List[Tuple[str, int]]]): The index keys
+
+    Returns:
+        Tuple[str, bool]: The index name and whether it's in place
+    """
+    if isinstance(keys, str):
+        keys = [(keys, 1)]
+
+    name = f"{collection.name}." + "_".join(
+        f"{key}_{direction}" for key, direction in keys
+    )
 
-    logger.info("Database indexes configured")
+    try:
+        await collection.create_index(keys, **kwargs)
+    except OperationFailure as e:
+        # IndexOptionsConflict and IndexKeySpecsConflict
+        if e.code not in (85, 86):
+            logger.error(f"Failed to create index {name} - {e}")
+            return name, False
+
+        try:
+            if "expireAfterSeconds" in kwargs:
+                index: Dict[str, Any] = {
+                    "keyPattern": dict(keys),
+                    "expireAfterSeconds": kwargs["expireAfterSeconds"],
+                }
+                await collection.database.command(
+                    "collMod", collection.name, index=index
+                )
+            else:
+                await _replace_index(collection, keys, **kwargs)
+        except PyMongoError as e:
+            logger.error(f"Failed to update index {name} - {e}")
+            return name, False
+    except PyMongoError as e:
+        logger.error(f"Failed to create index {name} - {e}")
+        return name, False
+
+    logger.debug(f"Index configured - {name} {kwargs}")
+    return name, True
+
+
+async def _replace_index(
+    collection: AsyncIOMotorCollection, keys: List[Tuple[str, int]], **kwargs: Any
+) -> None:
+    """Drops the existing index on keys, then creates it with the new options.
+    The existing index is kept if the documents would break a new unique one,
+    and put back if the new one can't be created.
+    """
+    if kwargs.get("unique", False) and await _has_duplicates(
+        collection, keys, kwargs.get("partialFilterExpression", dict())
+    ):
+        raise OperationFailure(
+            f"Duplicate keys in {collection.name}, existing index kept", code=11000
+        )
+
+    indexes: Dict[str, Dict[str, Any]] = await collection.index_information()
+    replaced = {
+        name: index
+        for name, index in indexes.items()
+        if [tuple(key) for key in index["key"]] == keys
+    }
+
+    for name in replaced:
+        logger.warning(f"Replacing index {collection.name}.{name} - {kwargs}")
+        await collection.drop_index(name)
+
+    try:
+        await collection.create_index(keys, **kwargs)
+    except PyMongoError:
+        for name, index in replaced.items():
+            options = {k: v for k, v in index.items() if k not in ("v", "key", "ns")}
+            await collection.create_index(index["key"], name=name, **options)
+
+        raise
+
+
+async def _has_duplicates(
+    collection: AsyncIOMotorCollection,
+    keys: List[Tuple[str, int]],
+    partial: Dict[str, Any],
+) -> bool:
+    """Whether any documents share keys, which a unique index would reject"""
+    pipeline = [
+        {"$match": partial},
+        {
+            "$group": {
+                "_id": {key.replace(".", "_"): f"${key}" for key, _ in keys},
+                "count": {"$sum": 1},
+            }
+        },
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 1},
+    ]
+
+    duplicates = await collection.aggregate(pipeline).to_list(length=1)
+    return len(duplicates) > 0
 
 
 async def close_mongo_connection() -> None:
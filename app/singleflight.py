@@ -0,0 +1,56 @@
+import asyncio
+
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesces identical concurrent calls into a single in-flight call.
+
+    Callers asking for a key that's already being fetched wait on the same
+    future instead of starting another upstream request. Results aren't kept
+    once the call finishes, pair this with a cache for that.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared = 0
+
+        self.__in_flight: Dict[K, asyncio.Future] = dict()
+
+    def __len__(self) -> int:
+        return len(self.__in_flight)
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        """Runs fn, or joins the in-flight call for the key if there is one.
+
+        Args:
+            key (K): Identifies identical calls
+            fn (Callable[[], Awaitable[V]]): Starts the call
+
+        Returns:
+            V: The call's result, exceptions are raised to every caller
+        """
+        future = self.__in_flight.get(key, None)
+
+        if future is None:
+            self.calls += 1
+
+            future = asyncio.ensure_future(fn())
+            self.__in_flight[key] = future
+            future.add_done_callback(lambda f: self.__done(key, f))
+        else:
+            self.shared += 1
+
+        # Shielded so one caller giving up doesn't cancel it for the rest
+        return await asyncio.shield(future)
+
+    def __done(self, key: K, future: asyncio.Future) -> None:
+        if self.__in_flight.get(key, None) is future:
+            del self.__in_flight[key]
+
+        # Mark the exception retrieved in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
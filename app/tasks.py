@@ -0,0 +1,58 @@
+import asyncio
+
+from typing import Awaitable, Set
+
+from loguru import logger
+
+
+class BackgroundTasks:
+    """Runs fire-and-forget coroutines off the interaction response path.
+
+    Holds a reference to every running task so they aren't garbage collected
+    mid-flight, logs anything that escapes them, and drains them on shutdown.
+    """
+
+    def __init__(self) -> None:
+        self.__tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self.__tasks)
+
+    def spawn(self, coro: Awaitable, name: str = None) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        if name is not None:
+            task.set_name(name)
+
+        self.__tasks.add(task)
+        task.add_done_callback(self.__on_done)
+
+        return task
+
+    def __on_done(self, task: asyncio.Task) -> None:
+        self.__tasks.discard(task)
+
+        if task.cancelled():
+            return
+
+        exception = task.exception()
+        if exception is not None:
+            logger.opt(exception=exception).error(
+                f"Background task failed - task: {task.get_name()}"
+            )
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Waits for running tasks to finish, cancelling any left after timeout"""
+        if len(self.__tasks) == 0:
+            return
+
+        logger.info(f"Waiting on {len(self.__tasks)} background tasks...")
+
+        _, pending = await asyncio.wait(set(self.__tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        if len(pending) > 0:
+            logger.warning(f"Cancelled {len(pending)} background tasks")
+
+
+background_tasks = BackgroundTasks()
@@ -0,0 +1,261 @@
+import secrets
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from httpx import AsyncClient
+from httpcore import AsyncHTTPTransport
+from loguru import logger
+
+from app.config import tracing_settings
+from app.tasks import background_tasks
+
+
+class Span:
+    """A timed stage of a trace"""
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes if attributes is not None else dict()
+
+        self.start_ns = time.time_ns()
+        self.duration: Optional[float] = None
+        self.error = False
+
+        self.__start = time.perf_counter()
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self.__start
+
+    @property
+    def end_ns(self) -> int:
+        return self.start_ns + int((self.duration or 0.0) * 1e9)
+
+
+class Trace:
+    """Every span recorded while handling one interaction.
+
+    A trace stays open while anything holds it, deferred interactions hold it
+    until their background work finishes.
+    """
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = secrets.token_hex(16)
+        self.finished = False
+
+        self.root = Span(self, name, attributes=attributes)
+        self.spans: List[Span] = [self.root]
+
+        self.__holds = 1
+
+    @property
+    def name(self) -> str:
+        return self.root.name
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.root.duration
+
+    def hold(self) -> None:
+        """Keeps the trace open for work that outlives the current stage"""
+        self.__holds += 1
+
+    def release(self) -> None:
+        self.__holds -= 1
+        if self.__holds > 0 or self.finished:
+            return
+
+        self.finished = True
+        self.root.end()
+
+        _on_finish(self)
+
+    def stages(self) -> Dict[str, float]:
+        """Total time per stage name, excluding the root"""
+        stages: Dict[str, float] = dict()
+        for span in self.spans[1:]:
+            if span.duration is not None:
+                stages[span.name] = stages.get(span.name, 0.0) + span.duration
+
+        return stages
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Starts a trace, spans started within the block and any tasks it spawns
+    belong to it.
+
+    Args:
+        name (str): The trace's name, usually the interaction
+        **attributes (Any): Extra attributes for the root span
+    """
+    new_trace = Trace(name, attributes)
+
+    trace_token = _current_trace.set(new_trace)
+    span_token = _current_span.set(new_trace.root)
+    try:
+        yield new_trace
+    except BaseException:
+        new_trace.root.error = True
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+        new_trace.release()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Times a stage of the current trace, does nothing outside of one.
+
+    Args:
+        name (str): The stage's name
+        **attributes (Any): Extra attributes for the span
+    """
+    current = _current_trace.get()
+    if current is None or current.finished:
+        yield None
+        return
+
+    new_span = Span(current, name, _current_span.get(), attributes)
+    current.spans.append(new_span)
+
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException:
+        new_span.error = True
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end()
+
+
+class TraceExporter:
+    """Posts finished traces to a collector as OTLP/JSON"""
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str = "discord-auth",
+        transport: Optional[AsyncHTTPTransport] = None,
+    ) -> None:
+        self.service_name = service_name
+        self.client = AsyncClient(base_url=endpoint, transport=transport)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def export(self, trace: Trace) -> bool:
+        try:
+            response = await self.client.post("/v1/traces", json=self.encode(trace))
+        except Exception as e:
+            logger.warning(f"Failed to export trace - id: {trace.trace_id}, {e}")
+            return False
+
+        return response.status_code == 200
+
+    def encode(self, trace: Trace) -> Dict[str, Any]:
+        """Encodes a trace as an OTLP/JSON ExportTraceServiceRequest"""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _encode_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.tracing"},
+                            "spans": [_encode_span(s) for s in trace.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _encode_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+
+        encoded.append({"key": key, "value": encoded_value})
+
+    return encoded
+
+
+def _encode_span(span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _encode_attributes(span.attributes),
+        # STATUS_CODE_ERROR or STATUS_CODE_UNSET
+        "status": {"code": 2 if span.error else 0},
+    }
+    if span.parent_id is not None:
+        encoded["parentSpanId"] = span.parent_id
+
+    return encoded
+
+
+_exporter: Optional[TraceExporter] = None
+
+
+def set_exporter(exporter: Optional[TraceExporter]) -> None:
+    global _exporter
+    _exporter = exporter
+
+
+def _on_finish(finished: Trace) -> None:
+    if finished.duration >= tracing_settings.slow_threshold:
+        stages = ", ".join(
+            f"{name}: {duration:.3f}s" for name, duration in finished.stages().items()
+        )
+        logger.bind(
+            trace_id=finished.trace_id,
+            trace_name=finished.name,
+            duration=finished.duration,
+            stages=finished.stages(),
+        ).warning(
+            f"Slow request - name: {finished.name}, "
+            f"duration: {finished.duration:.3f}s, trace: {finished.trace_id}, "
+            f"stages: [{stages}]"
+        )
+
+    if _exporter is not None:
+        background_tasks.spawn(
+            _exporter.export(finished), name=f"trace-export-{finished.trace_id}"
+        )
@@ -0,0 +1,3 @@
+from .outbox_worker import OutboxWorker  # noqa
+from .server_count_refresher import ServerCountRefresher  # noqa
+from .verification_poller import VerificationPoller  # noqa
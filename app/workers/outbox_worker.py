@@ -0,0 +1,247 @@
+import asyncio
+
+from typing import List, Optional
+
+from httpx import HTTPError
+from loguru import logger
+
+from app import metrics
+from app.circuit import CircuitOpenError
+from app.clients.discord_api.client import (
+    RatelimitExceeded,
+    RequestRejected,
+    UnknownWebhook,
+)
+from app.clients.discord_api.models.channel import CreateMessage
+from app.discord import discord
+from app.models.goon_server import GoonServer
+from app.models.outbox_job import JobKind, OutboxJob
+
+
+class OutboxWorker:
+    """Drains the outbox, carrying out the discord work interactions queued.
+
+    Each of the `concurrency` workers claims one job at a time. Rate limits and
+    open circuits put a job off until discord is ready for it again, without
+    using up an attempt. Other failures back off exponentially, and a job is
+    given up on after `max_attempts`. Requests discord rejects outright, such as
+    a role grant without permission, are given up on straight away.
+
+    Notices go through the channel's webhook when the guild has setup one.
+    Guilds using digests have their notices collected per channel, and sent as
+    one message once the guild's window passes or `digest_size` are collected.
+
+    Jobs are delivered at least once, a job whose worker stops mid-way is tried
+    again once its lease runs out.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        max_attempts: int = 8,
+        lease: float = 60.0,
+        max_backoff: float = 300.0,
+        digest_size: int = 20,
+    ) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.max_backoff = max_backoff
+        self.digest_size = digest_size
+
+        self.__tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        logger.info(
+            "Starting outbox worker - "
+            f"concurrency: {self.concurrency}, poll interval: {self.poll_interval}s"
+        )
+        self.__tasks = [
+            asyncio.ensure_future(self.__run()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        if len(self.__tasks) == 0:
+            return
+
+        logger.info("Stopping outbox worker...")
+
+        for task in self.__tasks:
+            task.cancel()
+
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = []
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                job = await OutboxJob.claim(self.lease)
+            except Exception:
+                logger.exception("Outbox claim failed")
+                job = None
+
+            if job is None:
+                await OutboxJob.wait_for_jobs(self.poll_interval)
+                continue
+
+            await self.process(job)
+
+    def __backoff(self, job: OutboxJob) -> float:
+        return min(self.poll_interval * (2**job.attempts), self.max_backoff)
+
+    async def process(self, job: OutboxJob) -> bool:
+        """Carries out a claimed job, then completes or reschedules it.
+
+        Args:
+            job (OutboxJob): The claimed job
+
+        Returns:
+            bool: True if the job is done
+        """
+        try:
+            if job.kind == JobKind.GRANT_ROLE:
+                ok = await self.__grant_role(job)
+            elif job.kind == JobKind.DIGEST:
+                ok = await self.__digest(job)
+            else:
+                ok = await self.__notice(job)
+
+            error = None if ok else "Request rejected by discord"
+        except (RatelimitExceeded, CircuitOpenError) as e:
+            # Discord hasn't seen the request, it doesn't cost an attempt
+            delay = e.retry_after if e.retry_after is not None else self.poll_interval
+            await OutboxJob.retry(job, delay, type(e).__name__, counted=False)
+
+            metrics.outbox_jobs.inc(kind=job.kind.value, result="deferred")
+            return False
+        except RequestRejected as e:
+            # Retrying won't help, the guild's setup needs fixing
+            await self.__reject(job, e)
+            return False
+        except HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+        except Exception as e:
+            logger.exception(f"Outbox job raised - id: {job.id}, kind: {job.kind}")
+            error = f"{type(e).__name__}: {e}"
+
+        if error is None:
+            await OutboxJob.complete(job)
+
+            metrics.outbox_jobs.inc(kind=job.kind.value, result="ok")
+            return True
+
+        if job.attempts >= self.max_attempts:
+            logger.error(
+                f"Outbox job failed - id: {job.id}, kind: {job.kind.value}, "
+                f"guild: {job.guildId}, attempts: {job.attempts}, error: {error}"
+            )
+            await OutboxJob.fail(job, error)
+
+            metrics.outbox_jobs.inc(kind=job.kind.value, result="failed")
+            return False
+
+        logger.warning(
+            f"Outbox job will be retried - id: {job.id}, kind: {job.kind.value}, "
+            f"attempts: {job.attempts}, error: {error}"
+        )
+        await OutboxJob.retry(job, self.__backoff(job), error)
+
+        metrics.outbox_jobs.inc(kind=job.kind.value, result="retry")
+        return False
+
+    async def __reject(self, job: OutboxJob, error: RequestRejected) -> None:
+        logger.error(
+            f"Outbox job rejected by discord - id: {job.id}, kind: {job.kind.value}, "
+            f"guild: {job.guildId}, status: {error.status_code}"
+        )
+        await OutboxJob.fail(job, f"{type(error).__name__}: {error}")
+
+        metrics.outbox_jobs.inc(kind=job.kind.value, result="failed")
+
+        # The user was told they're verified, let the guild's admins know
+        if job.kind == JobKind.GRANT_ROLE and len(job.noticeChannels) > 0:
+            await OutboxJob.enqueue(
+                OutboxJob.notice(
+                    job.guildId,
+                    job.noticeChannels[0],
+                    f"Couldn't give <@{job.userId}> the <@&{job.roleId}> role, "
+                    f"discord answered {error.status_code}. Please check the bot "
+                    "can manage roles and its role is above the auth role.",
+                )
+            )
+
+    async def __grant_role(self, job: OutboxJob) -> bool:
+        if not await discord.client.add_guild_member_role(
+            job.guildId, job.userId, job.roleId
+        ):
+            return False
+
+        logger.debug(
+            f"Granted goon status - user: {job.userId}, "
+            f"server: {job.guildId}, role: {job.roleId}"
+        )
+
+        # Each notice is retried on its own, a failed one doesn't regrant the role
+        if job.digestWindow is None:
+            await OutboxJob.enqueue(
+                *[
+                    OutboxJob.notice(job.guildId, channel, job.content)
+                    for channel in job.noticeChannels
+                ]
+            )
+        else:
+            for channel in job.noticeChannels:
+                await OutboxJob.add_to_digest(
+                    job.guildId,
+                    channel,
+                    job.content,
+                    job.digestWindow,
+                    self.digest_size,
+                )
+
+        return True
+
+    async def __notice(self, job: OutboxJob) -> bool:
+        return await self.__send_notice(job, CreateMessage(content=job.content))
+
+    async def __digest(self, job: OutboxJob) -> bool:
+        messages = CreateMessage.digest(
+            [CreateMessage(content=entry) for entry in job.entries]
+        )
+
+        # A retried digest may post its first messages again, same as a notice
+        for message in messages:
+            if not await self.__send_notice(job, message):
+                return False
+
+        return True
+
+    async def __send_notice(self, job: OutboxJob, message: CreateMessage) -> bool:
+        """Sends a notice through the channel's webhook if it has one, keeping
+        notices off the bot's rate limits, otherwise as the bot.
+        """
+        config = await GoonServer.find_config(job.guildId)
+        webhook = None if config is None else config.notice_webhooks.get(job.channelId)
+
+        if webhook is not None:
+            try:
+                return await discord.webhooks.execute_webhook(
+                    webhook.id, webhook.token, message
+                )
+            except UnknownWebhook:
+                logger.warning(
+                    "Notice webhook is gone, sending as the bot - "
+                    f"guild: {job.guildId}, channel: {job.channelId}, "
+                    f"webhook: {webhook.id}"
+                )
+
+                # Later notices go straight to the bot
+                await GoonServer.forget_webhook(job.guildId, webhook.id)
+
+        message_id: Optional[int] = await discord.client.create_message(
+            job.channelId, message
+        )
+
+        return message_id is not None
@@ -0,0 +1,47 @@
+import asyncio
+
+from typing import Optional
+
+from loguru import logger
+
+from app.models.goon_server import GoonServer
+
+
+class ServerCountRefresher:
+    """Keeps the cached network wide server count fresh, so /about never has to
+    count the servers collection itself.
+
+    New servers bump the count as they're setup, the refresh only corrects drift
+    from removals and other instances.
+    """
+
+    def __init__(self, interval: float = 300.0) -> None:
+        self.interval = interval
+
+        self.__task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        logger.info(f"Starting server count refresher - interval: {self.interval}s")
+        self.__task = asyncio.ensure_future(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+
+        self.__task = None
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                count = await GoonServer.refresh_server_count()
+                logger.debug(f"Refreshed server count - count: {count}")
+            except Exception:
+                logger.exception("Server count refresh failed")
+
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,147 @@
+import asyncio
+
+from typing import List, Optional
+
+from httpx import HTTPError
+from loguru import logger
+
+from app.circuit import CircuitOpenError
+from app.commands.handlers.auth_handler import AuthHandler
+from app.models.user_auth_request import UserAuthRequest
+
+
+class VerificationPoller:
+    """Checks pending auth attempts against awful-auth in the background and
+    completes the grant as soon as the hash shows up in a profile.
+
+    Each attempt backs off exponentially between checks, and the poll interval
+    itself backs off while awful-auth is failing. Attempts are claimed one at a
+    time for `lease` seconds, so every worker and replica can poll at once
+    without checking the same attempt twice.
+    """
+
+    def __init__(
+        self,
+        auth_handler: AuthHandler,
+        interval: float = 2.0,
+        concurrency: int = 5,
+        batch_size: int = 50,
+        max_backoff: float = 60.0,
+        lease: float = 60.0,
+    ) -> None:
+        self.auth_handler = auth_handler
+        self.interval = interval
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.lease = lease
+
+        self.delay = interval
+        self.__task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        logger.info(
+            "Starting verification poller - "
+            f"interval: {self.interval}s, concurrency: {self.concurrency}"
+        )
+        self.__task = asyncio.ensure_future(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+
+        logger.info("Stopping verification poller...")
+
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+
+        self.__task = None
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                healthy = await self.poll()
+            except Exception:
+                logger.exception("Verification poll failed")
+                healthy = False
+
+            # Ease off awful-auth while it's struggling
+            if healthy:
+                self.delay = self.interval
+            else:
+                self.delay = min(self.delay * 2, self.max_backoff)
+
+            await asyncio.sleep(self.delay)
+
+    async def poll(self) -> bool:
+        """Claims and checks up to a batch of the auth attempts that are due,
+        `concurrency` at a time.
+
+        Returns:
+            bool: False if awful-auth had any failures
+        """
+        claims = 0
+        results: List[bool] = []
+
+        async def work() -> None:
+            nonlocal claims
+
+            while claims < self.batch_size:
+                claims += 1
+
+                request = await UserAuthRequest.claim_pending(self.lease)
+                if request is None:
+                    return
+
+                results.append(await self.__check(request))
+
+        await asyncio.gather(*[work() for _ in range(self.concurrency)])
+
+        return all(results)
+
+    def __backoff(self, request: UserAuthRequest) -> float:
+        return min(self.interval * (2**request.checks), self.max_backoff)
+
+    async def __check(self, request: UserAuthRequest) -> bool:
+        if request.guildId is None:
+            await UserAuthRequest.schedule_check(request, self.max_backoff)
+            return True
+
+        try:
+            status = await self.auth_handler.auth_api.get_verification_update(
+                request.saName
+            )
+        except (TypeError, ValueError):
+            # Unknown hash or username, nothing will change until the next /auth
+            await UserAuthRequest.schedule_check(request, self.max_backoff)
+            return True
+        except (HTTPError, CircuitOpenError) as e:
+            logger.warning(f"Verification poll request failed - {e}")
+            status = None
+
+        if status is None:
+            await UserAuthRequest.schedule_check(request, self.__backoff(request))
+            return False
+
+        if not status.validated:
+            await UserAuthRequest.schedule_check(request, self.__backoff(request))
+            return True
+
+        error = await self.auth_handler.complete_verification(
+            request, status, request.guildId
+        )
+        if error is not None:
+            await UserAuthRequest.schedule_check(request, self.__backoff(request))
+            return True
+
+        await UserAuthRequest.mark_verified(request)
+
+        logger.debug(
+            "Auto verified user - "
+            f"guild: {request.guildId}, discordId: {request.userDiscordId}, "
+            f"saName: {request.saName}"
+        )
+        return True
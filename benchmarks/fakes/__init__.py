@@ -0,0 +1,11 @@
+from .mongo import MemoryCollection, MemoryEngine  # noqa
+from .upstreams import (  # noqa
+    add_latency,
+    create_fake_awful_auth,
+    create_fake_collector,
+    create_fake_discord,
+    create_fake_flaky,
+    create_fake_goon_files,
+    create_fake_interactions,
+    create_fake_unavailable,
+)
@@ -0,0 +1,321 @@
+"""An in-memory stand-in for the parts of motor and odmantic the bot uses"""
+import asyncio
+import operator
+
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from odmantic import AIOEngine
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+
+_operators: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+    "$exists": lambda value, operand: (value is not None) == operand,
+}
+
+
+def _get(document: Dict[str, Any], key: str) -> Any:
+    """Looks up a dotted path, list items by index"""
+    value: Any = document
+    for part in key.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, None)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+
+    return value
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(document, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(document, q) for q in condition):
+                return False
+        elif isinstance(condition, dict) and all(k[0] == "$" for k in condition):
+            value = _get(document, key)
+            if not all(_operators[op](value, o) for op, o in condition.items()):
+                return False
+        elif _get(document, key) != condition:
+            return False
+
+    return True
+
+
+def _update(document: Dict[str, Any], update: Dict[str, Any]) -> None:
+    document.update(update.get("$set", dict()))
+    for key, amount in update.get("$inc", dict()).items():
+        document[key] = document.get(key, 0) + amount
+    for key, value in update.get("$push", dict()).items():
+        document[key] = [*document.get(key, []), value]
+
+
+class MemoryCollection:
+    """The handful of motor collection methods the models use.
+
+    Unique indexes are enforced for inserted and replaced documents.
+    """
+
+    def __init__(self, name: str, engine: "MemoryEngine") -> None:
+        self.name = name
+        self.engine = engine
+        self.documents: Dict[ObjectId, Dict[str, Any]] = dict()
+        self.indexes: Dict[str, Dict[str, Any]] = dict()
+
+    def matching(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [d for d in self.documents.values() if _matches(d, query)]
+
+    async def create_index(self, keys: Any, **kwargs: Any) -> None:
+        await self.engine.delay()
+
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+
+        name = kwargs.pop("name", "_".join(f"{k}_{d}" for k, d in keys))
+        index = {"key": list(keys), **kwargs}
+
+        for existing in self.indexes.values():
+            if existing["key"] == index["key"] and existing != index:
+                raise OperationFailure("Index with different options", code=85)
+
+        if index.get("unique", False):
+            for document in self.documents.values():
+                self.__check_unique(document, {name: index})
+
+        self.indexes[name] = index
+
+    def __check_unique(
+        self,
+        document: Dict[str, Any],
+        indexes: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """Raises DuplicateKeyError if another document has the same unique keys"""
+        for name, index in (indexes or self.indexes).items():
+            partial = index.get("partialFilterExpression", dict())
+            if not index.get("unique", False) or not _matches(document, partial):
+                continue
+
+            keys = [_get(document, key) for key, _ in index["key"]]
+            for other in self.documents.values():
+                if other["_id"] == document["_id"] or not _matches(other, partial):
+                    continue
+
+                if [_get(other, key) for key, _ in index["key"]] == keys:
+                    raise DuplicateKeyError(f"E11000 duplicate key {name}", 11000)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]]) -> "MemoryCursor":
+        """Runs $match, $group (with $sum) and $limit stages"""
+        documents = list(self.documents.values())
+
+        for stage in pipeline:
+            if "$match" in stage:
+                documents = [d for d in documents if _matches(d, stage["$match"])]
+            elif "$group" in stage:
+                group = dict(stage["$group"])
+                by = group.pop("_id")
+
+                groups: Dict[Any, Dict[str, Any]] = dict()
+                for document in documents:
+                    _id = {k: _get(document, path[1:]) for k, path in by.items()}
+                    key = repr(sorted(_id.items()))
+                    grouped = groups.setdefault(
+                        key, {"_id": _id, **{field: 0 for field in group}}
+                    )
+                    for field, accumulator in group.items():
+                        grouped[field] += accumulator["$sum"]
+
+                documents = list(groups.values())
+            elif "$limit" in stage:
+                documents = documents[: stage["$limit"]]
+
+        return MemoryCursor(documents)
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(index) for name, index in self.indexes.items()}
+
+    async def drop_index(self, name: str) -> None:
+        del self.indexes[name]
+
+    def sorted(
+        self, query: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None
+    ) -> List[Dict[str, Any]]:
+        documents = self.matching(query)
+        for key, direction in reversed(sort or []):
+            documents.sort(key=lambda d: d[key], reverse=direction < 0)
+
+        return documents
+
+    async def insert_many(self, documents: List[Dict[str, Any]]):
+        await self.engine.delay()
+
+        for document in documents:
+            self.__check_unique(document)
+            self.documents[document["_id"]] = dict(document)
+
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in documents])
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
+        await self.engine.delay()
+
+        documents = self.matching(query)
+        if len(documents) > 0:
+            _update(documents[0], update)
+
+        return SimpleNamespace(modified_count=min(len(documents), 1))
+
+    async def find_one_and_update(
+        self,
+        query: Dict[str, Any],
+        update: Dict[str, Any],
+        sort: Optional[List[Tuple[str, int]]] = None,
+        upsert: bool = False,
+        return_document: bool = False,
+        **kwargs: Any,
+    ) -> Optional[Dict[str, Any]]:
+        await self.engine.delay()
+
+        documents = self.sorted(query, sort)
+        if len(documents) == 0:
+            if not upsert:
+                return None
+
+            # Plain values in the query are part of the new document
+            document = {
+                key: value
+                for key, value in query.items()
+                if key[0] != "$" and not isinstance(value, dict)
+            }
+            document.update(update.get("$setOnInsert", dict()))
+            document.setdefault("_id", ObjectId())
+            _update(document, update)
+
+            self.__check_unique(document)
+            self.documents[document["_id"]] = document
+
+            return dict(document) if return_document else None
+
+        before = dict(documents[0])
+        _update(documents[0], update)
+
+        # ReturnDocument.AFTER is True
+        return dict(documents[0]) if return_document else before
+
+    async def delete_one(self, query: Dict[str, Any]):
+        await self.engine.delay()
+
+        documents = self.matching(query)
+        if len(documents) > 0:
+            del self.documents[documents[0]["_id"]]
+
+        return SimpleNamespace(deleted_count=min(len(documents), 1))
+
+    async def delete_many(self, query: Dict[str, Any]):
+        await self.engine.delay()
+
+        documents = self.matching(query)
+        for document in documents:
+            del self.documents[document["_id"]]
+
+        return SimpleNamespace(deleted_count=len(documents))
+
+    async def find_one_and_replace(
+        self,
+        query: Dict[str, Any],
+        replacement: Dict[str, Any],
+        upsert: bool = False,
+        **kwargs: Any,
+    ) -> Optional[Dict[str, Any]]:
+        await self.engine.delay()
+
+        documents = self.matching(query)
+        if len(documents) > 0:
+            _id = documents[0]["_id"]
+        elif upsert:
+            _id = ObjectId()
+        else:
+            return None
+
+        document = {**replacement, "_id": _id}
+        self.__check_unique(document)
+
+        self.documents[_id] = document
+        return dict(document)
+
+
+class MemoryCursor:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self.documents = documents
+
+    async def to_list(self, length: Optional[int]) -> List[Dict[str, Any]]:
+        return self.documents[:length]
+
+
+class MemoryEngine:
+    """An in-memory stand-in for odmantic's AIOEngine, every operation waits
+    latency() seconds first.
+    """
+
+    def __init__(self, latency: Callable[[], float] = lambda: 0.0) -> None:
+        self.latency = latency
+        self.collections: Dict[str, MemoryCollection] = dict()
+
+    async def delay(self) -> None:
+        seconds = self.latency()
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def get_collection(self, model) -> MemoryCollection:
+        name = model.__collection__
+        if name not in self.collections:
+            self.collections[name] = MemoryCollection(name, self)
+
+        return self.collections[name]
+
+    async def find(self, model, *queries, sort=None, limit=None, skip=0):
+        await self.delay()
+
+        documents = self.get_collection(model).matching(
+            AIOEngine._build_query(*queries)
+        )
+
+        sort = AIOEngine._validate_sort_argument(sort)
+        if sort is not None:
+            for key, direction in reversed(list(sort.items())):
+                documents.sort(key=lambda d: d[key], reverse=direction < 0)
+
+        documents = documents[skip:]
+        if limit is not None:
+            documents = documents[:limit]
+
+        return [model.parse_doc(dict(d)) for d in documents]
+
+    async def find_one(self, model, *queries, sort=None):
+        found = await self.find(model, *queries, sort=sort, limit=1)
+        return found[0] if len(found) > 0 else None
+
+    async def count(self, model, *queries) -> int:
+        await self.delay()
+
+        query = AIOEngine._build_query(*queries)
+        return len(self.get_collection(model).matching(query))
+
+    async def save(self, instance):
+        await self.delay()
+
+        document = instance.doc()
+        self.get_collection(type(instance)).documents[document["_id"]] = document
+
+        return instance
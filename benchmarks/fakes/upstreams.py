@@ -0,0 +1,321 @@
+"""Fake upstream http apis, run in-process as ASGI apps"""
+import asyncio
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+
+def create_fake_goon_files(upsert: bool = True, batch: bool = True) -> FastAPI:
+    """An in-memory stand-in for the goon-files api.
+
+    Every request is counted in app.state.requests, keyed by "METHOD path".
+    Pass upsert=False or batch=False to act like an instance without the
+    upsert or batch lookup endpoints.
+    """
+    app = FastAPI()
+    app.state.users = dict()
+    app.state.requests = dict()
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next):
+        key = f"{request.method} {request.url.path}"
+        app.state.requests[key] = app.state.requests.get(key, 0) + 1
+
+        return await call_next(request)
+
+    def find_by_service(service: str, token: str) -> Dict[str, Any]:
+        for user in app.state.users.values():
+            for serviceToken in user["services"]:
+                if (
+                    serviceToken["service"] == service
+                    and serviceToken["token"] == token
+                ):
+                    return user
+
+        return None
+
+    def set_service(user: Dict[str, Any], serviceToken: Dict[str, str]) -> None:
+        services: List[Dict[str, str]] = [
+            s for s in user["services"] if s["service"] != serviceToken["service"]
+        ]
+        services.append(serviceToken)
+        user["services"] = services
+
+    @app.get("/user/")
+    async def user_by_service(service: str, token: str):
+        user = find_by_service(service, token)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return user
+
+    if batch:
+
+        @app.post("/user/batch")
+        async def users_by_service(body: Dict[str, Any]):
+            users = [find_by_service(body["service"], t) for t in body["tokens"]]
+            return [user for user in users if user is not None]
+
+    @app.get("/user/{userId}")
+    async def user_by_id(userId: int):
+        user = app.state.users.get(userId, None)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return user
+
+    @app.post("/user/")
+    async def create_user(body: Dict[str, Any]):
+        user = {
+            "userId": body["userId"],
+            "userName": body["userName"],
+            "regDate": body["regDate"],
+            "createdAt": datetime.now().isoformat(),
+            "services": [],
+        }
+        for serviceToken in body.get("services", []):
+            set_service(user, serviceToken)
+
+        app.state.users[user["userId"]] = user
+        return user
+
+    if upsert:
+
+        @app.put("/user/{userId}")
+        async def upsert_user(userId: int, body: Dict[str, Any]):
+            user = app.state.users.get(userId, None)
+            if user is None:
+                return await create_user(body)
+
+            for serviceToken in body.get("services", []):
+                set_service(user, serviceToken)
+
+            return user
+
+    @app.put("/user/{userId}/service")
+    async def add_service(userId: int, body: Dict[str, str]):
+        user = app.state.users.get(userId, None)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        set_service(user, body)
+        return user
+
+    return app
+
+
+def create_fake_collector() -> FastAPI:
+    """A stand-in for an OTLP/HTTP trace collector, exports are kept in
+    app.state.exports.
+    """
+    app = FastAPI()
+    app.state.exports = list()
+
+    @app.post("/v1/traces")
+    async def export_traces(body: Dict[str, Any]):
+        app.state.exports.append(body)
+        return dict()
+
+    return app
+
+
+def create_fake_interactions(verify_key: VerifyKey) -> FastAPI:
+    """A stand-in for the bot's interactions endpoint, checks signatures like
+    dispike and answers buttons named "slow" after a second.
+    """
+    app = FastAPI()
+
+    @app.post("/interactions")
+    async def interactions(request: Request):
+        body = await request.body()
+        timestamp = request.headers.get("X-Signature-Timestamp", "")
+        signature = request.headers.get("X-Signature-Ed25519", "")
+
+        try:
+            verify_key.verify(timestamp.encode() + body, bytes.fromhex(signature))
+        except (BadSignatureError, ValueError):
+            raise HTTPException(status_code=401)
+
+        if (await request.json()).get("data", dict()).get("custom_id") == "slow":
+            await asyncio.sleep(1)
+
+        return {"type": 4, "data": {"content": "ok"}}
+
+    return app
+
+
+def create_fake_unavailable(delay: float = 0.0) -> FastAPI:
+    """An upstream that's down, every request fails with a 503 after delay
+    seconds.
+    """
+    app = FastAPI()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    async def unavailable(path: str):
+        await asyncio.sleep(delay)
+        raise HTTPException(status_code=503)
+
+    return app
+
+
+def create_fake_flaky(
+    failures: List[Tuple[int, Dict[str, str]]], status: int = 200
+) -> FastAPI:
+    """An upstream answering with each (status, headers) in failures in turn,
+    then with status. Every request is counted in app.state.requests.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    async def flaky(path: str):
+        app.state.requests += 1
+
+        if len(failures) > 0:
+            failure_status, headers = failures.pop(0)
+            return Response(status_code=failure_status, headers=headers)
+
+        if status == 204:
+            return Response(status_code=204)
+
+        return JSONResponse({"id": "1"}, status_code=status)
+
+    return app
+
+
+def add_latency(app: FastAPI, latency: Callable[[], float]) -> FastAPI:
+    """Delays every response of a fake by latency() seconds"""
+
+    @app.middleware("http")
+    async def delay(request: Request, call_next):
+        seconds = latency()
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+        return await call_next(request)
+
+    return app
+
+
+def create_fake_awful_auth(validated: bool = True) -> FastAPI:
+    """A stand-in for awful-auth, every user with a challenge passes the
+    profile check unless validated=False.
+    """
+    app = FastAPI()
+    app.state.challenges = dict()
+    app.state.next_user_id = 1
+
+    @app.get("/goon_auth/verification")
+    async def verification(user_name: str):
+        challenge = app.state.challenges.get(user_name.lower(), None)
+        if challenge is None:
+            challenge = {"user_name": user_name, "hash": f"hash-{ObjectId()}"}
+            app.state.challenges[user_name.lower()] = challenge
+
+        return challenge
+
+    @app.get("/goon_auth/verification/update")
+    async def verification_update(user_name: str):
+        if user_name.lower() not in app.state.challenges:
+            raise HTTPException(status_code=404, detail={"message": "Unknown hash"})
+
+        if not validated:
+            return {"validated": False}
+
+        app.state.next_user_id += 1
+        return {
+            "validated": True,
+            "user_name": user_name,
+            "user_id": app.state.next_user_id,
+            "register_date": datetime(2004, 1, 1).isoformat(),
+            "permabanned": None,
+        }
+
+    return app
+
+
+def create_fake_discord(owner_id: int) -> FastAPI:
+    """A stand-in for the parts of the discord api the bot uses, every guild
+    is owned by owner_id.
+
+    Messages are recorded in app.state.messages as ("channel", channel id) or
+    ("webhook", webhook id). Interaction follow-ups and edits of the original
+    response are recorded in app.state.interactions as ("followup" or
+    "original", request body). Deleted webhooks are kept in app.state.deleted, and
+    webhooks can't be created in the channels in app.state.forbidden.
+    """
+    app = FastAPI()
+    app.state.webhooks = dict()
+    app.state.deleted = set()
+    app.state.forbidden = set()
+    app.state.messages = []
+    app.state.interactions = []
+
+    @app.get("/api/v9/guilds/{guildId}")
+    async def get_guild(guildId: int):
+        return {"id": guildId, "owner_id": owner_id}
+
+    @app.put("/api/v9/guilds/{guildId}/members/{userId}/roles/{roleId}")
+    async def add_role(guildId: int, userId: int, roleId: int):
+        return Response(status_code=204)
+
+    @app.post("/api/v9/channels/{channelId}/messages")
+    async def create_message(channelId: int):
+        app.state.messages.append(("channel", channelId))
+        return {"id": str(ObjectId())}
+
+    @app.post("/api/v9/channels/{channelId}/webhooks")
+    async def create_webhook(channelId: int):
+        if channelId in app.state.forbidden:
+            raise HTTPException(status_code=403)
+
+        webhook = {
+            "id": str(len(app.state.webhooks) + 1),
+            "token": f"token-{ObjectId()}",
+            "channel_id": str(channelId),
+        }
+        app.state.webhooks[webhook["id"]] = webhook
+
+        return webhook
+
+    @app.get("/api/v9/webhooks/{webhookId}/{token}")
+    async def get_webhook(webhookId: str, token: str):
+        webhook = app.state.webhooks.get(webhookId, None)
+        if webhook is None or webhook["token"] != token:
+            raise HTTPException(status_code=404)
+
+        return webhook
+
+    @app.delete("/api/v9/webhooks/{webhookId}/{token}")
+    async def delete_webhook(webhookId: str, token: str):
+        webhook = app.state.webhooks.get(webhookId, None)
+        if webhook is None or webhook["token"] != token:
+            raise HTTPException(status_code=404)
+
+        del app.state.webhooks[webhookId]
+        app.state.deleted.add(webhookId)
+
+        return Response(status_code=204)
+
+    # Interaction follow-ups as well as webhook messages
+    @app.post("/api/v9/webhooks/{appId}/{token}")
+    async def create_followup(appId: int, token: str, request: Request):
+        if str(appId) in app.state.deleted:
+            raise HTTPException(status_code=404)
+
+        app.state.messages.append(("webhook", appId))
+        app.state.interactions.append(("followup", await request.json()))
+        return {"id": str(ObjectId())}
+
+    @app.patch("/api/v9/webhooks/{appId}/{token}/messages/@original")
+    async def edit_original(appId: int, token: str, request: Request):
+        app.state.interactions.append(("original", await request.json()))
+        return {"id": str(ObjectId())}
+
+    return app
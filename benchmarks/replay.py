@@ -0,0 +1,180 @@
+"""Replays recorded interactions against a running instance.
+
+The recording is JSONL, one interaction payload per line, exactly as discord
+posted it. Each payload is signed as it's sent, so the instance must be started
+with the public half of the signing key as DISCORD_PUBLIC_KEY.
+
+Requests are sent open-loop, on a schedule that doesn't wait for responses,
+and latency is measured from when a request was scheduled rather than sent. A
+saturated instance shows up as growing latency instead of a slower schedule.
+"""
+import asyncio
+import json
+import random
+import time
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from httpx import AsyncClient, Limits
+from nacl.signing import SigningKey
+
+from benchmarks.run import percentile, sign
+
+Recording = Tuple[str, bytes]
+
+
+def interaction_name(payload: Dict[str, Any]) -> str:
+    """The command name or button id of an interaction, for grouping results"""
+    data = payload.get("data") or dict()
+    return data.get("name") or data.get("custom_id") or f"type:{payload.get('type')}"
+
+
+def load_recording(path: str) -> List[Recording]:
+    """Loads a JSONL recording.
+
+    Args:
+        path (str): The recording's path
+
+    Returns:
+        List[Recording]: (interaction name, body) per line, in order
+    """
+    recording: List[Recording] = []
+    with open(path, "rb") as file:
+        for line in file:
+            line = line.strip()
+            if len(line) == 0:
+                continue
+
+            # The body is replayed as recorded, it's only parsed for its name
+            recording.append((interaction_name(json.loads(line)), line))
+
+    return recording
+
+
+def schedule(rate: float, poisson: bool, rng: random.Random) -> Iterator[float]:
+    """Yields send times in seconds from the start of the run.
+
+    Args:
+        rate (float): Requests per second
+        poisson (bool): Exponential gaps between arrivals instead of a fixed
+            interval, closer to how real traffic bunches up
+        rng (random.Random): Source of the arrival gaps
+    """
+    at = 0.0
+    while True:
+        yield at
+        at += rng.expovariate(rate) if poisson else 1.0 / rate
+
+
+class Stats:
+    """Outcomes of every request sent for an interaction"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.deadline_misses = 0
+
+    def record(self, latency: float, ok: bool, deadline: float) -> None:
+        self.latencies.append(latency)
+
+        if not ok:
+            self.errors += 1
+        if latency > deadline:
+            self.deadline_misses += 1
+
+    def summary(self) -> Dict[str, Any]:
+        requests = len(self.latencies)
+
+        return {
+            "interaction": self.name,
+            "requests": requests,
+            "error_rate": round(self.errors / requests, 4) if requests > 0 else 0.0,
+            "deadline_misses": self.deadline_misses,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "max_ms": round(max(self.latencies, default=0.0) * 1000, 2),
+        }
+
+
+async def replay(
+    client: AsyncClient,
+    url: str,
+    recording: List[Recording],
+    signing_key: SigningKey,
+    rate: float,
+    deadline: float,
+    requests: Optional[int] = None,
+    poisson: bool = False,
+    seed: Optional[int] = None,
+) -> Tuple[Dict[str, Stats], float]:
+    """Replays the recording at a target rate.
+
+    Args:
+        client (AsyncClient): Client to send with
+        url (str): The instance's interactions endpoint
+        recording (List[Recording]): Interactions to send, cycled as needed
+        signing_key (SigningKey): Key matching the instance's public key
+        rate (float): Requests per second
+        deadline (float): Latency counted as a deadline miss
+        requests (Optional[int], optional): Requests to send.
+            Defaults to one pass of the recording.
+        poisson (bool, optional): Poisson arrivals. Defaults to False.
+        seed (Optional[int], optional): Seed for the arrivals. Defaults to None.
+
+    Returns:
+        Tuple[Dict[str, Stats], float]: Stats per interaction, and the elapsed
+            seconds
+    """
+    if requests is None:
+        requests = len(recording)
+
+    stats: Dict[str, Stats] = dict()
+    for name, _ in recording:
+        stats.setdefault(name, Stats(name))
+
+    async def send(name: str, body: bytes, scheduled: float) -> None:
+        try:
+            response = await client.post(
+                url, content=body, headers=sign(signing_key, body)
+            )
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+
+        stats[name].record(time.perf_counter() - scheduled, ok, deadline)
+
+    start = time.perf_counter()
+    arrivals = schedule(rate, poisson, random.Random(seed))
+
+    tasks: List[asyncio.Task] = []
+    for i in range(requests):
+        scheduled = start + next(arrivals)
+
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        name, body = recording[i % len(recording)]
+        tasks.append(asyncio.ensure_future(send(name, body, scheduled)))
+
+    await asyncio.gather(*tasks)
+
+    return stats, time.perf_counter() - start
+
+
+def create_client(timeout: float, connections: int) -> AsyncClient:
+    """A client for replaying against an instance.
+
+    Args:
+        timeout (float): Request timeout in seconds
+        connections (int): Connections to open, requests past it queue in the
+            client and that time counts towards their latency
+    """
+    return AsyncClient(
+        timeout=timeout,
+        limits=Limits(
+            max_connections=connections, max_keepalive_connections=connections
+        ),
+    )
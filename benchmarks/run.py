@@ -0,0 +1,387 @@
+"""Offline benchmarks for the interaction handlers.
+
+Drives the FastAPI app with signed interactions, the way discord would, while
+awful-auth, goon-files, discord and mongo are replaced by in-process fakes with
+configurable latency. Nothing leaves the process, so runs are reproducible.
+
+    poe benchmark --requests 500 --concurrency 25 --latency 20 --scenarios auth about
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from httpx import ASGITransport, AsyncClient
+from nacl.signing import SigningKey
+
+from benchmarks.fakes import (
+    MemoryEngine,
+    add_latency,
+    create_fake_awful_auth,
+    create_fake_discord,
+    create_fake_goon_files,
+)
+
+SCENARIOS = ("auth", "auth.verify", "about", "setup")
+
+GUILD_ID = 100000
+OWNER_ID = 42
+AUTH_ROLE_ID = 200000
+ADMIN_CHANNEL_ID = 300000
+
+# Text only found in the successful response of each scenario
+_expected = {
+    "auth": "Additional Information",
+    "auth.verify": "finally validated",
+    "about": "Servers powered by GAN",
+    "setup": "Congratulations",
+}
+
+SignedRequest = Tuple[bytes, Dict[str, str]]
+
+
+def sign(signing_key: SigningKey, body: bytes) -> Dict[str, str]:
+    """Signs an interaction body the way discord does.
+
+    Returns:
+        Dict[str, str]: The request headers, signature included
+    """
+    timestamp = str(int(time.time()))
+    signature = signing_key.sign(timestamp.encode("utf-8") + body).signature
+
+    return {
+        "content-type": "application/json",
+        "X-Signature-Ed25519": signature.hex(),
+        "X-Signature-Timestamp": timestamp,
+    }
+
+
+class Interactions:
+    """Builds interaction payloads signed like discord's"""
+
+    def __init__(self, signing_key: SigningKey) -> None:
+        self.signing_key = signing_key
+        self.__next_id = 0
+
+    def __id(self) -> str:
+        self.__next_id += 1
+        return str(self.__next_id)
+
+    def sign(self, payload: Dict[str, Any]) -> SignedRequest:
+        body = json.dumps(payload).encode("utf-8")
+        return body, sign(self.signing_key, body)
+
+    def __interaction(
+        self, type: int, data: Dict[str, Any], userId: int, guildId: int
+    ) -> Dict[str, Any]:
+        return {
+            "type": type,
+            "id": self.__id(),
+            "data": data,
+            "guild_id": str(guildId),
+            "channel_id": str(ADMIN_CHANNEL_ID),
+            "member": {
+                "user": {
+                    "id": str(userId),
+                    "username": f"user{userId}",
+                    "avatar": None,
+                    "discriminator": "0001",
+                    "public_flags": 0,
+                },
+                "roles": [],
+                "premium_since": None,
+                "permissions": "0",
+                "pending": False,
+                "nick": None,
+                "joined_at": "2021-01-01T00:00:00+00:00",
+            },
+            "token": f"token-{self.__next_id}",
+            "version": 1,
+        }
+
+    def command(
+        self, name: str, userId: int, guildId: int = GUILD_ID, **options: Any
+    ) -> SignedRequest:
+        data = {"id": self.__id(), "name": name, "type": 1}
+        if len(options) > 0:
+            data["options"] = [
+                {"name": key, "value": str(value)} for key, value in options.items()
+            ]
+
+        return self.sign(self.__interaction(2, data, userId, guildId))
+
+    def button(
+        self, custom_id: str, userId: int, guildId: int = GUILD_ID
+    ) -> SignedRequest:
+        data = {"custom_id": custom_id, "component_type": 2}
+        return self.sign(self.__interaction(3, data, userId, guildId))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples"""
+    if len(samples) == 0:
+        return 0.0
+
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered)) - 1
+    return ordered[max(0, min(len(ordered) - 1, rank))]
+
+
+class Result:
+    def __init__(
+        self, scenario: str, latencies: List[float], errors: int, elapsed: float
+    ) -> None:
+        self.scenario = scenario
+        self.latencies = latencies
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "scenario": self.scenario,
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "throughput": round(self.throughput, 1),
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+        }
+
+
+async def run_requests(
+    client: AsyncClient,
+    requests: List[SignedRequest],
+    concurrency: int,
+    expected: Optional[str] = None,
+) -> Tuple[List[float], int, float]:
+    """Sends the requests with at most `concurrency` in flight.
+
+    Returns:
+        Tuple[List[float], int, float]: (latencies, errors, elapsed seconds)
+    """
+    queue: "asyncio.Queue[SignedRequest]" = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+
+        while not queue.empty():
+            body, headers = queue.get_nowait()
+
+            start = time.perf_counter()
+            response = await client.post("/interactions", content=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+
+            if response.status_code != 200 or (
+                expected is not None and expected not in response.text
+            ):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    return latencies, errors, time.perf_counter() - start
+
+
+def _latency(rng: random.Random, millis: float, jitter: float) -> Callable[[], float]:
+    def latency() -> float:
+        return max(0.0, millis * (1 + rng.uniform(-jitter, jitter)) / 1000)
+
+    return latency
+
+
+async def benchmark(args: argparse.Namespace) -> List[Result]:
+    signing_key = SigningKey(
+        bytes(random.Random(args.seed).getrandbits(8) for _ in range(32))
+    )
+
+    # Settings are read on import, so these go in before the app is loaded
+    os.environ["DISCORD_PUBLIC_KEY"] = signing_key.verify_key.encode().hex()
+    os.environ.setdefault("DISCORD_BOT_TOKEN", "benchmark")
+    os.environ.setdefault("DISCORD_APPLICATION_ID", "1")
+    os.environ.setdefault("AWFUL_AUTH_ADDRESS", "http://awful-auth")
+    os.environ.setdefault("GOON_FILES_ADDRESS", "http://goon-files")
+    os.environ.setdefault("LOGGING_LEVEL", "error")
+
+    from app import main
+    from app.clients.discord_api import DiscordClient
+    from app.clients.instrumented import InstrumentedAsyncClient
+    from app.config import bot_settings
+    from app.discord import discord
+    from app.models.goon_server import GoonServer, ServerOption
+    from app.mongodb import db
+
+    rng = random.Random(args.seed)
+
+    def latency(override: Optional[float]) -> Callable[[], float]:
+        return _latency(
+            rng, args.latency if override is None else override, args.jitter
+        )
+
+    bot_settings.defer_interactions = args.defer
+
+    # Swap every upstream for a fake
+    fakes = {
+        "auth_api": ("goon_auth", create_fake_awful_auth(), args.auth_latency),
+        "files_api": ("goon_files", create_fake_goon_files(), args.files_latency),
+    }
+    for name, (upstream, fake, override) in fakes.items():
+        api = main.apis[name]
+        await api.client.aclose()
+
+        api.client = InstrumentedAsyncClient(
+            upstream,
+            base_url=f"http://{upstream}",
+            transport=ASGITransport(app=add_latency(fake, latency(override))),
+        )
+
+    fake_discord = add_latency(
+        create_fake_discord(OWNER_ID), latency(args.discord_latency)
+    )
+    discord.client = DiscordClient(
+        bot_settings.discord_bot_token,
+        client=AsyncClient(transport=ASGITransport(app=fake_discord)),
+    )
+    discord.client.ratelimiter.global_limit = args.discord_global_limit
+
+    db.engine = MemoryEngine(latency(args.mongo_latency))
+    await GoonServer.save_options(
+        GUILD_ID,
+        {
+            ServerOption.AUTH_ROLE: str(AUTH_ROLE_ID),
+            ServerOption.NOTICE_CHANNEL_ADMIN: str(ADMIN_CHANNEL_ID),
+            ServerOption.NOTICE_CHANNEL_AUTH: str(ADMIN_CHANNEL_ID + 1),
+        },
+    )
+
+    # Role grants and notices reach the fake discord through the outbox
+    await main.outbox_worker.start()
+
+    interactions = Interactions(signing_key)
+    client = AsyncClient(transport=ASGITransport(app=main.app), base_url="http://bot")
+
+    # Fresh users and guilds per request keep every request on the cold path
+    next_user = iter(range(1_000_000, 10_000_000))
+
+    results: List[Result] = []
+    for scenario in args.scenarios:
+        users = [next(next_user) for _ in range(args.requests)]
+
+        if scenario == "auth":
+            requests = [
+                interactions.command("auth", user, username=f"goon{user}")
+                for user in users
+            ]
+        elif scenario == "auth.verify":
+            # Every user needs a challenge first, this part isn't timed
+            await run_requests(
+                client,
+                [
+                    interactions.command("auth", user, username=f"goon{user}")
+                    for user in users
+                ],
+                args.concurrency,
+            )
+            requests = [interactions.button("auth.verify", user) for user in users]
+        elif scenario == "about":
+            requests = [interactions.command("about", user) for user in users]
+        else:
+            requests = [
+                interactions.command(
+                    "setup",
+                    OWNER_ID,
+                    guildId=user,
+                    **{
+                        "authenticated-role": AUTH_ROLE_ID,
+                        "admin-notice-channel": ADMIN_CHANNEL_ID,
+                    },
+                )
+                for user in users
+            ]
+
+        # Deferred responses are only the acknowledgement
+        expected = None if args.defer else _expected[scenario]
+        latencies, errors, elapsed = await run_requests(
+            client, requests, args.concurrency, expected
+        )
+        results.append(Result(scenario, latencies, errors, elapsed))
+
+    await main.outbox_worker.stop()
+    await main.background_tasks.shutdown()
+    await client.aclose()
+    await discord.client.close()
+    for api in main.apis.values():
+        await api.close()
+
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Upstream latency in ms"
+    )
+    parser.add_argument("--auth-latency", type=float, help="awful-auth override")
+    parser.add_argument("--files-latency", type=float, help="goon-files override")
+    parser.add_argument("--discord-latency", type=float, help="discord override")
+    parser.add_argument("--mongo-latency", type=float, help="mongo override")
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Latency jitter, 0.2 is +-20%%"
+    )
+    parser.add_argument(
+        "--discord-global-limit",
+        type=int,
+        default=50,
+        help="Discord requests per second",
+    )
+    parser.add_argument(
+        "--defer", action="store_true", help="Only time the deferred acknowledgement"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+
+    return parser.parse_args(argv)
+
+
+def print_table(rows: List[Dict[str, Any]], columns: List[str]) -> None:
+    widths = [max(12, len(column)) for column in columns]
+
+    print(" ".join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for row in rows:
+        print(" ".join(f"{row[c]:>{width}}" for c, width in zip(columns, widths)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = [result.summary() for result in asyncio.run(benchmark(args))]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print_table(
+        results,
+        ["scenario", "requests", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms"],
+    )
+
+
+if __name__ == "__main__":
+    main()
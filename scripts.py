@@ -1,3 +1,6 @@
+import argparse
+import asyncio
+import json
 import os
 import sys
 from typing import Any, List, Optional
@@ -9,9 +12,14 @@ from dispike.creating.models.permissions import (
     NewApplicationPermission,
 )
 from loguru import logger
+from nacl.signing import SigningKey
 from pydantic import BaseSettings, Field
 
+from app.config import bot_settings
 from app.main import bot, collections
+from app.metrics import INTERACTION_DEADLINE_SECS
+from benchmarks import replay as replayer
+from benchmarks.run import print_table
 
 
 class DevSettings(BaseSettings):
@@ -19,6 +27,9 @@ class DevSettings(BaseSettings):
     role_ids: Optional[List[int]] = Field(None, env="DISCORD_ROLE_ID")
     user_ids: Optional[List[int]] = Field(None, env="DISCORD_USER_IDS")
 
+    # Private half of a test DISCORD_PUBLIC_KEY, hex encoded, for replays
+    test_signing_key: Optional[str] = Field(None, env="DISCORD_TEST_SIGNING_KEY")
+
 
 settings = DevSettings(_env_file=".env")
 
@@ -118,6 +129,100 @@ def delete_commands():
         )
 
 
+def create_test_keys():
+    """Prints a key pair for instances that recorded traffic is replayed to"""
+    signing_key = SigningKey.generate()
+
+    print(f"DISCORD_PUBLIC_KEY={signing_key.verify_key.encode().hex()}")
+    print(f"DISCORD_TEST_SIGNING_KEY={signing_key.encode().hex()}")
+
+
+def replay():
+    """Replays a JSONL recording of interactions against a running instance"""
+    parser = argparse.ArgumentParser(prog="poe replay", description=replay.__doc__)
+    parser.add_argument("recording", help="JSONL file, one interaction per line")
+    parser.add_argument(
+        "--url", default="http://localhost:8080/interactions", help="Interactions url"
+    )
+    parser.add_argument("--rate", type=float, default=10.0, help="Requests per second")
+    parser.add_argument(
+        "--requests", type=int, help="Requests to send, cycling the recording"
+    )
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="Print results as json")
+    args = parser.parse_args(sys.argv[1:])
+
+    if settings.test_signing_key is None:
+        logger.error("SCRIPT: DISCORD_TEST_SIGNING_KEY is required to sign replays.")
+        logger.info("SCRIPT: Create a key pair with: poe create_test_keys")
+        return
+
+    signing_key = SigningKey(bytes.fromhex(settings.test_signing_key))
+    if signing_key.verify_key.encode().hex() != bot_settings.discord_public_key:
+        logger.error(
+            "SCRIPT: DISCORD_TEST_SIGNING_KEY doesn't match DISCORD_PUBLIC_KEY, "
+            "the instance would reject every request."
+        )
+        return
+
+    recording = replayer.load_recording(args.recording)
+    if len(recording) == 0:
+        logger.error(f"SCRIPT: {args.recording} has no interactions to replay.")
+        return
+
+    logger.info(
+        f"SCRIPT: Replaying {args.requests or len(recording)} interactions "
+        f"to {args.url} at {args.rate}/s"
+        + (" with poisson arrivals" if args.poisson else "")
+    )
+
+    async def run():
+        client = replayer.create_client(args.timeout, args.connections)
+        try:
+            return await replayer.replay(
+                client,
+                args.url,
+                recording,
+                signing_key,
+                args.rate,
+                INTERACTION_DEADLINE_SECS,
+                requests=args.requests,
+                poisson=args.poisson,
+                seed=args.seed,
+            )
+        finally:
+            await client.aclose()
+
+    stats, elapsed = asyncio.run(run())
+    results = [s.summary() for s in stats.values() if len(s.latencies) > 0]
+
+    sent = sum(result["requests"] for result in results)
+    logger.info(
+        f"SCRIPT: Sent {sent} requests in {elapsed:.1f}s, {sent / elapsed:.1f}/s"
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print_table(
+        results,
+        [
+            "interaction",
+            "requests",
+            "error_rate",
+            "deadline_misses",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "max_ms",
+        ],
+    )
+
+
 # region Utils
 
 
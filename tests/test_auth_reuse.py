@@ -0,0 +1,94 @@
+import json
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.clients.goon_auth_api import GoonAuthChallenge
+from app.commands.handlers.auth_handler import AuthHandler
+from app.commands.views.templates import response_payload
+from app.config import bot_settings
+from app.models.user_auth_request import UserAuthRequest
+from app.mongodb import db
+from benchmarks.fakes import MemoryEngine
+
+
+class ChallengeApi:
+    """Hands out a new challenge hash every time"""
+
+    def __init__(self) -> None:
+        self.challenges = 0
+
+    async def get_verification(self, user_name: str) -> GoonAuthChallenge:
+        self.challenges += 1
+        return GoonAuthChallenge(user_name, f"hash-{self.challenges}")
+
+
+class NewUsersApi:
+    """Nobody has authed before"""
+
+    async def find_user_by_service(self, service, token):
+        return None
+
+
+@pytest.fixture
+def engine(monkeypatch) -> MemoryEngine:
+    engine = MemoryEngine()
+    monkeypatch.setattr(db, "engine", engine)
+
+    return engine
+
+
+@pytest.fixture
+def handler() -> AuthHandler:
+    return AuthHandler(ChallengeApi(), NewUsersApi())
+
+
+async def auth(handler: AuthHandler, guild_id: int = 100) -> str:
+    ctx = SimpleNamespace(
+        id=1, guild_id=guild_id, member=SimpleNamespace(user=SimpleNamespace(id=3))
+    )
+    response = await handler.process_auth(ctx, username="goon")
+
+    # The response's json, the challenge hash is somewhere in it
+    return json.dumps(response_payload(response))
+
+
+def update_attempt(engine: MemoryEngine, **fields) -> None:
+    for document in engine.get_collection(UserAuthRequest).documents.values():
+        document.update(fields)
+
+
+@pytest.mark.asyncio
+async def test_auth_again_reuses_the_challenge(engine, handler):
+    assert "hash-1" in await auth(handler)
+    assert "hash-1" in await auth(handler)
+
+    assert handler.auth_api.challenges == 1
+
+
+@pytest.mark.asyncio
+async def test_auth_in_another_guild_gets_a_new_challenge(engine, handler):
+    assert "hash-1" in await auth(handler, guild_id=100)
+    assert "hash-2" in await auth(handler, guild_id=200)
+
+    assert handler.auth_api.challenges == 2
+
+
+@pytest.mark.asyncio
+async def test_verified_attempts_are_not_reused(engine, handler):
+    assert "hash-1" in await auth(handler)
+    update_attempt(engine, verified=True)
+
+    assert "hash-2" in await auth(handler)
+
+
+@pytest.mark.asyncio
+async def test_expired_attempts_are_not_reused(engine, handler):
+    assert "hash-1" in await auth(handler)
+
+    lifespan = timedelta(minutes=bot_settings.auth_attempt_lifespan)
+    update_attempt(engine, lastUpdated=datetime.now() - lifespan)
+
+    assert "hash-2" in await auth(handler)
@@ -0,0 +1,89 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from httpx import ASGITransport, AsyncClient
+from nacl.signing import SigningKey
+
+from benchmarks import replay
+from benchmarks.run import percentile
+from benchmarks.fakes import create_fake_interactions
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_benchmark_runs_offline():
+    # The app reads its settings on import, so it gets a fresh interpreter
+    env = {
+        key: value for key, value in os.environ.items() if key != "DISCORD_PUBLIC_KEY"
+    }
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--requests", "5", "--json"],
+        capture_output=True,
+        env=env,
+        timeout=120,
+        check=True,
+    )
+
+    summaries = json.loads(result.stdout)
+
+    assert [s["scenario"] for s in summaries] == [
+        "auth",
+        "auth.verify",
+        "about",
+        "setup",
+    ]
+    assert all(s["requests"] == 5 and s["errors"] == 0 for s in summaries)
+
+
+@pytest.mark.asyncio
+async def test_replay_signs_and_records_deadline_misses(tmp_path):
+    signing_key = SigningKey.generate()
+    path = tmp_path / "recording.jsonl"
+    path.write_text(
+        "\n".join(
+            [
+                json.dumps({"type": 2, "data": {"name": "about"}}),
+                "",
+                json.dumps({"type": 3, "data": {"custom_id": "slow"}}),
+            ]
+        )
+    )
+    recording = replay.load_recording(str(path))
+
+    client = AsyncClient(
+        transport=ASGITransport(app=create_fake_interactions(signing_key.verify_key))
+    )
+    stats, _ = await replay.replay(
+        client,
+        "http://bot/interactions",
+        recording,
+        signing_key,
+        rate=100,
+        deadline=0.5,
+        requests=4,
+    )
+    await client.aclose()
+
+    assert [name for name, _ in recording] == ["about", "slow"]
+    assert stats["about"].summary()["requests"] == 2
+    assert stats["about"].errors == 0 and stats["about"].deadline_misses == 0
+    assert stats["slow"].deadline_misses == 2
+
+
+def test_poisson_schedule_keeps_the_rate():
+    arrivals = replay.schedule(50, True, random.Random(1))
+    times = [next(arrivals) for _ in range(5001)]
+
+    assert times == sorted(times)
+    assert 90 < times[-1] < 110
@@ -0,0 +1,69 @@
+import time
+
+from app.cache import TTLCache
+
+
+def test_get_set():
+    cache = TTLCache(max_size=4, ttl=60)
+
+    cache.set(1, "one")
+
+    assert cache.get(1) == "one"
+    assert cache.get(2) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cached_none():
+    cache = TTLCache(max_size=4, ttl=60)
+
+    cache.set(1, None)
+
+    assert cache.lookup(1) == (True, None)
+    assert cache.lookup(2) == (False, None)
+
+
+def test_expiry():
+    cache = TTLCache(max_size=4, ttl=60)
+
+    cache.set(1, "one", ttl=0.01)
+    time.sleep(0.02)
+
+    assert 1 not in cache
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.get(1)
+    cache.set(3, "three")
+
+    assert 1 in cache
+    assert 2 not in cache
+    assert 3 in cache
+
+
+def test_invalidate():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    cache.set(1, "one")
+    cache.invalidate(1)
+    cache.invalidate(2)
+
+    assert 1 not in cache
+
+
+def test_invalidate_values():
+    cache = TTLCache(max_size=4, ttl=60)
+
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.set(3, None)
+    cache.invalidate_values(lambda v: v is not None and v.startswith("o"))
+
+    assert 1 not in cache
+    assert 2 in cache
+    assert 3 in cache
@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+
+import pytest
+
+from httpx import ASGITransport, Timeout
+
+from app import deadline
+from app.circuit import CircuitBreaker, CircuitOpenError, CircuitState
+from app.clients.goon_auth_api import GoonAuthApi
+from app.clients.goon_files_api import GoonFilesApi, Service
+from app.commands.handlers.auth_handler import AuthHandler
+from app.commands.info import InfoCollection
+from app.commands.views.templates import response_payload
+from app.mongodb import db
+from benchmarks.fakes import (
+    MemoryEngine,
+    create_fake_goon_files,
+    create_fake_unavailable,
+)
+
+
+def test_opens_on_failure_rate_and_closes_after_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("app.circuit.time.monotonic", lambda: now[0])
+
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, open_for=10)
+
+    for success in (True, False, True, False):
+        breaker.check()
+        breaker.record(success)
+
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # One probe is let through once it's half-open
+    now[0] = 11.0
+    breaker.check()
+    assert breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    breaker.record(True)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_failed_probe_reopens(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("app.circuit.time.monotonic", lambda: now[0])
+
+    breaker = CircuitBreaker("test", min_calls=1, open_for=10)
+    breaker.check()
+    breaker.record(False)
+
+    now[0] = 11.0
+    breaker.check()
+    breaker.record(False)
+
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_the_request():
+    client = GoonFilesApi(
+        host="http://goon-files",
+        transport=ASGITransport(app=create_fake_unavailable(delay=0.2)),
+    )
+    client.client.breaker = CircuitBreaker("goon_files", min_calls=2)
+
+    for token in ("1", "2"):
+        assert await client.find_user_by_service(Service.DISCORD, token) is None
+
+    with pytest.raises(CircuitOpenError):
+        await client.find_user_by_service(Service.DISCORD, "3")
+
+    await client.close()
+
+
+def test_timeouts_are_capped_by_the_deadline():
+    timeout = Timeout(5.0, connect=0.5)
+
+    assert deadline.request_timeout("test", timeout) == timeout
+
+    with deadline.deadline(1.25):
+        capped = deadline.request_timeout("test", timeout)
+
+    assert capped.read <= 1.0 and capped.connect == 0.5
+
+
+@pytest.mark.asyncio
+async def test_no_request_without_time_left():
+    fake = create_fake_goon_files()
+    client = GoonFilesApi(host="http://goon-files", transport=ASGITransport(app=fake))
+
+    with deadline.deadline(0.1):
+        with pytest.raises(deadline.DeadlineExceeded):
+            await client.find_user(1)
+
+    assert fake.state.requests.get("GET /user/1", 0) == 0
+    assert client.client.breaker.state == CircuitState.CLOSED
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_answers_with_an_error():
+    fake = create_fake_unavailable()
+    handler = AuthHandler(
+        GoonAuthApi("http://awful-auth", transport=ASGITransport(app=fake)),
+        GoonFilesApi("http://goon-files", transport=ASGITransport(app=fake)),
+    )
+    handler.files_api.client.breaker = CircuitBreaker("goon_files", min_calls=1)
+    handler.files_api.client.breaker.check()
+    handler.files_api.client.breaker.record(False)
+
+    ctx = SimpleNamespace(
+        id=1, guild_id=2, member=SimpleNamespace(user=SimpleNamespace(id=3))
+    )
+    response = await handler.process_auth(ctx, username="goon")
+
+    embed = response_payload(response)["data"]["embeds"][0]
+    assert "trouble reaching" in embed["description"]
+
+    await handler.auth_api.close()
+    await handler.files_api.close()
+
+
+@pytest.mark.asyncio
+async def test_about_answers_with_an_error(monkeypatch):
+    monkeypatch.setattr(db, "engine", MemoryEngine())
+
+    collection = InfoCollection(
+        GoonFilesApi(
+            "http://goon-files",
+            transport=ASGITransport(app=create_fake_unavailable()),
+        )
+    )
+    collection.files_api.client.breaker = CircuitBreaker("goon_files", min_calls=1)
+    collection.files_api.client.breaker.check()
+    collection.files_api.client.breaker.record(False)
+
+    ctx = SimpleNamespace(
+        id=1, guild_id=2, member=SimpleNamespace(user=SimpleNamespace(id=3))
+    )
+    response = await collection.about(ctx)
+
+    embed = response_payload(response)["data"]["embeds"][0]
+    assert "trouble reaching" in embed["description"]
+
+    await collection.files_api.close()
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+
+from httpx import ASGITransport, AsyncClient
+
+from app.clients.discord_api.client import DiscordClient
+from app.commands.handlers.deferred import defer_interaction
+from app.commands.views import AuthView
+from app.commands.views.templates import response_payload
+from app.config import bot_settings
+from app.discord import discord
+from app.tasks import background_tasks
+from benchmarks.fakes import create_fake_discord
+
+
+@pytest.fixture
+async def fake(monkeypatch):
+    fake = create_fake_discord(1)
+
+    monkeypatch.setattr(bot_settings, "defer_interactions", True)
+    monkeypatch.setattr(
+        discord,
+        "client",
+        DiscordClient("token", client=AsyncClient(transport=ASGITransport(app=fake))),
+    )
+
+    yield fake
+
+    await discord.client.close()
+
+
+def interaction(name: str):
+    return SimpleNamespace(
+        id=1, token="interaction-token", data=SimpleNamespace(name=name)
+    )
+
+
+async def deferred(ctx, response, component: bool = False):
+    async def work():
+        if isinstance(response, Exception):
+            raise response
+
+        return response
+
+    acknowledgement = await defer_interaction(ctx, work(), component=component)
+    await background_tasks.shutdown()
+
+    return acknowledgement.response
+
+
+@pytest.mark.asyncio
+async def test_commands_edit_the_original_response(fake):
+    response = AuthView.challenge_ok("hash")
+
+    assert await deferred(interaction("auth"), response) == {
+        "type": 5,
+        "data": {"flags": 64},
+    }
+
+    # Flags can't be edited, the rest of the response is sent as is
+    data = dict(response_payload(response)["data"])
+    del data["flags"]
+
+    [(kind, body)] = fake.state.interactions
+    assert kind == "original"
+    assert body["content"] == data["content"]
+    assert body["embeds"] == data["embeds"]
+    assert body["components"] == data["components"]
+    assert "flags" not in body
+
+
+@pytest.mark.asyncio
+async def test_component_updates_edit_the_message(fake):
+    ctx = interaction("auth.verify")
+    response = AuthView.verification_ok(update_message=True)
+
+    assert await deferred(ctx, response, component=True) == {"type": 6}
+
+    [(kind, body)] = fake.state.interactions
+    assert kind == "original"
+    assert body["embeds"] == response_payload(response)["data"]["embeds"]
+
+
+@pytest.mark.asyncio
+async def test_component_replies_are_ephemeral_followups(fake):
+    ctx = interaction("auth.verify")
+    response = AuthView.verification_ok(update_message=False)
+
+    assert await deferred(ctx, response, component=True) == {"type": 6}
+
+    [(kind, body)] = fake.state.interactions
+    assert kind == "followup"
+    assert body["flags"] == 64
+    assert body["embeds"] == response_payload(response)["data"]["embeds"]
+
+
+@pytest.mark.asyncio
+async def test_failed_handlers_still_answer(fake):
+    await deferred(interaction("auth"), ValueError("boom"))
+
+    [(kind, body)] = fake.state.interactions
+    assert kind == "original"
+    assert "Something went wrong" in body["embeds"][0]["description"]
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from app.clients.discord_api.endpoints import Api
+from app.clients.discord_api.ratelimit import RateLimiter
+
+
+def test_route_key_major_parameter():
+    key = RateLimiter.route_key(
+        "PUT", Api.GUILD_MEMBER_ROLE, {"guildId": 1, "userId": 2, "roleId": 3}
+    )
+
+    assert key == ("PUT", Api.GUILD_MEMBER_ROLE, "1")
+
+    key = RateLimiter.route_key("POST", Api.CHANNEL_MESSAGES, {"channelId": 5})
+
+    assert key == ("POST", Api.CHANNEL_MESSAGES, "5")
+
+
+@pytest.mark.asyncio
+async def test_waits_for_exhausted_bucket():
+    limiter = RateLimiter()
+    key = RateLimiter.route_key("POST", Api.CHANNEL_MESSAGES, {"channelId": 5})
+
+    await limiter.acquire(key)
+    limiter.update(
+        key,
+        200,
+        {
+            "X-RateLimit-Bucket": "abc",
+            "X-RateLimit-Limit": "5",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset-After": "0.1",
+        },
+    )
+
+    started = time.monotonic()
+    await limiter.acquire(key)
+
+    assert time.monotonic() - started >= 0.09
+    assert limiter.stats()["delayed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_major_parameters_are_separate_buckets():
+    limiter = RateLimiter()
+    key = RateLimiter.route_key("POST", Api.CHANNEL_MESSAGES, {"channelId": 5})
+    other = RateLimiter.route_key("POST", Api.CHANNEL_MESSAGES, {"channelId": 6})
+
+    limiter.update(
+        key,
+        200,
+        {
+            "X-RateLimit-Bucket": "abc",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset-After": "10",
+        },
+    )
+
+    waited = await asyncio.wait_for(limiter.acquire(other), timeout=1)
+
+    assert waited < 0.1
+
+
+@pytest.mark.asyncio
+async def test_429_returns_retry_after():
+    limiter = RateLimiter()
+    key = RateLimiter.route_key("GET", Api.GUILD, {"guildId": 1})
+
+    retry_after = limiter.update(key, 429, {"Retry-After": "0.05"})
+
+    assert retry_after == 0.05
+    assert limiter.stats()["ratelimited"] == 1
+
+    waited = await limiter.acquire(key)
+
+    assert waited >= 0.04
+
+
+def test_webhook_tokens_are_not_kept():
+    key = RateLimiter.route_key(
+        "POST", Api.WEBHOOK, {"webhookId": 1, "webhookToken": "secret"}
+    )
+    other = RateLimiter.route_key(
+        "POST", Api.WEBHOOK, {"webhookId": 1, "webhookToken": "other"}
+    )
+
+    assert key != other
+    assert "secret" not in str(key)
+    assert "secret" not in RateLimiter.describe(key)
+
+
+@pytest.mark.asyncio
+async def test_reset_buckets_are_dropped():
+    limiter = RateLimiter(sweep_interval=0)
+
+    for token in range(10):
+        key = RateLimiter.route_key(
+            "POST", Api.WEBHOOK, {"webhookId": 1, "webhookToken": str(token)}
+        )
+        await limiter.acquire(key)
+        limiter.update(key, 200, {"X-RateLimit-Reset-After": "0"})
+
+    assert limiter.stats()["buckets"] == 1
@@ -0,0 +1,76 @@
+import random
+import time
+
+import pytest
+
+from httpx import ASGITransport, AsyncClient
+
+from app.clients.discord_api.client import DiscordClient, RatelimitExceeded
+from app.clients.discord_api.models.channel import CreateMessage
+from app.clients.discord_api.retry import RetryPolicy
+from benchmarks.fakes import create_fake_flaky
+
+
+def create_client(fake, **retry) -> DiscordClient:
+    retry.setdefault("base_delay", 0.01)
+    return DiscordClient(
+        "token",
+        client=AsyncClient(transport=ASGITransport(app=fake)),
+        retry=RetryPolicy(rng=random.Random(0), **retry),
+    )
+
+
+@pytest.mark.asyncio
+async def test_role_grant_waits_out_a_rate_limit():
+    fake = create_fake_flaky([(429, {"Retry-After": "0.2"})], status=204)
+    client = create_client(fake)
+
+    started = time.monotonic()
+    assert await client.add_guild_member_role(1, 2, 3)
+
+    assert time.monotonic() - started >= 0.2
+    assert fake.state.requests == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_role_grant_retries_server_errors():
+    fake = create_fake_flaky([(502, {}), (503, {})], status=204)
+    client = create_client(fake)
+
+    assert await client.add_guild_member_role(1, 2, 3)
+
+    assert fake.state.requests == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_messages_are_not_resent_after_server_errors():
+    fake = create_fake_flaky([(502, {})])
+    client = create_client(fake)
+
+    assert await client.create_message(1, CreateMessage(content="hi")) is None
+
+    assert fake.state.requests == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_past_the_budget_give_up():
+    fake = create_fake_flaky([(429, {"Retry-After": "5"})], status=204)
+    client = create_client(fake, budget=1.0)
+
+    with pytest.raises(RatelimitExceeded):
+        await client.add_guild_member_role(1, 2, 3)
+
+    assert fake.state.requests == 1
+    await client.close()
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0, rng=random.Random(0))
+
+    delays = [policy.backoff(attempt) for attempt in range(1, 10)]
+
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) == len(delays)
@@ -0,0 +1,86 @@
+import pytest
+
+from httpx import ASGITransport, HTTPStatusError
+
+from app.clients.goon_files_api import GoonFilesApi, Service, ServiceToken
+from benchmarks.fakes import create_fake_flaky, create_fake_goon_files
+from .utils import generate_random_date, generate_username
+
+_host = "http://goon-files"
+
+
+async def _populated_client(fake, count: int) -> GoonFilesApi:
+    client = GoonFilesApi(host=_host, transport=ASGITransport(app=fake))
+
+    for userId in range(count):
+        await client.create_user(
+            userId,
+            generate_username(),
+            generate_random_date(),
+            [ServiceToken(Service.DISCORD, str(userId))],
+        )
+
+    # Start the lookups from a cold cache
+    client.user_cache.clear()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_find_users_by_service_batches():
+    fake = create_fake_goon_files()
+    client = await _populated_client(fake, 25)
+
+    tokens = [str(i) for i in range(30)]
+    users = [
+        user
+        async for user in client.find_users_by_service(
+            Service.DISCORD, tokens, chunk_size=10
+        )
+    ]
+
+    assert sorted(user.userId for user in users) == list(range(25))
+    assert fake.state.requests["POST /user/batch"] == 3
+
+    # Found and missing users are both cached
+    again = [u async for u in client.find_users_by_service(Service.DISCORD, tokens)]
+
+    assert len(again) == 25
+    assert fake.state.requests["POST /user/batch"] == 3
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_find_users_by_service_falls_back_without_batch():
+    fake = create_fake_goon_files(batch=False)
+    client = await _populated_client(fake, 5)
+
+    tokens = [str(i) for i in range(10)]
+    users = [
+        user
+        async for user in client.find_users_by_service(
+            Service.DISCORD, tokens, chunk_size=3
+        )
+    ]
+
+    assert sorted(user.userId for user in users) == list(range(5))
+    assert not client.batch_supported
+    assert fake.state.requests["GET /user/"] == 10
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_find_users_by_service_raises_when_batch_fails():
+    fake = create_fake_flaky([(503, {})])
+    client = GoonFilesApi(host=_host, transport=ASGITransport(app=fake))
+
+    with pytest.raises(HTTPStatusError):
+        async for _ in client.find_users_by_service(Service.DISCORD, ["1", "2"]):
+            pass
+
+    # Not retried one token at a time
+    assert client.batch_supported
+    assert fake.state.requests == 1
+
+    await client.close()
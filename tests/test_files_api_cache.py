@@ -0,0 +1,61 @@
+import pytest
+
+from httpx import ASGITransport
+
+from app.clients.goon_files_api import GoonFilesApi, Service, ServiceToken
+from benchmarks.fakes import create_fake_goon_files
+from .utils import generate_random_date, generate_username
+
+_host = "http://goon-files"
+
+
+@pytest.fixture
+def fake():
+    return create_fake_goon_files()
+
+
+@pytest.fixture
+async def client(fake) -> GoonFilesApi:
+    client = GoonFilesApi(host=_host, transport=ASGITransport(app=fake))
+
+    yield client
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_negative_lookup_is_cached(client: GoonFilesApi, fake):
+    assert await client.find_user_by_service(Service.DISCORD, "1234") is None
+    assert await client.find_user_by_service(Service.DISCORD, "1234") is None
+
+    assert fake.state.requests["GET /user/"] == 1
+
+
+@pytest.mark.asyncio
+async def test_create_replaces_negative_entry(client: GoonFilesApi, fake):
+    assert await client.find_user_by_service(Service.DISCORD, "1234") is None
+
+    await client.create_user(
+        1,
+        generate_username(),
+        generate_random_date(),
+        [ServiceToken("discord", "1234")],
+    )
+    user = await client.find_user_by_service(Service.DISCORD, "1234")
+
+    assert user is not None
+    assert user.userId == 1
+    assert fake.state.requests["GET /user/"] == 1
+
+
+@pytest.mark.asyncio
+async def test_add_service_token_invalidates_old_token(client: GoonFilesApi, fake):
+    await client.create_user(
+        1, generate_username(), generate_random_date(), [ServiceToken("discord", "1")]
+    )
+    assert await client.find_user_by_service(Service.DISCORD, "1") is not None
+
+    await client.add_service_token(1, ServiceToken("discord", "2"))
+
+    assert await client.find_user_by_service(Service.DISCORD, "1") is None
+    assert (await client.find_user_by_service(Service.DISCORD, "2")).userId == 1
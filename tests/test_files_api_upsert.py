@@ -0,0 +1,78 @@
+import pytest
+
+from httpx import ASGITransport
+
+from app.clients.goon_files_api import (
+    GoonFilesApi,
+    Service,
+    ServiceToken,
+    UpsertUnsupported,
+)
+from benchmarks.fakes import create_fake_goon_files
+from .utils import generate_random_date, generate_username
+
+_host = "http://goon-files"
+
+
+def _client(fake) -> GoonFilesApi:
+    return GoonFilesApi(host=_host, transport=ASGITransport(app=fake))
+
+
+@pytest.mark.asyncio
+async def test_create_or_update_uses_upsert():
+    fake = create_fake_goon_files()
+    client = _client(fake)
+    regDate = generate_random_date()
+
+    user = await client.create_or_update_user(
+        1, generate_username(), regDate, ServiceToken(Service.DISCORD, "1")
+    )
+    assert user.find_service(Service.DISCORD).token == "1"
+
+    user = await client.create_or_update_user(
+        1, user.userName, regDate, ServiceToken(Service.DISCORD, "2")
+    )
+    assert user.find_service(Service.DISCORD).token == "2"
+
+    assert fake.state.requests == {"PUT /user/1": 2}
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_create_or_update_falls_back_without_upsert():
+    fake = create_fake_goon_files(upsert=False)
+    client = _client(fake)
+    regDate = generate_random_date()
+
+    user = await client.create_or_update_user(
+        1, generate_username(), regDate, ServiceToken(Service.DISCORD, "1")
+    )
+    assert user.find_service(Service.DISCORD).token == "1"
+    assert not client.upsert_supported
+
+    user = await client.create_or_update_user(
+        1, user.userName, regDate, ServiceToken(Service.DISCORD, "2")
+    )
+    assert user.find_service(Service.DISCORD).token == "2"
+
+    # Only the first call probes for the upsert endpoint
+    assert fake.state.requests["PUT /user/1"] == 1
+    assert fake.state.requests["PUT /user/1/service"] == 1
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_upsert_raises_without_the_endpoint():
+    client = _client(create_fake_goon_files(upsert=False))
+
+    with pytest.raises(UpsertUnsupported):
+        await client.upsert_user(
+            1,
+            generate_username(),
+            generate_random_date(),
+            ServiceToken(Service.DISCORD, "1"),
+        )
+
+    await client.close()
@@ -0,0 +1,155 @@
+import pytest
+
+from app.cache import TTLCache
+from app.models import goon_server
+from app.clients.discord_api.models.webhook import Webhook
+from app.models.goon_server import GoonServer, ServerConfig, ServerOption
+from app.mongodb import db
+from benchmarks.fakes import MemoryEngine
+
+
+class CountingEngine(MemoryEngine):
+    def __init__(self) -> None:
+        super().__init__()
+        self.finds = 0
+        self.fail_saves = False
+
+    async def find_one(self, model, *queries, sort=None):
+        self.finds += 1
+        return await super().find_one(model, *queries, sort=sort)
+
+    async def save(self, instance):
+        if self.fail_saves:
+            raise ConnectionError("mongo is down")
+
+        return await super().save(instance)
+
+
+@pytest.fixture
+def engine(monkeypatch) -> CountingEngine:
+    engine = CountingEngine()
+
+    monkeypatch.setattr(db, "engine", engine)
+    monkeypatch.setattr(goon_server, "_server_cache", TTLCache(max_size=16, ttl=60))
+    monkeypatch.setattr(goon_server, "_server_count", None)
+
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_servers_are_cached(engine: CountingEngine):
+    await engine.save(GoonServer(serverId=1, options={ServerOption.AUTH_ROLE: "5"}))
+
+    first = await GoonServer.find_server(1)
+    assert await GoonServer.find_server(1) is first
+    assert engine.finds == 1
+
+    # Unknown servers aren't cached, they may be setup any moment
+    assert await GoonServer.find_server(2) is None
+    assert await GoonServer.find_server(2) is None
+    assert engine.finds == 3
+
+
+@pytest.mark.asyncio
+async def test_saved_options_are_written_through(engine: CountingEngine):
+    before = await GoonServer.save_options(1, {ServerOption.AUTH_ROLE: "5"})
+    after = await GoonServer.save_options(1, {ServerOption.NOTICE_CHANNEL_ADMIN: "6"})
+
+    # Readers holding the old instance never see it change
+    assert before.options == {ServerOption.AUTH_ROLE: "5"}
+
+    finds = engine.finds
+    assert await GoonServer.find_server(1) is after
+    assert after.options == {
+        ServerOption.AUTH_ROLE: "5",
+        ServerOption.NOTICE_CHANNEL_ADMIN: "6",
+    }
+    assert engine.finds == finds
+
+    # Stored too
+    GoonServer.invalidate_server(1)
+    assert (await GoonServer.find_server(1)).options == after.options
+    assert engine.finds == finds + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_saves_leave_the_cache_alone(engine: CountingEngine):
+    cached = await GoonServer.save_options(1, {ServerOption.AUTH_ROLE: "5"})
+
+    engine.fail_saves = True
+    with pytest.raises(ConnectionError):
+        await GoonServer.save_options(1, {ServerOption.AUTH_ROLE: "6"})
+
+    assert await GoonServer.find_server(1) is cached
+    assert cached.options == {ServerOption.AUTH_ROLE: "5"}
+
+
+def test_config_parses_ids():
+    config = ServerConfig(
+        1,
+        {
+            ServerOption.AUTH_ROLE: "5",
+            ServerOption.NOTICE_CHANNEL_ADMIN: "10",
+            ServerOption.NOTICE_CHANNEL_AUTH: "11",
+            ServerOption.NOTICE_DIGEST: "60",
+        },
+    )
+
+    assert config.serverId == 1
+    assert config.auth_role == 5
+    assert config.notice_channel_admin == 10
+    assert config.notice_channel_auth == 11
+    assert config.notice_digest == 60
+    assert config.notice_webhooks == dict()
+
+
+def test_config_ignores_missing_and_invalid_options():
+    config = ServerConfig(1, dict())
+    assert config.auth_role is None
+    assert config.notice_channel_admin is None
+    assert config.notice_channel_auth is None
+    assert config.notice_digest is None
+
+    config = ServerConfig(
+        1,
+        {
+            ServerOption.AUTH_ROLE: "",
+            ServerOption.NOTICE_CHANNEL_ADMIN: "<#10>",
+            ServerOption.NOTICE_CHANNEL_AUTH: "11.5",
+            # Digests are off at 0
+            ServerOption.NOTICE_DIGEST: "0",
+        },
+    )
+    assert config.auth_role is None
+    assert config.notice_channel_admin is None
+    assert config.notice_channel_auth is None
+    assert config.notice_digest is None
+
+
+def test_config_parses_webhooks_by_channel():
+    admin = Webhook(id=20, token="admin-token", channel_id=10)
+    auth = Webhook(id=21, token="auth-token", channel_id=11)
+
+    config = ServerConfig(
+        1,
+        {
+            ServerOption.NOTICE_WEBHOOK_ADMIN: admin.option_value(),
+            ServerOption.NOTICE_WEBHOOK_AUTH: auth.option_value(),
+        },
+    )
+    assert config.notice_webhooks == {10: admin, 11: auth}
+
+    # Turned off or not stored by this version
+    for value in ["", "20/admin-token", "10/twenty/admin-token", "10/20/a/b"]:
+        config = ServerConfig(1, {ServerOption.NOTICE_WEBHOOK_ADMIN: value})
+        assert config.notice_webhooks == dict()
+
+
+@pytest.mark.asyncio
+async def test_config_is_loaded_from_the_server(engine: CountingEngine):
+    assert await GoonServer.find_config(1) is None
+
+    await engine.save(GoonServer(serverId=1, options={ServerOption.AUTH_ROLE: "5"}))
+    config = await GoonServer.find_config(1)
+    assert config.auth_role == 5
+    assert config.notice_channel_admin is None
@@ -0,0 +1,80 @@
+import pytest
+
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import Response
+
+from app import metrics
+from app.cache import TTLCache
+from app.clients.goon_files_api import GoonFilesApi
+from benchmarks.fakes import create_fake_goon_files
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test", ["route"], buckets=[1, 5])
+
+    histogram.observe(0.5, route="/a")
+    histogram.observe(3, route="/a")
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{route="/a",le="1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="5"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'test_seconds_sum{route="/a"} 3.5' in lines
+    assert 'test_seconds_count{route="/a"} 2' in lines
+
+
+def test_counter_requires_every_label():
+    counter = metrics.Counter("test_total", "Test", ["cache", "result"])
+
+    with pytest.raises(ValueError):
+        counter.inc(cache="users")
+
+
+def test_named_cache_records_lookups():
+    cache = TTLCache(name="test_cache")
+
+    cache.get("missing")
+    cache.set("present", 1)
+    cache.get("present")
+
+    assert metrics.cache_requests.value(cache="test_cache", result="miss") == 1
+    assert metrics.cache_requests.value(cache="test_cache", result="hit") == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_requests_are_recorded():
+    client = GoonFilesApi(
+        host="http://goon-files",
+        transport=ASGITransport(app=create_fake_goon_files()),
+    )
+    labels = dict(upstream="goon_files", method="GET", route="/user/{id}")
+    before = metrics.upstream_request_seconds.count(**labels, status=404)
+
+    assert await client.find_user(1234) is None
+
+    assert metrics.upstream_request_seconds.count(**labels, status=404) == before + 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics_need_the_token():
+    async def app(scope, receive, send):
+        await Response(status_code=404)(scope, receive, send)
+
+    middleware = metrics.MetricsMiddleware(app, token="secret")
+    client = AsyncClient(transport=ASGITransport(app=middleware), base_url="http://t")
+
+    assert (await client.get("/metrics")).status_code == 401
+    assert (
+        await client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    ).status_code == 401
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "cache_requests_total" in response.text
+
+    # Everything else goes on to the app
+    assert (await client.get("/other")).status_code == 404
+
+    await client.aclose()
@@ -0,0 +1,41 @@
+import pytest
+
+from app.models.user_auth_request import UserAuthRequest
+from app.mongodb import create_index
+from benchmarks.fakes import MemoryEngine
+
+
+@pytest.mark.asyncio
+async def test_indexes_with_changed_options_are_replaced():
+    engine = MemoryEngine()
+    collection = engine.get_collection(UserAuthRequest)
+
+    # As created before attempts were one per user
+    await create_index(collection, "userDiscordId")
+
+    results = await UserAuthRequest.configure_indexes(engine)
+
+    assert all(ok for _, ok in results)
+    assert collection.indexes["userDiscordId_1"]["unique"]
+
+    # Configuring again changes nothing
+    assert await UserAuthRequest.configure_indexes(engine) == results
+
+
+@pytest.mark.asyncio
+async def test_indexes_are_kept_when_unique_would_fail():
+    engine = MemoryEngine()
+    collection = engine.get_collection(UserAuthRequest)
+
+    await create_index(collection, "userDiscordId")
+    await collection.insert_many(
+        [
+            UserAuthRequest(userDiscordId=1, saName=name, challengeHash=name).doc()
+            for name in ("goon", "other")
+        ]
+    )
+
+    results = dict(await UserAuthRequest.configure_indexes(engine))
+
+    assert not results["user_auth_request.userDiscordId_1"]
+    assert collection.indexes["userDiscordId_1"] == {"key": [("userDiscordId", 1)]}
@@ -0,0 +1,223 @@
+import pytest
+
+from dispike.helper import Embed
+from httpx import ASGITransport, AsyncClient
+
+from app.clients.discord_api.client import DiscordClient
+from app.clients.discord_api.models.channel import CreateMessage
+from app.clients.discord_api.retry import RetryPolicy
+from app.discord import discord
+from app.models import outbox_job
+from app.models.outbox_job import JobKind, JobStatus, OutboxJob
+from app.mongodb import db
+from app.workers import OutboxWorker
+from benchmarks.fakes import MemoryEngine, create_fake_discord, create_fake_flaky
+
+
+@pytest.fixture
+def engine(monkeypatch) -> MemoryEngine:
+    engine = MemoryEngine()
+
+    monkeypatch.setattr(db, "engine", engine)
+    monkeypatch.setattr(outbox_job, "_queued", None)
+
+    return engine
+
+
+def use_discord(monkeypatch, fake) -> None:
+    client = DiscordClient(
+        "token",
+        client=AsyncClient(transport=ASGITransport(app=fake)),
+        retry=RetryPolicy(max_attempts=1),
+    )
+    monkeypatch.setattr(discord, "client", client)
+
+
+def jobs(engine: MemoryEngine):
+    return [
+        OutboxJob.parse_doc(dict(d))
+        for d in engine.get_collection(OutboxJob).documents.values()
+    ]
+
+
+@pytest.mark.asyncio
+async def test_role_grant_queues_its_notices(engine, monkeypatch):
+    fake = create_fake_flaky([], status=204)
+    use_discord(monkeypatch, fake)
+
+    await OutboxJob.enqueue(OutboxJob.grant_role(1, 2, 3, "hello", [10, 11]))
+
+    worker = OutboxWorker()
+    assert await worker.process(await OutboxJob.claim(60))
+    assert fake.state.requests == 1
+
+    notices = jobs(engine)
+    assert [job.kind for job in notices] == [JobKind.NOTICE, JobKind.NOTICE]
+    assert sorted(job.channelId for job in notices) == [10, 11]
+    assert all(job.content == "hello" for job in notices)
+    await discord.client.close()
+
+
+@pytest.mark.asyncio
+async def test_claimed_jobs_are_held_for_the_lease(engine):
+    await OutboxJob.enqueue(OutboxJob.notice(1, 10, "hello"))
+
+    job = await OutboxJob.claim(60)
+    assert job.attempts == 1
+
+    assert await OutboxJob.claim(60) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_then_given_up_on(engine, monkeypatch):
+    fake = create_fake_flaky([(500, {}), (500, {})])
+    use_discord(monkeypatch, fake)
+
+    await OutboxJob.enqueue(OutboxJob.notice(1, 10, "hello"))
+
+    worker = OutboxWorker(max_attempts=2, poll_interval=0)
+    assert not await worker.process(await OutboxJob.claim(60))
+
+    [job] = jobs(engine)
+    assert job.status == JobStatus.PENDING
+    assert job.lastError is not None
+
+    assert not await worker.process(await OutboxJob.claim(60))
+
+    [job] = jobs(engine)
+    assert job.status == JobStatus.FAILED
+    assert await OutboxJob.claim(60) is None
+    await discord.client.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_grants_fail_and_notify_admins(engine, monkeypatch):
+    fake = create_fake_flaky([(403, {})], status=204)
+    use_discord(monkeypatch, fake)
+
+    await OutboxJob.enqueue(OutboxJob.grant_role(1, 2, 3, "hello", [10, 11]))
+
+    worker = OutboxWorker(max_attempts=8)
+    assert not await worker.process(await OutboxJob.claim(60))
+    assert fake.state.requests == 1
+
+    grant, notice = sorted(jobs(engine), key=lambda job: job.kind != JobKind.GRANT_ROLE)
+    assert grant.status == JobStatus.FAILED
+    assert grant.attempts == 1
+
+    # Only the admin channel hears about it
+    assert notice.kind == JobKind.NOTICE
+    assert notice.channelId == 10
+    assert "<@&3>" in notice.content
+    await discord.client.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_do_not_use_up_attempts(engine, monkeypatch):
+    fake = create_fake_flaky([(429, {"Retry-After": "30"})])
+    use_discord(monkeypatch, fake)
+
+    await OutboxJob.enqueue(OutboxJob.notice(1, 10, "hello"))
+
+    worker = OutboxWorker(max_attempts=1)
+    assert not await worker.process(await OutboxJob.claim(60))
+
+    [job] = jobs(engine)
+    assert job.status == JobStatus.PENDING
+    assert job.attempts == 0
+    assert await OutboxJob.claim(60) is None
+    await discord.client.close()
+
+
+@pytest.mark.asyncio
+async def test_digest_guilds_collect_notices_per_channel(engine, monkeypatch):
+    use_discord(monkeypatch, create_fake_discord(1))
+
+    worker = OutboxWorker(digest_size=3)
+    for user in [2, 3]:
+        await OutboxJob.enqueue(
+            OutboxJob.grant_role(1, user, 3, f"user {user}", [10], digestWindow=60)
+        )
+        assert await worker.process(await OutboxJob.claim(60))
+
+    [digest] = jobs(engine)
+    assert digest.kind == JobKind.DIGEST
+    assert digest.entries == ["user 2", "user 3"]
+
+    # Held for the window
+    assert await OutboxJob.claim(60) is None
+
+    # Sent as soon as it's full
+    await OutboxJob.add_to_digest(1, 10, "user 4", 60, 3)
+    digest = await OutboxJob.claim(60)
+    assert digest.entries == ["user 2", "user 3", "user 4"]
+
+    # A digest being sent takes no more notices
+    await OutboxJob.add_to_digest(1, 10, "user 5", 60, 3)
+    assert len(jobs(engine)) == 2
+
+    assert await worker.process(digest)
+
+    [digest] = jobs(engine)
+    assert digest.entries == ["user 5"]
+    await discord.client.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_digest_adds_share_the_open_digest(engine, monkeypatch):
+    await OutboxJob.configure_indexes(engine)
+    await OutboxJob.add_to_digest(1, 10, "user 2", 60, 3)
+
+    # A concurrent upsert that missed the open digest tries to insert another
+    collection = engine.get_collection(OutboxJob)
+    sorted_ = collection.sorted
+    misses = [[]]
+    monkeypatch.setattr(
+        collection,
+        "sorted",
+        lambda query, sort: misses.pop() if misses else sorted_(query, sort),
+    )
+    await OutboxJob.add_to_digest(1, 10, "user 3", 60, 3)
+    assert misses == []
+
+    [digest] = jobs(engine)
+    assert digest.entries == ["user 2", "user 3"]
+    assert digest.digestOpen
+
+    # Full digests are closed, the next notice starts a new one
+    await OutboxJob.add_to_digest(1, 10, "user 4", 60, 3)
+    await OutboxJob.add_to_digest(1, 10, "user 5", 60, 3)
+
+    full, digest = sorted(jobs(engine), key=lambda job: len(job.entries))[::-1]
+    assert full.entries == ["user 2", "user 3", "user 4"]
+    assert full.digestOpen is None
+    assert digest.entries == ["user 5"]
+
+
+def test_long_digests_become_embeds():
+    lines = [CreateMessage(content="x" * 100) for _ in range(100)]
+
+    [message] = CreateMessage.digest(lines[:2])
+    assert message.content == "x" * 100 + "\n" + "x" * 100
+
+    messages = CreateMessage.digest(lines)
+    assert len(messages) > 1
+    assert all(message.content is None for message in messages)
+
+    embeds = [embed for message in messages for embed in message.embeds]
+    assert sum(e.description.count("x") for e in embeds) == 10000
+    assert all(len(e.description) <= 4096 for e in embeds)
+
+    # Each message stays within discord's total
+    for message in messages:
+        assert sum(len(e.description) for e in message.embeds) <= 6000
+
+
+def test_digests_split_past_the_embed_cap():
+    embeds = [Embed(description=str(i)) for i in range(25)]
+    messages = CreateMessage.digest([CreateMessage(embeds=[e]) for e in embeds])
+
+    assert [len(message.embeds) for message in messages] == [10, 10, 5]
+    assert [e.description for m in messages for e in m.embeds] == [
+        str(i) for i in range(25)
+    ]
@@ -0,0 +1,51 @@
+import pytest
+
+from app.models import goon_server
+from app.models.goon_server import GoonServer, ServerOption
+from app.mongodb import db
+
+
+class FakeEngine:
+    def __init__(self, count: int) -> None:
+        self.servers = count
+        self.counts = 0
+
+    async def count(self, model) -> int:
+        self.counts += 1
+        return self.servers
+
+    async def find_one(self, model, *queries):
+        return None
+
+    async def save(self, instance):
+        self.servers += 1
+        return instance
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine(3)
+
+    monkeypatch.setattr(db, "engine", engine)
+    monkeypatch.setattr(goon_server, "_server_count", None)
+
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_server_count_is_cached(engine: FakeEngine):
+    assert await GoonServer.server_count() == 3
+    assert await GoonServer.server_count() == 3
+
+    assert engine.counts == 1
+
+
+@pytest.mark.asyncio
+async def test_new_server_bumps_count(engine: FakeEngine):
+    await GoonServer.refresh_server_count()
+
+    await GoonServer.save_options(1234, {ServerOption.AUTH_ROLE: "1"})
+    GoonServer.invalidate_server(1234)
+
+    assert await GoonServer.server_count() == 4
+    assert engine.counts == 1
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(5)])
+
+    assert results == [1] * 5
+    assert calls == 1
+    assert flight.shared == 4
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    async def fetch():
+        return object()
+
+    assert await flight.do("key", fetch) is not await flight.do("key", fetch)
+    assert flight.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_exceptions_reach_every_caller():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("Unknown hash")
+
+    results = await asyncio.gather(
+        flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", fetch))
+    second = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+
+    assert await second == "done"
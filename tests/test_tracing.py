@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from httpx import ASGITransport
+from loguru import logger
+
+from app import tracing
+from app.config import tracing_settings
+from app.tasks import background_tasks
+from benchmarks.fakes import create_fake_collector
+
+
+@pytest.fixture
+def slow_logs(monkeypatch):
+    monkeypatch.setattr(tracing_settings, "slow_threshold", 0.0)
+
+    records = []
+    sink = logger.add(lambda message: records.append(message.record), level="WARNING")
+
+    yield records
+
+    logger.remove(sink)
+
+
+@pytest.mark.asyncio
+async def test_spans_follow_tasks():
+    async def stage(name: str):
+        with tracing.span(name):
+            await asyncio.sleep(0.01)
+
+    with tracing.trace("auth.verify") as trace:
+        with tracing.span("parent") as parent:
+            await asyncio.gather(stage("child.a"), stage("child.b"))
+
+    children = [s for s in trace.spans if s.name.startswith("child")]
+
+    assert len(children) == 2
+    assert all(s.parent_id == parent.span_id for s in children)
+    assert parent.parent_id == trace.root.span_id
+    assert set(trace.stages()) == {"parent", "child.a", "child.b"}
+
+
+def test_span_outside_trace_is_noop():
+    with tracing.span("orphan") as span:
+        assert span is None
+
+
+@pytest.mark.asyncio
+async def test_slow_trace_logs_breakdown(slow_logs):
+    with tracing.trace("about") as trace:
+        with tracing.span("mongo.count"):
+            pass
+
+    assert len(slow_logs) == 1
+    assert slow_logs[0]["extra"]["trace_id"] == trace.trace_id
+    assert "mongo.count" in slow_logs[0]["extra"]["stages"]
+
+
+@pytest.mark.asyncio
+async def test_held_trace_finishes_on_release(slow_logs):
+    with tracing.trace("auth") as trace:
+        trace.hold()
+
+    assert not trace.finished
+    assert len(slow_logs) == 0
+
+    trace.release()
+
+    assert trace.finished
+    assert len(slow_logs) == 1
+
+
+@pytest.mark.asyncio
+async def test_traces_export_as_otlp():
+    collector = create_fake_collector()
+    exporter = tracing.TraceExporter(
+        "http://collector", transport=ASGITransport(app=collector)
+    )
+    tracing.set_exporter(exporter)
+
+    try:
+        with tracing.trace("help", guild=1234):
+            with tracing.span("stage"):
+                pass
+
+        await background_tasks.shutdown()
+    finally:
+        tracing.set_exporter(None)
+        await exporter.close()
+
+    assert len(collector.state.exports) == 1
+
+    scope = collector.state.exports[0]["resourceSpans"][0]["scopeSpans"][0]
+    root, stage = scope["spans"]
+
+    assert root["name"] == "help"
+    assert root["attributes"] == [{"key": "guild", "value": {"intValue": "1234"}}]
+    assert stage["parentSpanId"] == root["spanId"]
+    assert stage["traceId"] == root["traceId"]
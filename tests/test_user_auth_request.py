@@ -0,0 +1,72 @@
+import pytest
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models.user_auth_request import UserAuthRequest
+from app.mongodb import db
+from benchmarks.fakes import MemoryEngine
+
+
+@pytest.fixture
+async def engine(monkeypatch) -> MemoryEngine:
+    engine = MemoryEngine()
+    monkeypatch.setattr(db, "engine", engine)
+
+    await UserAuthRequest.configure_indexes(engine)
+    return engine
+
+
+def attempt(discordId: int, saName: str) -> UserAuthRequest:
+    return UserAuthRequest(
+        userDiscordId=discordId, saName=saName, challengeHash=f"hash-{saName}"
+    )
+
+
+def stored(engine: MemoryEngine):
+    return list(engine.get_collection(UserAuthRequest).documents.values())
+
+
+@pytest.mark.asyncio
+async def test_replace_for_user_keeps_one_attempt(engine):
+    first = await UserAuthRequest.replace_for_user(attempt(1, "goon"))
+    second = await UserAuthRequest.replace_for_user(attempt(1, "other"))
+
+    # Replaced in place
+    assert second.id == first.id
+    assert second.saName == "other"
+
+    [document] = stored(engine)
+    assert document["challengeHash"] == "hash-other"
+
+
+@pytest.mark.asyncio
+async def test_replace_for_user_retries_a_lost_upsert(engine, monkeypatch):
+    collection = engine.get_collection(UserAuthRequest)
+    find_one_and_replace = collection.find_one_and_replace
+
+    async def concurrent_insert(query, replacement, upsert=False, **kwargs):
+        if upsert:
+            # Another request inserts the user's attempt first
+            await collection.insert_many([attempt(1, "goon").doc()])
+            raise DuplicateKeyError("E11000", 11000)
+
+        return await find_one_and_replace(query, replacement, **kwargs)
+
+    monkeypatch.setattr(collection, "find_one_and_replace", concurrent_insert)
+
+    request = await UserAuthRequest.replace_for_user(attempt(1, "other"))
+    assert request.saName == "other"
+
+    [document] = stored(engine)
+    assert document["saName"] == "other"
+
+
+@pytest.mark.asyncio
+async def test_delete_for_user(engine):
+    await UserAuthRequest.replace_for_user(attempt(1, "goon"))
+    await UserAuthRequest.replace_for_user(attempt(2, "other"))
+
+    assert await UserAuthRequest.delete_for_user(1) == 1
+    assert await UserAuthRequest.delete_for_user(1) == 0
+
+    assert [d["userDiscordId"] for d in stored(engine)] == [2]
@@ -0,0 +1,73 @@
+import asyncio
+
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from app.models.user_auth_request import UserAuthRequest
+from app.mongodb import db
+from app.workers import VerificationPoller
+from benchmarks.fakes import MemoryEngine
+
+
+class PendingAuthApi:
+    """Nobody has put the hash in their profile yet"""
+
+    def __init__(self) -> None:
+        self.checked: List[str] = []
+
+    async def get_verification_update(self, user_name: str):
+        self.checked.append(user_name)
+        await asyncio.sleep(0.01)
+
+        return SimpleNamespace(validated=False)
+
+
+@pytest.fixture
+def engine(monkeypatch) -> MemoryEngine:
+    engine = MemoryEngine(lambda: 0.001)
+    monkeypatch.setattr(db, "engine", engine)
+
+    return engine
+
+
+async def add_attempts(count: int) -> None:
+    for user in range(count):
+        await db.engine.save(
+            UserAuthRequest(
+                userDiscordId=user,
+                saName=f"goon{user}",
+                challengeHash=f"hash{user}",
+                guildId=1,
+            )
+        )
+
+
+@pytest.mark.asyncio
+async def test_pollers_never_check_the_same_attempt(engine):
+    await add_attempts(20)
+
+    auth_api = PendingAuthApi()
+    pollers = [
+        VerificationPoller(SimpleNamespace(auth_api=auth_api), concurrency=3)
+        for _ in range(3)
+    ]
+    await asyncio.gather(*[poller.poll() for poller in pollers])
+
+    assert sorted(auth_api.checked) == sorted(f"goon{user}" for user in range(20))
+
+
+@pytest.mark.asyncio
+async def test_claimed_attempts_are_not_expedited(engine):
+    await add_attempts(1)
+
+    request = await UserAuthRequest.claim_pending(60)
+    await UserAuthRequest.expedite_check(request)
+
+    assert await UserAuthRequest.claim_pending(60) is None
+
+    await UserAuthRequest.schedule_check(request, 60)
+    await UserAuthRequest.expedite_check(request)
+
+    assert await UserAuthRequest.claim_pending(60) is not None
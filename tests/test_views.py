@@ -0,0 +1,51 @@
+import json
+
+from dispike.helper import Embed
+from dispike.response import DiscordResponse
+
+from app.clients.discord_api.models.channel import CreateMessage
+from app.commands.views import AuthView, HelpView
+from app.commands.views.templates import (
+    PrecompiledResponse,
+    ResponseTemplate,
+    placeholder,
+    response_payload,
+)
+from app.commands.views.utils import create_response
+
+
+def test_template_escapes_values():
+    template = ResponseTemplate(
+        DiscordResponse(content=f"Hello {placeholder('name')}!", empherical=True)
+    )
+
+    response = template.render(name='"Goon"\nMcGoonface')
+
+    assert response.payload["data"]["content"] == 'Hello "Goon"\nMcGoonface!'
+    assert response.payload["data"]["flags"] == 1 << 6
+
+
+def test_static_response_is_shared():
+    assert HelpView.help() is HelpView.help()
+    assert len(HelpView.help().payload["data"]["embeds"][0]["fields"]) == 1
+
+
+def test_create_response_does_not_mutate_embed():
+    embed = Embed(title="Title", description="Description")
+
+    create_response(embed)
+    create_response(embed)
+
+    assert embed.fields == []
+
+
+def test_precompiled_response_converts_to_message():
+    response = AuthView.challenge_ok("a-hash")
+    assert isinstance(response, PrecompiledResponse)
+
+    message = CreateMessage.from_response(response, response_payload(response))
+    data = message.request_data()
+
+    assert "**a-hash**" in data["embeds"][0]["description"]
+    assert data["components"][0]["components"][1]["custom_id"] == "auth.verify"
+    assert json.loads(response.response.body) == response.payload
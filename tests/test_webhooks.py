@@ -0,0 +1,243 @@
+from types import SimpleNamespace
+
+import pytest
+
+from httpx import ASGITransport, AsyncClient
+
+from app.circuit import CircuitOpenError
+from app.clients.discord_api.client import DiscordClient
+from app.clients.discord_api.models.webhook import Webhook
+from app.commands.setup import SetupCollection
+from app.commands.views.templates import response_payload
+from app.discord import discord
+from app.models import outbox_job
+from app.models.goon_server import GoonServer, ServerConfig, ServerOption
+from app.models.outbox_job import OutboxJob
+from app.mongodb import db
+from app.tasks import background_tasks
+from app.workers import OutboxWorker
+from benchmarks.fakes import MemoryEngine, create_fake_discord
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = create_fake_discord(1)
+
+    monkeypatch.setattr(db, "engine", MemoryEngine())
+    monkeypatch.setattr(outbox_job, "_queued", None)
+
+    monkeypatch.setattr(
+        discord,
+        "client",
+        DiscordClient("token", client=AsyncClient(transport=ASGITransport(app=fake))),
+    )
+    monkeypatch.setattr(
+        discord,
+        "webhooks",
+        DiscordClient(
+            client=AsyncClient(transport=ASGITransport(app=fake)),
+            name="discord_webhooks",
+        ),
+    )
+
+    return fake
+
+
+def webhook_url(webhook: Webhook) -> str:
+    return f"https://discord.com/api/webhooks/{webhook.id}/{webhook.token}"
+
+
+async def notice_webhooks(server, admin=None, auth=None, provision=None):
+    # Admin notices go to channel 10, auth notices to 11
+    return await SetupCollection()._SetupCollection__notice_webhooks(
+        server,
+        {
+            ServerOption.NOTICE_WEBHOOK_ADMIN: (10, admin),
+            ServerOption.NOTICE_WEBHOOK_AUTH: (11, auth),
+        },
+        provision,
+        [],
+    )
+
+
+async def run_setup(guild_id: int, **kwargs):
+    # The fake discord has user 1 own every guild
+    ctx = SimpleNamespace(
+        id=1, guild_id=guild_id, member=SimpleNamespace(user=SimpleNamespace(id=1))
+    )
+    response = await SetupCollection().about(
+        ctx,
+        **{
+            "authenticated-role": "5",
+            "admin-notice-channel": "10",
+            "auth-notice-channel": "11",
+            **kwargs,
+        },
+    )
+
+    # Unsaved webhooks are deleted in the background
+    await background_tasks.shutdown()
+
+    return response_payload(response)["data"]["embeds"][0]
+
+
+def test_webhook_urls():
+    webhook = Webhook.from_url("https://discord.com/api/webhooks/123/abc-DEF_1")
+    assert (webhook.id, webhook.token) == (123, "abc-DEF_1")
+
+    assert (
+        Webhook.from_url("https://canary.discordapp.com/api/webhooks/1/a") is not None
+    )
+    assert Webhook.from_url("https://example.com/api/webhooks/1/a") is None
+    assert Webhook.from_url("not a url") is None
+
+
+def test_webhooks_are_stored_with_their_channel():
+    webhook = Webhook(id=2, token="abc", channel_id=10)
+    assert Webhook.from_option(webhook.option_value()) == webhook
+
+    config = ServerConfig(
+        1,
+        {
+            ServerOption.NOTICE_CHANNEL_ADMIN: "10",
+            ServerOption.NOTICE_WEBHOOK_ADMIN: webhook.option_value(),
+            ServerOption.NOTICE_WEBHOOK_AUTH: "",
+        },
+    )
+    assert config.notice_webhooks == {10: webhook}
+
+
+@pytest.mark.asyncio
+async def test_notices_go_through_the_channels_webhook(fake):
+    webhook = await discord.client.create_webhook(10, "Goon Auth Network")
+    assert await discord.webhooks.get_webhook(webhook.id, webhook.token) == webhook
+
+    await GoonServer.save_options(
+        5001,
+        {
+            ServerOption.NOTICE_CHANNEL_ADMIN: "10",
+            ServerOption.NOTICE_CHANNEL_AUTH: "11",
+            ServerOption.NOTICE_WEBHOOK_ADMIN: webhook.option_value(),
+        },
+    )
+
+    await OutboxJob.enqueue(
+        OutboxJob.notice(5001, 10, "hello"), OutboxJob.notice(5001, 11, "hello")
+    )
+
+    worker = OutboxWorker()
+    for _ in range(2):
+        assert await worker.process(await OutboxJob.claim(60))
+
+    assert sorted(fake.state.messages) == [("channel", 11), ("webhook", webhook.id)]
+
+    GoonServer.invalidate_server(5001)
+    await discord.client.close()
+    await discord.webhooks.close()
+
+
+@pytest.mark.asyncio
+async def test_setup_checks_webhook_urls_post_to_their_channel(fake):
+    webhook = await discord.client.create_webhook(10, "Existing")
+
+    options = await notice_webhooks(None, admin=webhook_url(webhook))
+    assert options == {
+        ServerOption.NOTICE_WEBHOOK_ADMIN: f"10/{webhook.id}/{webhook.token}"
+    }
+
+    assert "<#11>" in await notice_webhooks(None, auth=webhook_url(webhook))
+    assert "<#10>" in await notice_webhooks(None, admin="not a url")
+
+    await discord.client.close()
+    await discord.webhooks.close()
+
+
+@pytest.mark.asyncio
+async def test_setup_provisions_webhooks_once(fake):
+    options = await notice_webhooks(None, provision=True)
+
+    config = ServerConfig(1, options)
+    assert sorted(config.notice_webhooks) == [10, 11]
+    assert len(fake.state.webhooks) == 2
+
+    # Setting up again reuses them
+    server = await GoonServer.save_options(1, options)
+    assert await notice_webhooks(server, provision=True) == options
+    assert len(fake.state.webhooks) == 2
+
+    # Until they're turned off, which deletes them
+    assert await notice_webhooks(server, provision=False) == {
+        ServerOption.NOTICE_WEBHOOK_ADMIN: "",
+        ServerOption.NOTICE_WEBHOOK_AUTH: "",
+    }
+    assert fake.state.webhooks == {}
+    assert len(fake.state.deleted) == 2
+
+    GoonServer.invalidate_server(1)
+    await discord.client.close()
+    await discord.webhooks.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_setup_deletes_the_webhooks_it_created(fake):
+    fake.state.forbidden.add(11)
+
+    embed = await run_setup(5003, **{"notice-webhooks": True})
+    assert "<#11>" in embed["description"]
+
+    assert fake.state.webhooks == {}
+    assert len(fake.state.deleted) == 1
+    assert await GoonServer.find_server(5003) is None
+
+    await discord.client.close()
+    await discord.webhooks.close()
+
+
+@pytest.mark.asyncio
+async def test_setup_cleans_up_when_an_upstream_fails(fake, monkeypatch):
+    create_webhook = discord.client.create_webhook
+
+    async def create_or_fail(channelId: int, name: str):
+        if channelId == 11:
+            raise CircuitOpenError("discord", 10.0)
+
+        return await create_webhook(channelId, name)
+
+    monkeypatch.setattr(discord.client, "create_webhook", create_or_fail)
+
+    embed = await run_setup(5004, **{"notice-webhooks": True})
+    assert "trouble reaching" in embed["description"]
+
+    assert fake.state.webhooks == {}
+    assert len(fake.state.deleted) == 1
+    assert await GoonServer.find_server(5004) is None
+
+    await discord.client.close()
+    await discord.webhooks.close()
+
+
+@pytest.mark.asyncio
+async def test_deleted_webhooks_are_forgotten(fake):
+    webhook = await discord.client.create_webhook(10, "Goon Auth Network")
+    await discord.webhooks.delete_webhook(webhook.id, webhook.token)
+
+    await GoonServer.save_options(
+        5002,
+        {
+            ServerOption.NOTICE_CHANNEL_ADMIN: "10",
+            ServerOption.NOTICE_WEBHOOK_ADMIN: webhook.option_value(),
+        },
+    )
+
+    await OutboxJob.enqueue(OutboxJob.notice(5002, 10, "hello"))
+    assert await OutboxWorker().process(await OutboxJob.claim(60))
+
+    # Sent as the bot instead, and from now on
+    assert fake.state.messages == [("channel", 10)]
+
+    config = await GoonServer.find_config(5002)
+    assert config.notice_webhooks == {}
+
+    GoonServer.invalidate_server(5002)
+    await discord.client.close()
+    await discord.webhooks.close()